@@ -1,8 +1,12 @@
 import os
+import asyncio
+import mimetypes
 import django
+from urllib.parse import unquote
 from django.core.asgi import get_asgi_application
 from django.conf import settings
 from django.core.files.storage import default_storage
+from django.utils.http import http_date, parse_http_date_safe
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 django.setup()
@@ -10,57 +14,192 @@ django.setup()
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
 import websocket.routing
+from config.warmup import run_shutdown_hooks, start_startup_hooks
+from goods.images import is_derivative, original_path
 
 
 class MediaFileServer:
+    chunk_size = 64 * 1024
+    content_types = {
+        'jpg': 'image/jpeg', 'jpeg': 'image/jpeg',
+        'png': 'image/png', 'gif': 'image/gif',
+        'webp': 'image/webp', 'svg': 'image/svg+xml',
+    }
+    
+    def __init__(self):
+        self.django_app = get_asgi_application()
+        self.media_prefix = '/' + settings.MEDIA_URL.strip('/') + '/'
+    
     async def __call__(self, scope, receive, send):
         path = scope['path']
-        if path.startswith(settings.MEDIA_URL):
-            file_path = path[len(settings.MEDIA_URL):]
-            try:
-                if default_storage.exists(file_path):
-                    file = default_storage.open(file_path)
-                    content = file.read()
-                    file.close()
-                    ext = file_path.split('.')[-1].lower()
-                    content_types = {
-                        'jpg': 'image/jpeg', 'jpeg': 'image/jpeg',
-                        'png': 'image/png', 'gif': 'image/gif',
-                        'webp': 'image/webp', 'svg': 'image/svg+xml',
-                    }
-                    content_type = content_types.get(ext, 'application/octet-stream')
-                    await send({
-                        'type': 'http.response.start',
-                        'status': 200,
-                        'headers': [[b'content-type', content_type.encode()]],
-                    })
-                    await send({
-                        'type': 'http.response.body',
-                        'body': content,
-                    })
-                    return
-            except Exception:
-                pass
-            await send({
-                'type': 'http.response.start',
-                'status': 404,
-                'headers': [[b'content-type', b'text/html']],
-            })
-            await send({
-                'type': 'http.response.body',
-                'body': b'Not Found',
-            })
+        if path.startswith(self.media_prefix):
+            await self.serve_media(scope, send, unquote(path[len(self.media_prefix):]))
             return
         
-        django_app = get_asgi_application()
-        await django_app(scope, receive, send)
+        await self.django_app(scope, receive, send)
+    
+    def stat(self, file_path):
+        fallback = False
+        if not default_storage.exists(file_path) and is_derivative(file_path):
+            file_path = original_path(file_path)
+            fallback = True
+        if not file_path or not default_storage.exists(file_path):
+            return None
+        modified = default_storage.get_modified_time(file_path)
+        return file_path, default_storage.size(file_path), modified.timestamp(), fallback
+    
+    async def send_simple(self, send, status, body=b'', headers=None):
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [[b'content-type', b'text/html']] + (headers or []),
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': body,
+        })
+    
+    def is_not_modified(self, request_headers, etag, mtime):
+        if_none_match = request_headers.get(b'if-none-match')
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.decode('latin-1').split(',')]
+            return '*' in tags or etag in tags or f'W/{etag}' in tags
+        if_modified_since = request_headers.get(b'if-modified-since')
+        if if_modified_since is not None:
+            since = parse_http_date_safe(if_modified_since.decode('latin-1'))
+            return since is not None and int(mtime) <= since
+        return False
+    
+    def parse_range(self, request_headers, size, etag, mtime):
+        header = request_headers.get(b'range')
+        if header is None:
+            return None
+        if_range = request_headers.get(b'if-range')
+        if if_range is not None:
+            value = if_range.decode('latin-1').strip()
+            if value.startswith('"') or value.startswith('W/'):
+                if value != etag:
+                    return None
+            elif parse_http_date_safe(value) != int(mtime):
+                return None
+        
+        units, _, spec = header.decode('latin-1').partition('=')
+        if units.strip() != 'bytes' or ',' in spec:
+            return None
+        start, _, end = spec.strip().partition('-')
+        try:
+            if start == '':
+                length = int(end)
+                if length <= 0:
+                    return False
+                return max(size - length, 0), size - 1
+            start = int(start)
+            end = min(int(end), size - 1) if end else size - 1
+        except ValueError:
+            return None
+        if start >= size or start > end:
+            return False
+        return start, end
+    
+    async def serve_media(self, scope, send, file_path):
+        if scope['method'] not in ('GET', 'HEAD'):
+            await self.send_simple(send, 405, b'Method Not Allowed', [[b'allow', b'GET, HEAD']])
+            return
+        
+        try:
+            info = await asyncio.to_thread(self.stat, file_path)
+        except Exception:
+            info = None
+        if info is None:
+            await self.send_simple(send, 404, b'Not Found')
+            return
+        
+        file_path, size, mtime, fallback = info
+        etag = f'"{int(mtime * 1000000):x}-{size:x}"'
+        max_age = 60 if fallback else getattr(settings, 'MEDIA_CACHE_MAX_AGE', 31536000)
+        content_type = self.content_types.get(
+            file_path.rsplit('.', 1)[-1].lower(),
+            mimetypes.guess_type(file_path)[0] or 'application/octet-stream'
+        )
+        headers = [
+            [b'etag', etag.encode()],
+            [b'last-modified', http_date(mtime).encode()],
+            [b'cache-control', f'public, max-age={max_age}'.encode()],
+            [b'accept-ranges', b'bytes'],
+        ]
+        request_headers = dict(scope.get('headers', []))
+        
+        if self.is_not_modified(request_headers, etag, mtime):
+            await send({'type': 'http.response.start', 'status': 304, 'headers': headers})
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+        
+        byte_range = self.parse_range(request_headers, size, etag, mtime)
+        if byte_range is False:
+            await self.send_simple(
+                send, 416, b'Range Not Satisfiable', [[b'content-range', f'bytes */{size}'.encode()]]
+            )
+            return
+        
+        status = 200
+        start, end = 0, size - 1
+        if byte_range:
+            status = 206
+            start, end = byte_range
+            headers.append([b'content-range', f'bytes {start}-{end}/{size}'.encode()])
+        length = max(end - start + 1, 0)
+        headers += [
+            [b'content-type', content_type.encode()],
+            [b'content-length', str(length).encode()],
+        ]
+        
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        if scope['method'] == 'HEAD' or length == 0:
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+        
+        file = await asyncio.to_thread(default_storage.open, file_path, 'rb')
+        try:
+            if start:
+                await asyncio.to_thread(file.seek, start)
+            remaining = length
+            while remaining > 0:
+                chunk = await asyncio.to_thread(file.read, min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({
+                    'type': 'http.response.body',
+                    'body': chunk,
+                    'more_body': remaining > 0,
+                })
+            if remaining > 0:
+                await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            await asyncio.to_thread(file.close)
+
+
+class LifespanApp:
+    async def __call__(self, scope, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await asyncio.to_thread(start_startup_hooks().join)
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await asyncio.to_thread(run_shutdown_hooks)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
 
 
 application = ProtocolTypeRouter({
     "http": MediaFileServer(),
+    "lifespan": LifespanApp(),
     "websocket": AuthMiddlewareStack(
         URLRouter(
             websocket.routing.websocket_urlpatterns
         )
     ),
 })
+
+start_startup_hooks()
@@ -88,6 +88,19 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "willing-old-sell",
+    },
+    # 同一主机上的各 Web 进程和管理命令共用，多主机部署时改为 Redis 或 Memcached
+    "shared": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / ".cache" / "django",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
@@ -103,6 +116,7 @@ USE_TZ = True
 STATIC_URL = "static/"
 MEDIA_URL = "media/"
 MEDIA_ROOT = BASE_DIR / "media"
+MEDIA_CACHE_MAX_AGE = 60 * 60 * 24 * 365
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -115,12 +129,82 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'config.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DATETIME_FORMAT': '%Y-%m-%d %H:%M:%S',
     'DATE_FORMAT': '%Y-%m-%d',
 }
 
+# 为空时按数据库类型自动选择：MySQL ngram 全文索引 / SQLite FTS5 / 进程内 jieba 倒排索引
+# jieba 倒排索引每个进程各持一份，由启动钩子构建，只适合单进程回退部署
+GOODS_SEARCH_BACKEND = None
+GOODS_SEARCH_MAX_RESULTS = 1000
+
+# MemoryViewCounter 只在各进程内缓冲，由进程内定时写回；flush_view_counts 命令需要共享缓存上的 CacheViewCounter
+GOODS_VIEW_COUNTER_BACKEND = 'goods.view_counter.MemoryViewCounter'
+GOODS_VIEW_COUNTER_FLUSH_INTERVAL = 10
+
+GOODS_LIST_PROJECTION = True
+GOODS_PRICE_FACET_BOUNDS = [50, 100, 200, 500, 1000, 2000, 5000]
+
+GOODS_IMAGE_FORMAT = 'WEBP'
+GOODS_IMAGE_WORKERS = 2
+GOODS_UPLOAD_WORKERS = 4
+
+GOODS_KEYWORD_CACHE_SIZE = 4096
+WISHLIST_MATCH_USE_INDEX = True
+WISHLIST_MATCH_WORKERS = 2
+WISHLIST_SCORE_BLOCK_CELLS = 10000000
+WISHLIST_JOB_WORKERS = 2
+WISHLIST_JOB_QUEUE_SIZE = 100
+WISHLIST_JOB_TIMEOUT = 600
+
+GOODS_SIMILAR_MERGE_THRESHOLD = 256
+GOODS_SIMILAR_CACHE_SIZE = 10000
+
+GOODS_PRICING_MODEL_FILE = BASE_DIR / ".cache" / "price_model.pickle"
+GOODS_PRICING_ORDER_WEIGHT = 3.0
+GOODS_PRICING_RELOAD_INTERVAL = 30
+GOODS_PRICING_MAX_BATCH = 500
+
+GOODS_HOT_EVENT_WEIGHTS = {'view': 1.0, 'chat': 5.0, 'order': 10.0}
+GOODS_HOT_HALF_LIFE_HOURS = 24
+GOODS_HOT_SIZE = 200
+GOODS_HOT_MIN_SCORE = 0.05
+GOODS_HOT_FLUSH_INTERVAL = 60
+
+GOODS_IMPORT_BATCH_SIZE = 500
+GOODS_IMPORT_MAX_ERRORS = 100
+GOODS_BULK_MAX_IDS = 500
+
+GOODS_OUTBOX_BATCH_SIZE = 500
+
+# 缓存代数需要所有进程可见，导入、归一地点等命令和其他进程的写入才能让缓存失效，不能使用 LocMemCache
+GOODS_RESPONSE_CACHE = 'shared'
+GOODS_RESPONSE_CACHE_TTL = 60
+# 取货地点匹配器每隔若干秒对比一次共享缓存中的地点字典代数，其他进程修改字典后在该间隔内生效
+GOODS_LOCATION_CHECK_INTERVAL = 5
+
+JIEBA_CACHE_FILE = BASE_DIR / ".cache" / "jieba.dict.pickle"
+LAZY_IMPORT_MODULES = ['numpy', 'pandas', 'scipy', 'sklearn']
+
+ASGI_STARTUP_HOOKS = [
+    'config.warmup.warmup_jieba',
+    'goods.search.warmup_search_index',
+    'goods.similar.warmup_similar_index',
+    'goods.pricing.load_price_model',
+    'goods.hot.load_hot_scores',
+    'wishlist.jobs.resume_match_jobs',
+]
+ASGI_SHUTDOWN_HOOKS = [
+    'goods.view_counter.flush_view_counts',
+    'goods.hot.flush_hot_scores',
+]
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
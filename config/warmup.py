@@ -0,0 +1,110 @@
+import atexit
+import logging
+import os
+import pickle
+import tempfile
+import threading
+import time
+
+import jieba
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_jieba_cache_file():
+    cache_file = getattr(settings, 'JIEBA_CACHE_FILE', None)
+    return os.fspath(cache_file) if cache_file else None
+
+
+def dictionary_signature():
+    dictionary = jieba.dt.dictionary
+    if dictionary is None:
+        return (jieba.__version__, 'default')
+    stat = os.stat(dictionary)
+    return (jieba.__version__, dictionary, stat.st_size, stat.st_mtime_ns)
+
+
+def configure_jieba():
+    cache_file = get_jieba_cache_file()
+    if not cache_file:
+        return None
+    cache_dir = os.path.dirname(cache_file)
+    os.makedirs(cache_dir, exist_ok=True)
+    jieba.dt.tmp_dir = cache_dir
+    return cache_file
+
+
+def load_jieba_cache(cache_file):
+    tokenizer = jieba.dt
+    with tokenizer.lock:
+        if tokenizer.initialized:
+            return True
+        try:
+            with open(cache_file, 'rb') as f:
+                signature, freq, total = pickle.load(f)
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            return False
+        if signature != dictionary_signature():
+            return False
+        tokenizer.FREQ, tokenizer.total = freq, total
+        tokenizer.initialized = True
+    return True
+
+
+def dump_jieba_cache(cache_file):
+    jieba.initialize()
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(cache_file))
+    with os.fdopen(fd, 'wb') as f:
+        pickle.dump((dictionary_signature(), jieba.dt.FREQ, jieba.dt.total), f,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, cache_file)
+
+
+def warmup_jieba():
+    start = time.perf_counter()
+    cache_file = configure_jieba()
+    if cache_file and not load_jieba_cache(cache_file):
+        dump_jieba_cache(cache_file)
+    jieba.initialize()
+    logger.info('jieba 词典加载完成，耗时 %.0f ms', (time.perf_counter() - start) * 1000)
+
+
+def run_hooks(setting_name):
+    for hook_path in getattr(settings, setting_name, []):
+        try:
+            import_string(hook_path)()
+        except Exception:
+            logger.exception('钩子 %s 执行失败', hook_path)
+        finally:
+            connection.close()
+
+
+_startup_thread = None
+_shutdown_done = False
+_hooks_lock = threading.Lock()
+
+
+def start_startup_hooks():
+    # daphne 不实现 ASGI lifespan 协议，服务进程加载 ASGI 应用时即在后台执行启动钩子，只执行一次
+    global _startup_thread
+    with _hooks_lock:
+        if _startup_thread is None:
+            _startup_thread = threading.Thread(
+                target=run_hooks, args=('ASGI_STARTUP_HOOKS',), name='startup-hooks', daemon=True
+            )
+            _startup_thread.start()
+            atexit.register(run_shutdown_hooks)
+    return _startup_thread
+
+
+def run_shutdown_hooks():
+    global _shutdown_done
+    with _hooks_lock:
+        if _shutdown_done:
+            return
+        _shutdown_done = True
+    run_hooks('ASGI_SHUTDOWN_HOOKS')
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, Goods
+from .models import Category, ChangeEvent, ChangeFeedCursor, Goods, PickupLocation
 
 
 @admin.register(Category)
@@ -9,8 +9,9 @@ class CategoryAdmin(admin.ModelAdmin):
     ordering = ['-created_at']
     
     def goods_count(self, obj):
-        return obj.goods.count()
-    goods_count.short_description = '物品数量'
+        return obj.on_sale_count
+    goods_count.short_description = '在售数量'
+    goods_count.admin_order_field = 'on_sale_count'
 
 
 @admin.register(Goods)
@@ -20,4 +21,26 @@ class GoodsAdmin(admin.ModelAdmin):
     list_filter = ['status', 'condition', 'category', 'is_traded']
     search_fields = ['name', 'description', 'seller__username']
     raw_id_fields = ['seller', 'category']
+    readonly_fields = ['location']
     ordering = ['-created_at']
+
+
+@admin.register(PickupLocation)
+class PickupLocationAdmin(admin.ModelAdmin):
+    list_display = ['id', 'campus', 'building', 'aliases', 'created_at']
+    list_filter = ['campus']
+    search_fields = ['campus', 'building']
+
+
+@admin.register(ChangeEvent)
+class ChangeEventAdmin(admin.ModelAdmin):
+    list_display = ['id', 'seq', 'topic', 'object_id', 'action', 'created_at']
+    list_filter = ['topic', 'action']
+    search_fields = ['object_id']
+    ordering = ['-id']
+
+
+@admin.register(ChangeFeedCursor)
+class ChangeFeedCursorAdmin(admin.ModelAdmin):
+    list_display = ['consumer', 'last_id', 'updated_at']
+    ordering = ['consumer']
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class GoodsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "goods"
+
+    def ready(self):
+        # jieba 缓存目录在 warmup_jieba 启动钩子中创建，这里不做文件系统操作
+        from . import signals  # noqa: F401
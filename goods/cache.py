@@ -0,0 +1,115 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+
+GENERATION_KEY = 'goods:cache:generation'
+STATS_KEY_PREFIX = 'goods:cache:stats:'
+CACHED_ENDPOINTS = ['goods_list', 'category_list']
+
+
+def get_cache():
+    return caches[getattr(settings, 'GOODS_RESPONSE_CACHE', 'default')]
+
+
+def get_ttl():
+    return getattr(settings, 'GOODS_RESPONSE_CACHE_TTL', 60)
+
+
+def initial_generation():
+    # 代数键被淘汰后从当前时间重新开始，不会回到旧代数而命中过期的响应
+    return time.time_ns() // 1000
+
+
+def get_generation(key=GENERATION_KEY):
+    cache = get_cache()
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, initial_generation(), timeout=None)
+        generation = cache.get(key)
+    return generation if generation is not None else initial_generation()
+
+
+def bump_generation(key=GENERATION_KEY):
+    cache = get_cache()
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, initial_generation(), timeout=None)
+        return cache.incr(key)
+
+
+def normalize_params(query_params):
+    items = []
+    for key in sorted(query_params):
+        values = sorted(value for value in query_params.getlist(key) if value != '')
+        if values:
+            items.append(f"{key}={','.join(values)}")
+    return '&'.join(items)
+
+
+def make_key(endpoint, request):
+    digest = hashlib.sha1(
+        f'{request.get_host()}?{normalize_params(request.query_params)}'.encode()
+    ).hexdigest()
+    return f'goods:resp:{get_generation()}:{endpoint}:{digest}'
+
+
+def record(endpoint, outcome):
+    cache = get_cache()
+    key = f'{STATS_KEY_PREFIX}{endpoint}:{outcome}'
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def get_stats(endpoints):
+    cache = get_cache()
+    keys = [f'{STATS_KEY_PREFIX}{endpoint}:{outcome}' for endpoint in endpoints for outcome in ('hit', 'miss')]
+    values = cache.get_many(keys)
+    stats = {}
+    for endpoint in endpoints:
+        hits = values.get(f'{STATS_KEY_PREFIX}{endpoint}:hit', 0)
+        misses = values.get(f'{STATS_KEY_PREFIX}{endpoint}:miss', 0)
+        total = hits + misses
+        stats[endpoint] = {
+            'hit': hits,
+            'miss': misses,
+            'hit_rate': round(hits / total, 4) if total else 0,
+        }
+    return stats
+
+
+def reset_stats(endpoints):
+    get_cache().delete_many([
+        f'{STATS_KEY_PREFIX}{endpoint}:{outcome}' for endpoint in endpoints for outcome in ('hit', 'miss')
+    ])
+
+
+def cache_anonymous_response(endpoint):
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            if request.user.is_authenticated or get_ttl() <= 0:
+                return view_method(self, request, *args, **kwargs)
+
+            cache = get_cache()
+            key = make_key(endpoint, request)
+            data = cache.get(key)
+            if data is not None:
+                record(endpoint, 'hit')
+                return Response(data)
+
+            record(endpoint, 'miss')
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, timeout=get_ttl())
+            return response
+        return wrapper
+    return decorator
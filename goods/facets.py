@@ -0,0 +1,65 @@
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Case, Count, IntegerField, Value, When
+
+from .models import Goods
+
+
+def get_price_bounds():
+    return getattr(settings, 'GOODS_PRICE_FACET_BOUNDS', [50, 100, 200, 500, 1000, 2000, 5000])
+
+
+def price_bucket_expression(bounds):
+    return Case(
+        *[When(price__lt=bound, then=Value(index)) for index, bound in enumerate(bounds)],
+        default=Value(len(bounds)),
+        output_field=IntegerField()
+    )
+
+
+def price_bucket_ranges(bounds):
+    ranges = []
+    lower = 0
+    for bound in bounds:
+        ranges.append((lower, bound))
+        lower = bound
+    ranges.append((lower, None))
+    return ranges
+
+
+def compute_facets(queryset):
+    bounds = get_price_bounds()
+    rows = (
+        queryset.order_by()
+        .annotate(price_bucket=price_bucket_expression(bounds))
+        .values('category_id', 'category__name', 'condition', 'price_bucket')
+        .annotate(total=Count('id'))
+    )
+
+    categories = OrderedDict()
+    conditions = {}
+    buckets = {}
+    for row in rows:
+        category = categories.setdefault(row['category_id'], {
+            'id': row['category_id'],
+            'name': row['category__name'],
+            'count': 0,
+        })
+        category['count'] += row['total']
+        conditions[row['condition']] = conditions.get(row['condition'], 0) + row['total']
+        buckets[row['price_bucket']] = buckets.get(row['price_bucket'], 0) + row['total']
+
+    condition_labels = dict(Goods.CONDITION_CHOICES)
+    return {
+        'total': sum(conditions.values()),
+        'category': sorted(categories.values(), key=lambda item: -item['count']),
+        'condition': [
+            {'value': value, 'label': condition_labels[value], 'count': conditions.get(value, 0)}
+            for value, _ in Goods.CONDITION_CHOICES
+        ],
+        'price': [
+            {'min': lower, 'max': upper, 'count': buckets.get(index, 0)}
+            for index, (lower, upper) in enumerate(price_bucket_ranges(bounds))
+        ],
+    }
@@ -0,0 +1,205 @@
+import atexit
+import bisect
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EVENT_WEIGHTS = {
+    'view': 1.0,
+    'chat': 5.0,
+    'order': 10.0,
+}
+
+NEG_INF = float('-inf')
+
+
+def get_event_weights():
+    return getattr(settings, 'GOODS_HOT_EVENT_WEIGHTS', DEFAULT_EVENT_WEIGHTS)
+
+
+def get_decay_rate():
+    half_life = getattr(settings, 'GOODS_HOT_HALF_LIFE_HOURS', 24)
+    return math.log(2) / (half_life * 3600)
+
+
+def logaddexp(a, b):
+    if a == NEG_INF:
+        return b
+    if b == NEG_INF:
+        return a
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+class HotRanking:
+    def __init__(self):
+        self.size = getattr(settings, 'GOODS_HOT_SIZE', 200)
+        self.flush_interval = getattr(settings, 'GOODS_HOT_FLUSH_INTERVAL', 60)
+        self.min_score = getattr(settings, 'GOODS_HOT_MIN_SCORE', 0.05)
+        self.rate = get_decay_rate()
+        self._lock = threading.RLock()
+        self._keys = {}
+        self._pending = {}
+        self._top = []
+        self._in_top = {}
+        self._loaded = False
+        self._flusher = None
+
+    def event_key(self, kind, now=None):
+        weight = get_event_weights()[kind]
+        return math.log(weight) + self.rate * (now or time.time())
+
+    def score(self, key, now=None):
+        return math.exp(key - self.rate * (now or time.time()))
+
+    def floor_key(self, now=None):
+        return math.log(self.min_score) + self.rate * (now or time.time())
+
+    def _place(self, goods_id, key):
+        old = self._in_top.get(goods_id)
+        if old is not None:
+            del self._top[bisect.bisect_left(self._top, (old, goods_id))]
+        elif len(self._top) >= self.size and key <= self._top[0][0]:
+            return
+        bisect.insort(self._top, (key, goods_id))
+        self._in_top[goods_id] = key
+        if len(self._top) > self.size:
+            _, dropped = self._top.pop(0)
+            del self._in_top[dropped]
+
+    def _merge(self, goods_id, key):
+        merged = max(self._keys.get(goods_id, NEG_INF), key)
+        self._keys[goods_id] = merged
+        self._place(goods_id, merged)
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        from .models import GoodsHotScore
+
+        rows = GoodsHotScore.objects.filter(rank_key__gte=self.floor_key()).values_list('goods_id', 'rank_key')
+        with self._lock:
+            if self._loaded:
+                return
+            for goods_id, key in rows.iterator(chunk_size=2000):
+                self._merge(goods_id, logaddexp(key, self._pending.get(goods_id, NEG_INF)))
+            self._loaded = True
+
+    def incr(self, goods_id, kind):
+        self._ensure_loaded()
+        key = self.event_key(kind)
+        with self._lock:
+            self._pending[goods_id] = logaddexp(self._pending.get(goods_id, NEG_INF), key)
+            self._keys[goods_id] = logaddexp(self._keys.get(goods_id, NEG_INF), key)
+            self._place(goods_id, self._keys[goods_id])
+        self.ensure_flusher()
+
+    def top(self, limit):
+        self._ensure_loaded()
+        now = time.time()
+        with self._lock:
+            entries = self._top[-limit:] if limit > 0 else []
+            return [(goods_id, self.score(key, now)) for key, goods_id in reversed(entries)]
+
+    def remove(self, goods_id):
+        from .models import GoodsHotScore
+
+        with self._lock:
+            self._keys.pop(goods_id, None)
+            self._pending.pop(goods_id, None)
+            key = self._in_top.pop(goods_id, None)
+            if key is not None:
+                del self._top[bisect.bisect_left(self._top, (key, goods_id))]
+        GoodsHotScore.objects.filter(goods_id=goods_id).delete()
+
+    def flush(self):
+        from .models import GoodsHotScore
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        try:
+            self.persist(pending)
+        except Exception:
+            with self._lock:
+                for goods_id, key in pending.items():
+                    self._pending[goods_id] = logaddexp(self._pending.get(goods_id, NEG_INF), key)
+            raise
+
+        floor = self.floor_key()
+        GoodsHotScore.objects.filter(rank_key__lt=floor).delete()
+        rows = list(GoodsHotScore.objects.order_by('-rank_key').values_list('goods_id', 'rank_key')[:self.size])
+        with self._lock:
+            self._keys = {goods_id: key for goods_id, key in self._keys.items() if key >= floor or goods_id in self._pending}
+            self._top = [(key, goods_id) for key, goods_id in self._top if goods_id in self._keys]
+            self._in_top = {goods_id: key for key, goods_id in self._top}
+            for goods_id, key in rows:
+                self._merge(goods_id, logaddexp(key, self._pending.get(goods_id, NEG_INF)))
+        return len(pending)
+
+    def persist(self, pending):
+        from .models import GoodsHotScore
+
+        if not pending:
+            return
+        with transaction.atomic():
+            existing = dict(
+                GoodsHotScore.objects.select_for_update().filter(goods_id__in=list(pending))
+                .values_list('goods_id', 'rank_key')
+            )
+            rows = [
+                GoodsHotScore(goods_id=goods_id, rank_key=logaddexp(existing.get(goods_id, NEG_INF), key))
+                for goods_id, key in pending.items()
+            ]
+            options = {'update_conflicts': True, 'update_fields': ['rank_key', 'updated_at']}
+            if connection.features.supports_update_conflicts_with_target:
+                options['unique_fields'] = ['goods_id']
+            GoodsHotScore.objects.bulk_create(rows, **options)
+
+    def ensure_flusher(self):
+        if self._flusher is not None or self.flush_interval <= 0:
+            return
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._run_flusher, name='goods-hot-ranking', daemon=True)
+                self._flusher.start()
+                atexit.register(self.flush)
+
+    def _run_flusher(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('热度写回失败')
+            finally:
+                connection.close()
+
+
+_ranking = None
+_ranking_lock = threading.Lock()
+
+
+def get_hot_ranking():
+    global _ranking
+    if _ranking is None:
+        with _ranking_lock:
+            if _ranking is None:
+                _ranking = HotRanking()
+    return _ranking
+
+
+def load_hot_scores():
+    get_hot_ranking()._ensure_loaded()
+
+
+def flush_hot_scores():
+    if _ranking is not None:
+        return _ranking.flush()
+    return 0
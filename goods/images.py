@@ -0,0 +1,179 @@
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image, ImageOps
+
+
+logger = logging.getLogger(__name__)
+
+METADATA_KEYS = ('exif', 'xmp', 'XML:com.adobe.xmp', 'comment')
+STRIP_FORMATS = {
+    'JPEG': {'quality': 95},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 90},
+}
+
+DERIVATIVE_SIZES = {
+    'thumb': 240,
+    'medium': 720,
+    'full': 1600,
+}
+
+
+def get_image_format():
+    return getattr(settings, 'GOODS_IMAGE_FORMAT', 'WEBP').upper()
+
+
+def get_derivative_ext():
+    return 'webp' if get_image_format() == 'WEBP' else 'jpg'
+
+
+def is_derivative(path):
+    stem = os.path.splitext(path)[0]
+    return os.path.splitext(stem)[1].lstrip('.') in DERIVATIVE_SIZES
+
+
+def derivative_path(path, size_name):
+    stem = os.path.splitext(path)[0]
+    return f'{stem}.{size_name}.{get_derivative_ext()}'
+
+
+def original_path(path):
+    stem = os.path.splitext(path)[0]
+    if os.path.splitext(stem)[1].lstrip('.') not in DERIVATIVE_SIZES:
+        return None
+    original_stem = os.path.splitext(stem)[0]
+    directory, name = os.path.split(original_stem)
+    try:
+        for candidate in default_storage.listdir(directory)[1]:
+            if os.path.splitext(candidate)[0] == name and not is_derivative(candidate):
+                return f'{directory}/{candidate}' if directory else candidate
+    except FileNotFoundError:
+        pass
+    return None
+
+
+def derivative_urls(url):
+    media_prefix = f'/{settings.MEDIA_URL.strip("/")}/'
+    if not isinstance(url, str) or not url.startswith(media_prefix):
+        return {size_name: url for size_name in DERIVATIVE_SIZES}
+    path = url[len(media_prefix):]
+    return {
+        size_name: f'{media_prefix}{derivative_path(path, size_name)}'
+        for size_name in DERIVATIVE_SIZES
+    }
+
+
+def has_metadata(image):
+    if any(key in image.info for key in METADATA_KEYS) or image.getexif():
+        return True
+    return bool(getattr(image, 'text', None))
+
+
+def strip_metadata(file):
+    # 原图对外公开，EXIF 里可能带有拍摄位置等信息，按方向旋正后去掉元数据重新编码
+    try:
+        file.seek(0)
+        image = Image.open(file)
+        if image.format not in STRIP_FORMATS or not has_metadata(image):
+            return file
+        image.load()
+    except Exception:
+        return file
+    finally:
+        file.seek(0)
+
+    image_format = image.format
+    params = dict(STRIP_FORMATS[image_format])
+    for key in ('icc_profile', 'transparency', 'dpi'):
+        if key in image.info:
+            params[key] = image.info[key]
+    image = ImageOps.exif_transpose(image)
+    image.info = {}
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **params)
+    return SimpleUploadedFile(file.name, buffer.getvalue(), content_type=file.content_type)
+
+
+def has_alpha(image):
+    return image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+
+
+def encode_image(image, max_size):
+    # 调色板和灰度透明图先转为 RGBA，直接转 RGB 会把透明区域变成调色板底色
+    image = image.convert('RGBA' if has_alpha(image) else 'RGB')
+    image.thumbnail((max_size, max_size), Image.LANCZOS)
+
+    buffer = io.BytesIO()
+    if get_image_format() == 'WEBP':
+        image.save(buffer, 'WEBP', quality=80, method=4)
+    else:
+        if image.mode == 'RGBA':
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        image.save(buffer, 'JPEG', quality=82, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def generate_derivatives(path, force=False):
+    targets = {size_name: derivative_path(path, size_name) for size_name in DERIVATIVE_SIZES}
+    if not force and all(default_storage.exists(target) for target in targets.values()):
+        return targets
+
+    with default_storage.open(path, 'rb') as source:
+        image = Image.open(source)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    image.info.pop('exif', None)
+
+    for size_name, target in targets.items():
+        content = encode_image(image, DERIVATIVE_SIZES[size_name])
+        if default_storage.exists(target):
+            default_storage.delete(target)
+        default_storage.save(target, ContentFile(content))
+    return targets
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'GOODS_IMAGE_WORKERS', 2),
+                    thread_name_prefix='goods-image'
+                )
+    return _executor
+
+
+def _log_failure(future):
+    exc = future.exception()
+    if exc is not None:
+        logger.error('生成图片衍生尺寸失败: %s', exc)
+
+
+def wait_for_derivatives():
+    # 等待已排队的衍生图片生成完成，之后的调用会重新创建线程池
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+def schedule_derivatives(path):
+    future = get_executor().submit(generate_derivatives, path)
+    future.add_done_callback(_log_failure)
+    return future
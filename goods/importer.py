@@ -0,0 +1,202 @@
+import csv
+import io
+import json
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .cache import bump_generation
+from .keywords import add_keyword_postings, goods_keywords, replace_keyword_postings, unindexed_goods
+from .locations import match_location
+from .models import Category, Goods
+from .outbox import goods_payload, record_change, record_changes
+from .search import get_search_backend
+from .serializers import GoodsCreateSerializer
+from .signals import goods_bulk_created
+from .similar import get_similar_index
+
+
+IMPORT_FORMATS = ['csv', 'jsonl']
+
+
+def get_batch_size():
+    return getattr(settings, 'GOODS_IMPORT_BATCH_SIZE', 500)
+
+
+def get_max_errors():
+    return getattr(settings, 'GOODS_IMPORT_MAX_ERRORS', 100)
+
+
+def guess_format(filename, default='csv'):
+    name = (filename or '').lower()
+    if name.endswith('.jsonl') or name.endswith('.ndjson'):
+        return 'jsonl'
+    if name.endswith('.csv'):
+        return 'csv'
+    return default
+
+
+def text_stream(binary):
+    return io.TextIOWrapper(binary, encoding='utf-8-sig', newline='')
+
+
+def parse_csv_images(value):
+    value = (value or '').strip()
+    if not value:
+        return []
+    if value.startswith('['):
+        return json.loads(value)
+    return [url.strip() for url in value.split('|') if url.strip()]
+
+
+def iter_csv_rows(stream):
+    reader = csv.DictReader(stream)
+    for row in reader:
+        row = {key.strip(): value for key, value in row.items() if key}
+        try:
+            row['images'] = parse_csv_images(row.get('images'))
+        except ValueError:
+            yield reader.line_num, None, {'images': ['图片必须是列表格式']}
+            continue
+        yield reader.line_num, row, None
+
+
+def iter_jsonl_rows(stream):
+    for line_no, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_no, None, {'non_field_errors': ['不是有效的 JSON']}
+            continue
+        if not isinstance(row, dict):
+            yield line_no, None, {'non_field_errors': ['每行必须是 JSON 对象']}
+            continue
+        yield line_no, row, None
+
+
+def iter_rows(stream, fmt):
+    if fmt == 'jsonl':
+        return iter_jsonl_rows(stream)
+    return iter_csv_rows(stream)
+
+
+class GoodsImporter:
+    def __init__(self, seller, batch_size=None, max_errors=None, on_error=None):
+        self.seller = seller
+        self.batch_size = batch_size or get_batch_size()
+        self.max_errors = get_max_errors() if max_errors is None else max_errors
+        self.on_error = on_error
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        self.needs_rebuild = False
+
+    def add_error(self, line_no, errors):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'line': line_no, 'errors': errors})
+        if self.on_error is not None:
+            self.on_error(line_no, errors)
+
+    def flush(self, batch):
+        if not batch:
+            return
+        deltas = {}
+        for goods in batch:
+            category_id = goods.counted_category_id()
+            if category_id is not None:
+                deltas[category_id] = deltas.get(category_id, 0) + 1
+
+        with transaction.atomic():
+            floor = None
+            if not connection.features.can_return_rows_from_bulk_insert:
+                floor = Goods.objects.filter(seller=self.seller).order_by('-id').values_list('id', flat=True).first() or 0
+            created = Goods.objects.bulk_create(batch)
+            if floor is not None:
+                self.assign_pks(created, floor)
+            Category.apply_on_sale_deltas(deltas)
+            self.record(created)
+            goods_bulk_created.send(sender=Goods, goods_ids=[goods.pk for goods in created if goods.pk is not None])
+            transaction.on_commit(lambda: self.index(created))
+            transaction.on_commit(bump_generation)
+        self.created += len(created)
+
+    def assign_pks(self, created, floor):
+        # MySQL 的 bulk_create 不回填主键，在同一事务内按卖家和插入前的最大主键回查，
+        # 以插入时写入对象的创建时间和名称对应回各行
+        pending = {}
+        for goods in created:
+            pending.setdefault((goods.created_at, goods.name), []).append(goods)
+        rows = (
+            Goods.objects.filter(seller=self.seller, id__gt=floor)
+            .order_by('id').values_list('id', 'created_at', 'name')
+        )
+        for goods_id, created_at, name in rows:
+            candidates = pending.get((created_at, name))
+            if candidates:
+                goods = candidates.pop(0)
+                goods.pk = goods_id
+                goods._state.adding = False
+
+    def record(self, created):
+        resolved = [goods for goods in created if goods.pk is not None]
+        record_changes('goods', [(goods.pk, goods_payload(goods)) for goods in resolved], 'created')
+        add_keyword_postings([(goods.pk, goods.keywords) for goods in resolved])
+        if len(resolved) < len(created):
+            self.needs_rebuild = True
+            # 仍未能对应主键的行只能记录一条批量事件，由消费方按卖家增量同步
+            record_change('goods', None, 'bulk_created', {
+                'seller': self.seller.id, 'count': len(created) - len(resolved)
+            })
+
+    def index(self, created):
+        if any(goods.pk is None for goods in created):
+            self.needs_rebuild = True
+            return
+        backend = get_search_backend()
+        similar_index = get_similar_index()
+        for goods in created:
+            backend.index(goods)
+            similar_index.update(goods)
+
+    def run(self, rows):
+        batch = []
+        for line_no, row, errors in rows:
+            if errors is None:
+                serializer = GoodsCreateSerializer(data=row)
+                if serializer.is_valid():
+                    goods = Goods(seller=self.seller, **serializer.validated_data)
+                    goods.location_id = match_location(goods.pickup_location)
+                    goods.keywords = goods_keywords(goods)
+                    batch.append(goods)
+                else:
+                    errors = serializer.errors
+            if errors is not None:
+                self.add_error(line_no, errors)
+            if len(batch) >= self.batch_size:
+                self.flush(batch)
+                batch = []
+        self.flush(batch)
+
+        if self.needs_rebuild:
+            missing = unindexed_goods(Goods.objects.filter(seller=self.seller)).values_list('id', 'keywords')
+            replace_keyword_postings(list(missing))
+            if connection.vendor != 'mysql':
+                get_search_backend().rebuild()
+            get_similar_index().invalidate()
+        return self.result()
+
+    def result(self):
+        return {
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+
+def import_goods(stream, seller, fmt='csv', **kwargs):
+    return GoodsImporter(seller, **kwargs).run(iter_rows(stream, fmt))
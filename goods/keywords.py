@@ -0,0 +1,92 @@
+from functools import lru_cache
+
+import jieba
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q
+
+from .models import Goods, GoodsKeyword
+
+
+STOP_WORDS = set([
+    '的', '了', '和', '是', '在', '有', '我', '他', '她', '它', '们',
+    '这', '那', '就', '也', '都', '会', '能', '要', '可', '不', '没',
+    '很', '还', '但', '又', '或', '与', '及', '等', '对', '把', '被',
+    '让', '给', '向', '从', '到', '以', '为', '着', '过', '来', '去',
+    '上', '下', '里', '外', '前', '后', '左', '右', '中', '大', '小',
+    '多', '少', '高', '低', '长', '短', '好', '坏', '新', '旧', '想',
+    '需要', '希望', '求购', '寻找', '想要', '希望', '能够', '可以',
+])
+
+
+def keyword_set(text):
+    if not text:
+        return frozenset()
+
+    keywords = set()
+    for word in jieba.cut(text):
+        word = word.strip()
+        if len(word) >= 2 and word not in STOP_WORDS:
+            keywords.add(word)
+    return frozenset(keywords)
+
+
+_cached_keyword_set = None
+
+
+def get_cache_size():
+    return getattr(settings, 'GOODS_KEYWORD_CACHE_SIZE', 4096)
+
+
+def cached_keyword_set(text):
+    global _cached_keyword_set
+    if _cached_keyword_set is None:
+        _cached_keyword_set = lru_cache(maxsize=get_cache_size())(keyword_set)
+    return _cached_keyword_set(text)
+
+
+def extract_keywords(text):
+    return sorted(cached_keyword_set(text))
+
+
+def goods_text(name, description):
+    return f"{name or ''} {description or ''}"
+
+
+def goods_keywords(goods):
+    return extract_keywords(goods_text(goods.name, goods.description))
+
+
+def extract_keywords_batch(texts):
+    return [sorted(keyword_set(text)) for text in texts]
+
+
+def indexable_keywords(keywords):
+    max_length = GoodsKeyword._meta.get_field('keyword').max_length
+    return {keyword for keyword in keywords or () if len(keyword) <= max_length}
+
+
+def add_keyword_postings(pairs, batch_size=2000):
+    GoodsKeyword.objects.bulk_create([
+        GoodsKeyword(goods_id=goods_id, keyword=keyword)
+        for goods_id, keywords in pairs
+        for keyword in indexable_keywords(keywords)
+    ], batch_size=batch_size)
+
+
+def sync_keyword_postings(goods_id, keywords):
+    wanted = indexable_keywords(keywords)
+    existing = set(GoodsKeyword.objects.filter(goods_id=goods_id).values_list('keyword', flat=True))
+    if existing - wanted:
+        GoodsKeyword.objects.filter(goods_id=goods_id, keyword__in=existing - wanted).delete()
+    add_keyword_postings([(goods_id, wanted - existing)])
+
+
+def replace_keyword_postings(pairs):
+    GoodsKeyword.objects.filter(goods_id__in=[goods_id for goods_id, _ in pairs]).delete()
+    add_keyword_postings(pairs)
+
+
+def unindexed_goods(queryset=None):
+    queryset = Goods.objects.all() if queryset is None else queryset
+    postings = GoodsKeyword.objects.filter(goods_id=OuterRef('pk'))
+    return queryset.filter(Q(keywords__isnull=True) | ~Exists(postings))
@@ -0,0 +1,91 @@
+import re
+import threading
+import time
+import unicodedata
+
+from django.conf import settings
+
+from .cache import bump_generation, get_generation
+from .models import PickupLocation
+
+
+IGNORED_CHARACTERS = re.compile(r'[\s\W_]+')
+GENERATION_KEY = 'goods:locations:generation'
+
+
+def normalize_location_text(text):
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    return IGNORED_CHARACTERS.sub('', text)
+
+
+def location_keys(location):
+    keys = {
+        normalize_location_text(f'{location.campus}{location.building}'),
+        normalize_location_text(location.building),
+    }
+    keys.update(normalize_location_text(alias) for alias in location.aliases or [])
+    keys.discard('')
+    return keys
+
+
+class LocationMatcher:
+    def __init__(self, locations):
+        self.aliases = {}
+        for location in locations:
+            for key in location_keys(location):
+                self.aliases.setdefault(key, location.id)
+        keys = sorted(self.aliases, key=len, reverse=True)
+        self.pattern = re.compile('|'.join(map(re.escape, keys))) if keys else None
+
+    def match(self, text):
+        if self.pattern is None:
+            return None
+        normalized = normalize_location_text(text)
+        location_id = self.aliases.get(normalized)
+        if location_id is not None:
+            return location_id
+        # 交替分支只在同一起点上优先长别名，逐个起点取匹配，整体选最长的别名，同长取最靠前的
+        best = ''
+        for start in range(len(normalized)):
+            found = self.pattern.match(normalized, start)
+            if found and len(found.group()) > len(best):
+                best = found.group()
+        return self.aliases[best] if best else None
+
+
+_matcher = None
+_matcher_generation = None
+_checked_at = 0.0
+_matcher_lock = threading.Lock()
+
+
+def get_check_interval():
+    return getattr(settings, 'GOODS_LOCATION_CHECK_INTERVAL', 5)
+
+
+def get_location_matcher():
+    # 地点字典可能在其他进程中被修改，按间隔对比共享缓存中的代数，代数变化时重建
+    global _matcher, _matcher_generation, _checked_at
+    now = time.monotonic()
+    if _matcher is not None and now - _checked_at < get_check_interval():
+        return _matcher
+    generation = get_generation(GENERATION_KEY)
+    with _matcher_lock:
+        if _matcher is None or _matcher_generation != generation:
+            _matcher = LocationMatcher(PickupLocation.objects.all())
+            _matcher_generation = generation
+        _checked_at = now
+    return _matcher
+
+
+def reset_location_matcher():
+    global _matcher
+    bump_generation(GENERATION_KEY)
+    with _matcher_lock:
+        _matcher = None
+
+
+def match_location(text):
+    if not text:
+        return None
+    return get_location_matcher().match(text)
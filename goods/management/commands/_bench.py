@@ -0,0 +1,123 @@
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+
+from goods.keywords import add_keyword_postings, cached_keyword_set, extract_keywords
+from goods.models import Category, Goods
+
+
+BENCH_USERNAME = '__bench__'
+BENCH_CATEGORY_PREFIX = '__bench__'
+
+BRANDS = ['苹果', '华为', '小米', '联想', '戴尔', '索尼', '佳能', '耐克', '阿迪达斯', '宜家', '得力', '罗技']
+ITEMS = ['手机', '笔记本电脑', '平板', '耳机', '显示器', '键盘', '鼠标', '相机', '台灯', '书桌',
+         '椅子', '自行车', '电饭煲', '吹风机', '运动鞋', '背包', '教材', '考研资料', '吉他', '篮球']
+PHRASES = ['九成新', '毕业出售', '几乎没用过', '功能完好', '有轻微划痕', '原价购入', '支持验货',
+           '宿舍自提', '送配件', '成色很好', '电池健康', '可小刀', '急出', '包装齐全']
+LOCATIONS = ['东区宿舍', '西区宿舍', '图书馆门口', '第一食堂', '南门快递点', '体育馆']
+CONDITIONS = [value for value, _ in Goods.CONDITION_CHOICES]
+
+
+def random_goods_text(rng):
+    name = f"{rng.choice(BRANDS)}{rng.choice(ITEMS)}"
+    description = '，'.join(rng.sample(PHRASES, 4)) + f"，{rng.choice(ITEMS)}也可以一起出"
+    return name, description
+
+
+def bench_keywords(name, description):
+    # jieba 会在标点和空格处切开再分词，逐段查缓存与整段分词结果一致
+    words = set(cached_keyword_set(name))
+    for part in description.split('，'):
+        words |= cached_keyword_set(part)
+    return sorted(words)
+
+
+def index_keywords(seller, batch_size=5000):
+    pairs = []
+    for pair in Goods.objects.filter(seller=seller).values_list('id', 'keywords').iterator(chunk_size=batch_size):
+        pairs.append(pair)
+        if len(pairs) >= batch_size:
+            add_keyword_postings(pairs, batch_size)
+            pairs = []
+    add_keyword_postings(pairs, batch_size)
+
+
+def seed_goods(count, batch_size=5000, seed=42, statuses=None, keywords=False):
+    rng = random.Random(seed)
+    User = get_user_model()
+    seller, _ = User.objects.get_or_create(username=BENCH_USERNAME)
+    categories = [
+        Category.objects.get_or_create(name=f'{BENCH_CATEGORY_PREFIX}{index}')[0]
+        for index in range(8)
+    ]
+    statuses = statuses or ['on_sale']
+
+    deltas = {}
+    batch = []
+    for _ in range(count):
+        name, description = random_goods_text(rng)
+        batch.append(Goods(
+            seller=seller,
+            name=name,
+            category=rng.choice(categories),
+            description=description,
+            price=Decimal(rng.randint(100, 500000)) / 100,
+            condition=rng.choice(CONDITIONS),
+            status=rng.choice(statuses),
+            pickup_location=rng.choice(LOCATIONS),
+            view_count=rng.randint(0, 2000),
+            keywords=bench_keywords(name, description) if keywords else None,
+        ))
+        goods = batch[-1]
+        if goods.status == 'on_sale':
+            deltas[goods.category_id] = deltas.get(goods.category_id, 0) + 1
+        if len(batch) >= batch_size:
+            Goods.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Goods.objects.bulk_create(batch)
+    Category.apply_on_sale_deltas(deltas)
+    if keywords:
+        index_keywords(seller, batch_size)
+    return seller, categories
+
+
+def make_wishlists(count, categories, seed=11):
+    from wishlist.models import Wishlist
+
+    rng = random.Random(seed)
+    wishlists = []
+    for _ in range(count):
+        name = f"{rng.choice(BRANDS)}{rng.choice(ITEMS)}"
+        description = '，'.join(rng.sample(PHRASES, 2))
+        low = Decimal(rng.randint(0, 200000)) / 100
+        wishlists.append(Wishlist(
+            user_id=0,
+            name=name,
+            description=description,
+            keywords=extract_keywords(f'{name} {description}'),
+            category=rng.choice(categories) if rng.random() < 0.5 else None,
+            min_price=low if rng.random() < 0.7 else None,
+            max_price=low + rng.randint(100, 100000) if rng.random() < 0.7 else None,
+        ))
+    return wishlists
+
+
+def cleanup():
+    User = get_user_model()
+    Category.objects.filter(name__startswith=BENCH_CATEGORY_PREFIX).delete()
+    Goods.objects.filter(seller__username=BENCH_USERNAME).delete()
+    User.objects.filter(username=BENCH_USERNAME).delete()
+
+
+def measure(func, repeat=5):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), result
@@ -0,0 +1,66 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from config.warmup import warmup_jieba
+from goods.keywords import extract_keywords_batch, goods_text, replace_keyword_postings, unindexed_goods
+from goods.models import Goods
+
+
+class Command(BaseCommand):
+    help = '使用进程池为已有物品批量生成关键词集合及关键词倒排索引'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='分词进程数')
+        parser.add_argument('--batch-size', type=int, default=5000, help='每批读取并写回的物品数量')
+        parser.add_argument('--chunk-size', type=int, default=250, help='每个分词任务包含的物品数量')
+        parser.add_argument('--all', action='store_true', help='重新生成全部物品的关键词，而不只是缺失关键词或索引的')
+
+    def handle(self, *args, **options):
+        # 先在主进程加载词典，fork 出的子进程直接继承，不必各自重复加载
+        warmup_jieba()
+        queryset = Goods.objects.order_by('id')
+        if not options['all']:
+            queryset = unindexed_goods(queryset)
+
+        start = time.perf_counter()
+        total = 0
+        pool = self.make_pool(options['workers'])
+        try:
+            last_id = 0
+            while True:
+                rows = list(queryset.filter(id__gt=last_id).values_list('id', 'name', 'description')[:options['batch_size']])
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                keywords = self.tokenize(pool, [goods_text(name, description) for _, name, description in rows], options['chunk_size'])
+                pairs = [(goods_id, words) for (goods_id, _, _), words in zip(rows, keywords)]
+                with transaction.atomic():
+                    Goods.objects.bulk_update(
+                        [Goods(id=goods_id, keywords=words) for goods_id, words in pairs],
+                        ['keywords'], batch_size=1000
+                    )
+                    replace_keyword_postings(pairs)
+                total += len(rows)
+                self.stdout.write(f'  已处理 {total} 条')
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        self.stdout.write(self.style.SUCCESS(f'共生成 {total} 条物品关键词，耗时 {time.perf_counter() - start:.1f} 秒'))
+
+    def make_pool(self, workers):
+        if workers <= 1:
+            return None
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork') if 'fork' in methods else None
+        return ProcessPoolExecutor(max_workers=workers, mp_context=context)
+
+    def tokenize(self, pool, texts, chunk_size):
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        mapper = pool.map if pool is not None else map
+        return [words for chunk in mapper(extract_keywords_batch, chunks) for words in chunk]
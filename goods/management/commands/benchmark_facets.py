@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+
+from goods.facets import compute_facets, get_price_bounds, price_bucket_ranges
+from goods.models import Category, Goods
+from ._bench import cleanup, measure, seed_goods
+
+
+def per_value_facets(queryset):
+    facets = {'category': {}, 'condition': {}, 'price': []}
+    for category in Category.objects.all():
+        facets['category'][category.id] = queryset.filter(category=category).count()
+    for value, _ in Goods.CONDITION_CHOICES:
+        facets['condition'][value] = queryset.filter(condition=value).count()
+    for lower, upper in price_bucket_ranges(get_price_bounds()):
+        bucket = queryset.filter(price__gte=lower)
+        if upper is not None:
+            bucket = bucket.filter(price__lt=upper)
+        facets['price'].append(bucket.count())
+    return facets
+
+
+class Command(BaseCommand):
+    help = '对比普通列表查询、单次分组聚合分面与逐值 COUNT 分面的耗时'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=100000, help='生成的物品数量')
+        parser.add_argument('--repeat', type=int, default=5, help='每项的重复次数')
+        parser.add_argument('--keep', action='store_true', help='保留生成的测试数据')
+
+    def handle(self, *args, **options):
+        size = options['size']
+        self.stdout.write(f'生成 {size} 条测试物品...')
+        cleanup()
+        seed_goods(size, statuses=['on_sale', 'on_sale', 'off_sale', 'sold'])
+
+        try:
+            base = Goods.objects.select_related('seller', 'category').filter(status='on_sale')
+            filtered = base.filter(price__lte=2000)
+            cases = [
+                ('list page + count', lambda qs: (list(qs.order_by('-created_at')[:10]), qs.count())),
+                ('grouped facets', compute_facets),
+                ('per-value COUNT facets', per_value_facets),
+            ]
+            for label, queryset in [('status=on_sale', base), ('max_price=2000', filtered)]:
+                self.stdout.write(label)
+                for name, func in cases:
+                    elapsed, _ = measure(lambda: func(queryset), repeat=options['repeat'])
+                    self.stdout.write(f'  {name:<24}{elapsed:>10.2f} ms')
+        finally:
+            if not options['keep']:
+                cleanup()
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from goods.models import Goods
+from goods.serializers import GoodsListProjection, GoodsListSerializer
+from ._bench import BENCH_USERNAME, cleanup, measure, seed_goods
+
+
+class Command(BaseCommand):
+    help = '对比投影序列化器与 GoodsListSerializer 的吞吐量，输出一致性由 goods 测试覆盖'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=5000, help='生成的物品数量')
+        parser.add_argument('--page-size', type=int, default=50, help='每页序列化的物品数量')
+        parser.add_argument('--repeat', type=int, default=20, help='每项的重复次数')
+        parser.add_argument('--keep', action='store_true', help='保留生成的测试数据')
+
+    def handle(self, *args, **options):
+        size = options['size']
+        self.stdout.write(f'生成 {size} 条测试物品...')
+        cleanup()
+        seller, _ = seed_goods(size, statuses=['on_sale', 'off_sale', 'sold'])
+
+        try:
+            renderer = JSONRenderer()
+            queryset = (
+                Goods.objects.select_related('seller', 'category')
+                .filter(seller__username=BENCH_USERNAME)
+                .order_by('id')
+            )
+            page_size = options['page_size']
+            cases = [
+                ('GoodsListSerializer', lambda: renderer.render(
+                    GoodsListSerializer(list(queryset[:page_size]), many=True).data
+                )),
+                ('GoodsListProjection', lambda: renderer.render(
+                    GoodsListProjection(list(GoodsListProjection.project(queryset)[:page_size])).data
+                )),
+            ]
+            results = []
+            for name, func in cases:
+                elapsed, _ = measure(func, repeat=options['repeat'])
+                results.append(elapsed)
+                self.stdout.write(f'  {name:<24}{elapsed:>10.2f} ms  {page_size / elapsed * 1000:>10.0f} 条/秒')
+            self.stdout.write(f'  加速比 {results[0] / results[1]:.2f}x')
+        finally:
+            if not options['keep']:
+                cleanup()
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from config.renderers import ORJSONRenderer
+from goods.models import Goods
+from goods.serializers import GoodsListSerializer
+from ._bench import cleanup, measure, seed_goods
+
+
+class Command(BaseCommand):
+    help = '对比 DRF JSONRenderer 与 ORJSONRenderer 渲染物品列表页的耗时'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10,100,1000', help='每页物品数量，逗号分隔')
+        parser.add_argument('--repeat', type=int, default=20, help='每项的重复次数')
+        parser.add_argument('--keep', action='store_true', help='保留生成的测试数据')
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        cleanup()
+        seed_goods(max(sizes))
+        renderers = [JSONRenderer(), ORJSONRenderer()]
+
+        try:
+            queryset = Goods.objects.select_related('seller', 'category').filter(
+                seller__username='__bench__'
+            ).order_by('-created_at', '-id')
+            self.stdout.write(f"{'items':>6}" + ''.join(f'{type(r).__name__:>20}' for r in renderers) + '   same')
+            for size in sizes:
+                payload = {
+                    'code': 200,
+                    'message': '获取成功',
+                    'data': GoodsListSerializer(queryset[:size], many=True).data,
+                    'count': size,
+                    'next': None,
+                    'previous': None,
+                }
+                row = f'{size:>6}'
+                outputs = []
+                for renderer in renderers:
+                    elapsed, output = measure(lambda: renderer.render(payload), repeat=options['repeat'])
+                    outputs.append(output)
+                    row += f'{elapsed:>17.3f} ms'
+                self.stdout.write(f"{row}   {'yes' if len(set(outputs)) == 1 else 'NO'}")
+        finally:
+            if not options['keep']:
+                cleanup()
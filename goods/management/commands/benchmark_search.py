@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from goods.models import Goods
+from goods.search import (
+    IContainsSearchBackend, JiebaIndexSearchBackend, VENDOR_BACKENDS
+)
+from ._bench import cleanup, measure, seed_goods
+
+
+QUERIES = ['手机', '苹果手机', '笔记本电脑', '九成新 耳机', '毕业出售 自行车', '考研资料']
+
+
+class Command(BaseCommand):
+    help = '对比 icontains 与全文搜索后端的关键词检索耗时'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=100000, help='生成的物品数量')
+        parser.add_argument('--repeat', type=int, default=5, help='每个查询的重复次数')
+        parser.add_argument('--page-size', type=int, default=10, help='每次取回的结果数')
+        parser.add_argument('--keep', action='store_true', help='保留生成的测试数据')
+
+    def handle(self, *args, **options):
+        size = options['size']
+        self.stdout.write(f'生成 {size} 条测试物品...')
+        cleanup()
+        seed_goods(size)
+
+        backends = [IContainsSearchBackend(), JiebaIndexSearchBackend()]
+        vendor_backend = VENDOR_BACKENDS.get(connection.vendor)
+        if vendor_backend:
+            backends.append(vendor_backend())
+
+        try:
+            for backend in backends:
+                backend.rebuild()
+
+            base = Goods.objects.select_related('seller', 'category').filter(status='on_sale')
+            header = f"{'query':<16}" + ''.join(f'{type(b).__name__:>32}' for b in backends)
+            self.stdout.write(header)
+            for query in QUERIES:
+                row = f'{query:<16}'
+                for backend in backends:
+                    elapsed, _ = measure(
+                        lambda: list(backend.search(base, query)[:options['page_size']]),
+                        repeat=options['repeat']
+                    )
+                    row += f'{elapsed:>29.2f} ms'
+                self.stdout.write(row)
+        finally:
+            if not options['keep']:
+                cleanup()
+                for backend in backends:
+                    backend.rebuild()
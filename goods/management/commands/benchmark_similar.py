@@ -0,0 +1,53 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from goods.models import Goods
+from goods.similar import SimilarGoodsIndex
+from ._bench import BENCH_USERNAME, cleanup, measure, seed_goods
+
+
+class Command(BaseCommand):
+    help = '测量相似物品索引的构建、查询与增量更新耗时'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=100000, help='生成的物品数量')
+        parser.add_argument('--queries', type=int, default=200, help='查询次数')
+        parser.add_argument('--keep', action='store_true', help='保留生成的测试数据')
+
+    def handle(self, *args, **options):
+        size = options['size']
+        self.stdout.write(f'生成 {size} 条测试物品...')
+        cleanup()
+        seed_goods(size)
+
+        try:
+            index = SimilarGoodsIndex()
+            start = time.perf_counter()
+            index.rebuild()
+            self.stdout.write(f'  rebuild{(time.perf_counter() - start) * 1000:>20.2f} ms')
+
+            rng = random.Random(7)
+            goods_list = list(
+                Goods.objects.filter(seller__username=BENCH_USERNAME)
+                .only('id', 'name', 'description', 'status')[:options['queries']]
+            )
+            cold = iter(goods_list)
+            elapsed, _ = measure(lambda: index.similar(next(cold), 20), repeat=len(goods_list))
+            self.stdout.write(f'  similar cold (median){elapsed:>6.2f} ms')
+            elapsed, _ = measure(lambda: index.similar(rng.choice(goods_list), 20), repeat=options['queries'])
+            self.stdout.write(f'  similar warm (median){elapsed:>6.2f} ms')
+
+            def update():
+                goods = rng.choice(goods_list)
+                goods.description += '，九成新'
+                index.update(goods)
+
+            elapsed, _ = measure(update, repeat=options['queries'])
+            self.stdout.write(f'  update (median){elapsed:>12.2f} ms')
+            elapsed, _ = measure(lambda: index.similar(rng.choice(goods_list), 20), repeat=options['queries'])
+            self.stdout.write(f'  similar after updates{elapsed:>6.2f} ms')
+        finally:
+            if not options['keep']:
+                cleanup()
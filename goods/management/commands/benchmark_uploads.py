@@ -0,0 +1,83 @@
+import io
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from PIL import Image
+from rest_framework_simplejwt.tokens import AccessToken
+
+from goods.images import wait_for_derivatives
+from goods.models import ImageBlob
+from ._bench import cleanup, seed_goods
+
+
+def random_image(width, height):
+    image = Image.frombytes('RGB', (width, height), os.urandom(width * height * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=90)
+    return buffer.getvalue()
+
+
+class Command(BaseCommand):
+    help = '对比逐张上传与批量上传多张图片的接口耗时，图片写入临时目录并在结束后删除'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--files', type=int, default=5, help='每次上传的图片数量')
+        parser.add_argument('--width', type=int, default=1600, help='测试图片宽度')
+        parser.add_argument('--height', type=int, default=1200, help='测试图片高度')
+        parser.add_argument('--repeat', type=int, default=5, help='每项的重复次数')
+
+    def handle(self, *args, **options):
+        cleanup()
+        seller, _ = seed_goods(0)
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(seller)}')
+
+        def make_files():
+            return [
+                SimpleUploadedFile(f'{index}.jpg', random_image(options['width'], options['height']),
+                                   content_type='image/jpeg')
+                for index in range(options['files'])
+            ]
+
+        def sequential(files):
+            for file in files:
+                response = client.post('/api/goods/upload/', {'file': file})
+                if response.status_code != 200:
+                    raise CommandError(f'逐张上传失败: {response.status_code}')
+
+        def batched(files):
+            response = client.post('/api/goods/upload/batch/', {'files': files})
+            if response.status_code != 200:
+                raise CommandError(f'批量上传失败: {response.status_code}')
+
+        # 上传的原图、衍生图片和 ImageBlob 记录都在结束后清理，不留在正式的媒体目录里
+        media_root = tempfile.mkdtemp(prefix='bench-uploads-')
+        last_blob = ImageBlob.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        try:
+            with override_settings(MEDIA_ROOT=media_root):
+                try:
+                    self.run(sequential, batched, make_files, options['repeat'])
+                finally:
+                    wait_for_derivatives()
+        finally:
+            ImageBlob.objects.filter(id__gt=last_blob).delete()
+            shutil.rmtree(media_root, ignore_errors=True)
+            cleanup()
+
+    def run(self, sequential, batched, make_files, repeat):
+        results = {}
+        for name, func in [('sequential', sequential), ('batch', batched)]:
+            timings = []
+            for _ in range(repeat):
+                files = make_files()
+                start = time.perf_counter()
+                func(files)
+                timings.append((time.perf_counter() - start) * 1000)
+            results[name] = statistics.median(timings)
+            self.stdout.write(f'  {name:<12}{results[name]:>10.2f} ms')
+        self.stdout.write(f"  加速比 {results['sequential'] / results['batch']:.2f}x")
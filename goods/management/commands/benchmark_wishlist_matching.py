@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from wishlist.matching import find_matches, match_candidates
+from ._bench import cleanup, make_wishlists, measure, seed_goods
+
+
+class Command(BaseCommand):
+    help = '对比心愿单关键词倒排索引与全表扫描的匹配耗时，召回一致性由 wishlist 测试覆盖'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000], help='生成的物品数量')
+        parser.add_argument('--wishlists', type=int, default=20, help='参与对比的心愿单数量')
+        parser.add_argument('--brute-force-limit', type=int, default=5, help='超过 10 万物品时全表扫描只跑前几条心愿单')
+        parser.add_argument('--keep', action='store_true', help='保留生成的测试数据')
+
+    def handle(self, *args, **options):
+        try:
+            for size in options['sizes']:
+                self.run(size, options)
+        finally:
+            if not options['keep']:
+                cleanup()
+
+    def run(self, size, options):
+        self.stdout.write(f'生成 {size} 条测试物品...')
+        cleanup()
+        _, categories = seed_goods(size, keywords=True)
+        wishlists = make_wishlists(options['wishlists'], categories)
+        brute_count = len(wishlists) if size <= 100000 else options['brute_force_limit']
+
+        indexed_times, brute_times = [], []
+        for position, wishlist in enumerate(wishlists):
+            elapsed, _ = measure(lambda: find_matches(wishlist, match_candidates(wishlist, True)), repeat=3)
+            indexed_times.append(elapsed)
+            if position < brute_count:
+                elapsed, _ = measure(lambda: find_matches(wishlist, match_candidates(wishlist, False)), repeat=1)
+                brute_times.append(elapsed)
+
+        self.stdout.write(f'  倒排索引 (median){self.median(indexed_times):>12.2f} ms')
+        self.stdout.write(f'  全表扫描 (median){self.median(brute_times):>12.2f} ms')
+
+    def median(self, values):
+        values = sorted(values)
+        return values[len(values) // 2] if values else float('nan')
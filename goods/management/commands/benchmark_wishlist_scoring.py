@@ -0,0 +1,48 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from goods.models import Goods
+from wishlist.matching import calculate_similarity
+from wishlist.scoring import WishlistBatch, load_goods_batch, top_matches
+from ._bench import cleanup, make_wishlists, seed_goods
+
+
+class Command(BaseCommand):
+    help = '比较向量化心愿单打分与逐条打分的批量重匹配耗时，数值一致性由 wishlist 测试覆盖'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=20000, help='生成的物品数量')
+        parser.add_argument('--wishlists', type=int, default=200, help='参与对比的心愿单数量')
+        parser.add_argument('--keep', action='store_true', help='保留生成的测试数据')
+
+    def handle(self, *args, **options):
+        cleanup()
+        self.stdout.write(f"生成 {options['size']} 条测试物品...")
+        _, categories = seed_goods(options['size'], keywords=True)
+        try:
+            self.run(make_wishlists(options['wishlists'], categories))
+        finally:
+            if not options['keep']:
+                cleanup()
+
+    def run(self, wishlist_list):
+        wishlists = WishlistBatch(wishlist_list)
+        start = time.perf_counter()
+        goods = load_goods_batch(wishlists.vocabulary)
+        self.stdout.write(f'  加载物品与关键词矩阵{(time.perf_counter() - start) * 1000:>10.2f} ms')
+
+        start = time.perf_counter()
+        top_matches(wishlists, goods)
+        vector_ms = (time.perf_counter() - start) * 1000
+
+        goods_objects = Goods.objects.filter(status='on_sale', is_traded=False).in_bulk()
+        ordered = [goods_objects[int(goods_id)] for goods_id in goods.ids]
+        start = time.perf_counter()
+        np.array([[calculate_similarity(wishlist, item) for item in ordered] for wishlist in wishlist_list])
+        scalar_ms = (time.perf_counter() - start) * 1000
+
+        self.stdout.write(f'  打分矩阵 {len(wishlist_list)}x{len(ordered)}')
+        self.stdout.write(f'  向量化全量匹配{vector_ms:>16.2f} ms')
+        self.stdout.write(f'  逐条打分全量  {scalar_ms:>16.2f} ms')
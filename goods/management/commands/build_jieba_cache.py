@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from config.warmup import configure_jieba, dump_jieba_cache
+
+
+class Command(BaseCommand):
+    help = '预先序列化 jieba 词典，避免部署后首次分词时构建词典'
+
+    def handle(self, *args, **options):
+        cache_file = configure_jieba()
+        if not cache_file:
+            self.stderr.write('未配置 JIEBA_CACHE_FILE')
+            return
+
+        start = time.perf_counter()
+        dump_jieba_cache(cache_file)
+        elapsed = (time.perf_counter() - start) * 1000
+        self.stdout.write(self.style.SUCCESS(f'词典缓存已生成: {cache_file}（{elapsed:.0f} ms）'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from goods.view_counter import get_view_counter
+
+
+class Command(BaseCommand):
+    help = '将共享缓存中缓冲的物品浏览量写回数据库'
+
+    def handle(self, *args, **options):
+        counter = get_view_counter()
+        if counter.process_local:
+            raise CommandError(
+                f'{type(counter).__name__} 只在各 Web 进程内缓冲浏览量，由进程内定时任务和退出时写回，'
+                '本命令无法读取；需要外部写回时请改用共享缓存（Redis、Memcached）上的 CacheViewCounter'
+            )
+        updated = counter.sweep()
+        self.stdout.write(self.style.SUCCESS(f'已写回 {updated} 个物品的浏览量'))
@@ -0,0 +1,47 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from goods.images import generate_derivatives, is_derivative
+
+
+def walk_files(directory):
+    subdirs, names = default_storage.listdir(directory)
+    for name in names:
+        yield f'{directory}/{name}'
+    for subdir in subdirs:
+        yield from walk_files(f'{directory}/{subdir}')
+
+
+class Command(BaseCommand):
+    help = '为已上传的物品图片生成缩略图、中图和大图'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', default='goods', help='存储中的图片目录')
+        parser.add_argument('--workers', type=int, default=4, help='并行处理的线程数')
+        parser.add_argument('--force', action='store_true', help='覆盖已存在的衍生图片')
+
+    def handle(self, *args, **options):
+        directory = options['dir'].strip('/')
+        try:
+            paths = [path for path in walk_files(directory) if not is_derivative(path)]
+        except FileNotFoundError:
+            self.stderr.write(f'目录不存在: {directory}')
+            return
+
+        done = failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            futures = {
+                executor.submit(generate_derivatives, path, options['force']): path
+                for path in paths
+            }
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                    done += 1
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f'{futures[future]}: {exc}')
+
+        self.stdout.write(self.style.SUCCESS(f'处理完成 {done} 张，失败 {failed} 张'))
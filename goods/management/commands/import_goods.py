@@ -0,0 +1,46 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from goods.importer import IMPORT_FORMATS, guess_format, import_goods, text_stream
+
+
+class Command(BaseCommand):
+    help = '从 CSV 或 JSONL 文件流式批量导入物品'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='导入文件路径，使用 - 从标准输入读取')
+        parser.add_argument('--seller', required=True, help='卖家用户名')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help='文件格式，默认按扩展名判断')
+        parser.add_argument('--batch-size', type=int, help='每个事务批量写入的条数')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            seller = User.objects.get(username=options['seller'])
+        except User.DoesNotExist:
+            raise CommandError(f"卖家不存在: {options['seller']}")
+
+        path = options['path']
+        fmt = options['format'] or guess_format(path)
+
+        def report(line_no, errors):
+            self.stderr.write(f'第 {line_no} 行: {errors}')
+
+        if path == '-':
+            stream = text_stream(sys.stdin.buffer)
+        else:
+            try:
+                stream = text_stream(open(path, 'rb'))
+            except OSError as exc:
+                raise CommandError(f'无法打开文件: {exc}')
+
+        with stream:
+            result = import_goods(
+                stream, seller, fmt=fmt,
+                batch_size=options['batch_size'], max_errors=0, on_error=report
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"导入完成，成功 {result['created']} 条，失败 {result['failed']} 条"
+        ))
@@ -0,0 +1,62 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+STARTUP_SCRIPT = (
+    'import django; django.setup(); '
+    'import config.urls; import config.asgi'
+)
+
+
+def parse_importtime(output):
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+            rows.append((int(self_us), int(cumulative_us), name.rstrip()))
+        except ValueError:
+            continue
+    return rows
+
+
+class Command(BaseCommand):
+    help = '统计项目启动时各模块的导入耗时'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=20, help='显示最慢的模块数量')
+        parser.add_argument('--sort', choices=['cumulative', 'self'], default='cumulative')
+        parser.add_argument('--strict', action='store_true',
+                            help='若 LAZY_IMPORT_MODULES 中的模块在启动时被导入则返回失败')
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get(
+            'DJANGO_SETTINGS_MODULE', 'config.settings'
+        ))
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT],
+            cwd=str(settings.BASE_DIR), env=env, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+
+        rows = parse_importtime(result.stderr)
+        index = 1 if options['sort'] == 'cumulative' else 0
+        total_us = sum(row[0] for row in rows)
+        self.stdout.write(f'共导入 {len(rows)} 个模块，总耗时 {total_us / 1000:.1f} ms')
+        self.stdout.write(f"{'self(ms)':>10}{'cumulative(ms)':>16}  module")
+        for self_us, cumulative_us, name in sorted(rows, key=lambda row: -row[index])[:options['top']]:
+            self.stdout.write(f'{self_us / 1000:>10.1f}{cumulative_us / 1000:>16.1f}  {name}')
+
+        imported = {name.strip().split('.')[0] for _, _, name in rows}
+        eager = [name for name in getattr(settings, 'LAZY_IMPORT_MODULES', []) if name in imported]
+        if eager:
+            message = f"以下模块应延迟导入，但在启动时已被加载: {', '.join(eager)}"
+            if options['strict']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
@@ -0,0 +1,102 @@
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from goods.cache import bump_generation
+from goods.images import DERIVATIVE_SIZES, derivative_path, generate_derivatives
+from goods.models import Goods
+from goods.storage import (
+    content_path, file_extension, hash_file, is_content_addressed, media_path, media_url,
+    store_existing
+)
+
+
+class Command(BaseCommand):
+    help = '将已有图片迁移到按内容哈希分片的存储，并改写物品图片与用户头像引用'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='每批改写的记录数')
+        parser.add_argument('--dry-run', action='store_true', help='只统计需要迁移的文件，不做修改')
+        parser.add_argument('--delete-old', action='store_true', help='迁移后删除旧文件及其衍生图片')
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        self.moved = {}
+        self.missing = set()
+
+        goods_changed = self.migrate_goods(options['batch_size'])
+        avatars_changed = self.migrate_avatars(options['batch_size'])
+
+        if not self.dry_run:
+            bump_generation()
+
+        if options['delete_old'] and not self.dry_run:
+            for old_path in self.moved:
+                default_storage.delete(old_path)
+                for size_name in DERIVATIVE_SIZES:
+                    default_storage.delete(derivative_path(old_path, size_name))
+
+        unique = len(set(self.moved.values()))
+        self.stdout.write(self.style.SUCCESS(
+            f'物品 {goods_changed} 条、头像 {avatars_changed} 条已改写；'
+            f'旧文件 {len(self.moved)} 个合并为 {unique} 个，缺失 {len(self.missing)} 个'
+        ))
+
+    def relocate(self, path, namespace):
+        if not path or is_content_addressed(path) or path in self.missing:
+            return path
+        if path not in self.moved:
+            if not default_storage.exists(path):
+                self.missing.add(path)
+                self.stderr.write(f'文件不存在: {path}')
+                return path
+            if self.dry_run:
+                with default_storage.open(path, 'rb') as source:
+                    digest, _ = hash_file(source)
+                self.moved[path] = content_path(namespace, digest, file_extension(path))
+            else:
+                new_path, created = store_existing(path, namespace)
+                if created and namespace == 'goods':
+                    generate_derivatives(new_path)
+                self.moved[path] = new_path
+        return self.moved[path]
+
+    def migrate_goods(self, batch_size):
+        changed = 0
+        batch = []
+        for goods in Goods.objects.only('id', 'images').order_by('id').iterator(chunk_size=batch_size):
+            images = []
+            for url in goods.images or []:
+                path = media_path(url)
+                new_path = self.relocate(path, 'goods') if path else None
+                images.append(media_url(new_path) if new_path and new_path != path else url)
+            if images != (goods.images or []):
+                goods.images = images
+                batch.append(goods)
+                changed += 1
+            if len(batch) >= batch_size:
+                self.save_batch(Goods, batch, ['images'])
+                batch = []
+        self.save_batch(Goods, batch, ['images'])
+        return changed
+
+    def migrate_avatars(self, batch_size):
+        User = get_user_model()
+        changed = 0
+        batch = []
+        users = User.objects.exclude(avatar='').exclude(avatar__isnull=True).only('id', 'avatar')
+        for user in users.order_by('id').iterator(chunk_size=batch_size):
+            new_path = self.relocate(user.avatar.name, 'avatars')
+            if new_path != user.avatar.name:
+                user.avatar = new_path
+                batch.append(user)
+                changed += 1
+            if len(batch) >= batch_size:
+                self.save_batch(User, batch, ['avatar'])
+                batch = []
+        self.save_batch(User, batch, ['avatar'])
+        return changed
+
+    def save_batch(self, model, batch, fields):
+        if batch and not self.dry_run:
+            model.objects.bulk_update(batch, fields)
@@ -0,0 +1,75 @@
+import json
+from collections import Counter, defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from goods.cache import bump_generation
+from goods.locations import get_location_matcher, reset_location_matcher
+from goods.models import Goods, PickupLocation
+
+
+class Command(BaseCommand):
+    help = '将物品的取货地点文本批量归一到规范地点字典'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--load', help='导入地点字典的 JSON 文件，格式为 [{"campus", "building", "aliases"}]')
+        parser.add_argument('--batch-size', type=int, default=2000, help='每批处理的物品数量')
+        parser.add_argument('--top', type=int, default=20, help='输出未匹配文本的条数')
+
+    def handle(self, *args, **options):
+        if options['load']:
+            self.load_dictionary(options['load'])
+
+        reset_location_matcher()
+        matcher = get_location_matcher()
+        batch_size = options['batch_size']
+        matched = unmatched = changed = 0
+        misses = Counter()
+        rows = Goods.objects.order_by().values_list('id', 'pickup_location', 'location_id')
+
+        updates = defaultdict(list)
+        pending = 0
+        for goods_id, text, current in rows.iterator(chunk_size=batch_size):
+            location_id = matcher.match(text) if text else None
+            if location_id is not None:
+                matched += 1
+            elif text:
+                unmatched += 1
+                misses[text.strip()] += 1
+            if location_id != current:
+                updates[location_id].append(goods_id)
+                pending += 1
+                changed += 1
+            if pending >= batch_size:
+                self.apply(updates)
+                updates = defaultdict(list)
+                pending = 0
+        self.apply(updates)
+        if changed:
+            bump_generation()
+
+        self.stdout.write(self.style.SUCCESS(f'已匹配 {matched} 条，未匹配 {unmatched} 条，更新 {changed} 条'))
+        for text, count in misses.most_common(options['top']):
+            self.stdout.write(f'  {count:>6}  {text}')
+
+    def apply(self, updates):
+        with transaction.atomic():
+            for location_id, ids in updates.items():
+                Goods.objects.filter(id__in=ids).update(location_id=location_id)
+
+    def load_dictionary(self, path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f'无法读取地点字典: {exc}')
+
+        created = 0
+        for entry in entries:
+            _, is_new = PickupLocation.objects.update_or_create(
+                campus=entry['campus'], building=entry['building'],
+                defaults={'aliases': entry.get('aliases', [])}
+            )
+            created += is_new
+        self.stdout.write(f'地点字典共 {len(entries)} 条，新增 {created} 条')
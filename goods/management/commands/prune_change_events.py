@@ -0,0 +1,17 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from goods.outbox import prune_changes
+
+
+class Command(BaseCommand):
+    help = '清理所有消费者均已确认且超过保留期的变更事件'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-days', type=int, default=7, help='变更事件的保留天数')
+
+    def handle(self, *args, **options):
+        deleted = prune_changes(timezone.now() - timedelta(days=options['keep_days']))
+        self.stdout.write(self.style.SUCCESS(f'已清理 {deleted} 条变更事件'))
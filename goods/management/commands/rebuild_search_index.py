@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from goods.search import JiebaIndexSearchBackend, get_search_backend
+
+
+class Command(BaseCommand):
+    help = '重建物品全文搜索索引'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        if isinstance(backend, JiebaIndexSearchBackend):
+            self.stderr.write(self.style.WARNING('jieba 倒排索引只存在于各服务进程内存中，需重启服务进程由启动钩子重建'))
+            return
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'{type(backend).__name__} 索引重建完成'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from goods.models import Category
+
+
+class Command(BaseCommand):
+    help = '按在售物品重新统计各品类的在售数量'
+
+    def handle(self, *args, **options):
+        counts = Category.recompute_on_sale_counts()
+        total = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(f'已修复 {len(counts)} 个品类的计数，在售物品共 {total} 件'))
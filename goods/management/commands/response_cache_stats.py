@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from goods.cache import CACHED_ENDPOINTS, get_generation, get_stats, reset_stats
+
+
+class Command(BaseCommand):
+    help = '查看物品列表与品类接口的响应缓存命中情况'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='查看后清零计数')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'当前缓存代数: {get_generation()}')
+        for endpoint, stats in get_stats(CACHED_ENDPOINTS).items():
+            self.stdout.write(
+                f"{endpoint:<16} hit={stats['hit']:<8} miss={stats['miss']:<8} hit_rate={stats['hit_rate']:.2%}"
+            )
+        if options['reset']:
+            reset_stats(CACHED_ENDPOINTS)
+            self.stdout.write(self.style.SUCCESS('计数已清零'))
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from goods.pricing import dump_price_model, get_model_file, load_training_samples, train_price_model
+
+
+class Command(BaseCommand):
+    help = '根据已完成订单与在售物品训练价格建议模型'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='模型文件路径，默认使用 GOODS_PRICING_MODEL_FILE')
+        parser.add_argument('--holdout', type=float, default=0.2, help='用于评估的留出比例')
+        parser.add_argument('--min-samples', type=int, default=50, help='最少训练样本数')
+
+    def handle(self, *args, **options):
+        model_file = options['output'] or get_model_file()
+        if not model_file:
+            raise CommandError('未配置 GOODS_PRICING_MODEL_FILE')
+
+        start = time.perf_counter()
+        samples = load_training_samples()
+        if len(samples) < options['min_samples']:
+            raise CommandError(f"训练样本不足: {len(samples)} < {options['min_samples']}")
+
+        model = train_price_model(samples, holdout=options['holdout'])
+        dump_price_model(model, model_file)
+
+        metrics = model['metrics']
+        self.stdout.write(f"样本数 {metrics['samples']}")
+        if 'mae' in metrics:
+            self.stdout.write(f"留出集 MAE {metrics['mae']:.2f} 元，MAPE {metrics['mape'] * 100:.1f}%")
+        self.stdout.write(self.style.SUCCESS(
+            f'模型已写入 {model_file}，耗时 {time.perf_counter() - start:.1f} s'
+        ))
@@ -0,0 +1,43 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'mysql':
+        schema_editor.execute(
+            'ALTER TABLE `goods` ADD FULLTEXT INDEX `goods_name_desc_ft` '
+            '(`name`, `description`) WITH PARSER ngram'
+        )
+    elif vendor == 'sqlite':
+        from goods.search import tokenize
+
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS goods_fts USING fts5("
+            "name, description, tokenize='unicode61')"
+        )
+        Goods = apps.get_model('goods', 'Goods')
+        rows = Goods.objects.values_list('id', 'name', 'description')
+        for goods_id, name, description in rows.iterator():
+            schema_editor.execute(
+                'INSERT INTO goods_fts (rowid, name, description) VALUES (%s, %s, %s)',
+                [goods_id, ' '.join(tokenize(name)), ' '.join(tokenize(description))]
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'mysql':
+        schema_editor.execute('ALTER TABLE `goods` DROP INDEX `goods_name_desc_ft`')
+    elif vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS goods_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goods", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
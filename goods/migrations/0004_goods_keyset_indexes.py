@@ -0,0 +1,31 @@
+# Generated by Django 4.2.8 on 2026-10-18 10:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goods", "0003_goods_search_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="goods",
+            index=models.Index(
+                fields=["status", "created_at", "id"], name="goods_status_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="goods",
+            index=models.Index(
+                fields=["status", "price", "id"], name="goods_status_price_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="goods",
+            index=models.Index(
+                fields=["status", "view_count", "id"], name="goods_status_views_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.8 on 2026-10-18 10:17
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_on_sale_count(apps, schema_editor):
+    Category = apps.get_model("goods", "Category")
+    Goods = apps.get_model("goods", "Goods")
+    counts = (
+        Goods.objects.filter(status="on_sale", category__isnull=False)
+        .values_list("category_id")
+        .annotate(total=Count("id"))
+        .order_by()
+    )
+    for category_id, total in counts:
+        Category.objects.filter(id=category_id).update(on_sale_count=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goods", "0004_goods_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="category",
+            name="on_sale_count",
+            field=models.IntegerField(default=0, verbose_name="在售数量"),
+        ),
+        migrations.RunPython(populate_on_sale_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.8 on 2026-10-18 10:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goods", "0005_category_on_sale_count"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImageBlob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("namespace", models.CharField(max_length=20, verbose_name="存储目录")),
+                ("sha256", models.CharField(max_length=64, verbose_name="内容哈希")),
+                (
+                    "path",
+                    models.CharField(
+                        max_length=255, unique=True, verbose_name="存储路径"
+                    ),
+                ),
+                (
+                    "size",
+                    models.PositiveIntegerField(default=0, verbose_name="文件大小"),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="创建时间"),
+                ),
+            ],
+            options={
+                "verbose_name": "图片文件",
+                "verbose_name_plural": "图片文件",
+                "db_table": "image_blob",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="imageblob",
+            constraint=models.UniqueConstraint(
+                fields=("namespace", "sha256"), name="image_blob_namespace_sha256_uniq"
+            ),
+        ),
+    ]
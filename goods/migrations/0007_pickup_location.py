@@ -0,0 +1,70 @@
+# Generated by Django 4.2.8 on 2026-10-18 10:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goods", "0006_image_blob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PickupLocation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("campus", models.CharField(max_length=50, verbose_name="校区")),
+                ("building", models.CharField(max_length=100, verbose_name="地点")),
+                (
+                    "aliases",
+                    models.JSONField(blank=True, default=list, verbose_name="别名"),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="创建时间"),
+                ),
+            ],
+            options={
+                "verbose_name": "取货地点",
+                "verbose_name_plural": "取货地点",
+                "db_table": "pickup_location",
+                "ordering": ["campus", "building"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="pickuplocation",
+            constraint=models.UniqueConstraint(
+                fields=("campus", "building"),
+                name="pickup_location_campus_building_uniq",
+            ),
+        ),
+        migrations.AddField(
+            model_name="goods",
+            name="location",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="goods",
+                to="goods.pickuplocation",
+                verbose_name="规范取货地点",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="goods",
+            index=models.Index(
+                fields=["location", "status", "created_at"],
+                name="goods_location_status_idx",
+            ),
+        ),
+    ]
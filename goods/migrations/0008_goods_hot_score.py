@@ -0,0 +1,37 @@
+# Generated by Django 4.2.8 on 2026-10-18 10:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goods", "0007_pickup_location"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GoodsHotScore",
+            fields=[
+                (
+                    "goods_id",
+                    models.IntegerField(
+                        primary_key=True, serialize=False, verbose_name="物品ID"
+                    ),
+                ),
+                (
+                    "rank_key",
+                    models.FloatField(db_index=True, verbose_name="热度排序键"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="更新时间"),
+                ),
+            ],
+            options={
+                "verbose_name": "物品热度",
+                "verbose_name_plural": "物品热度",
+                "db_table": "goods_hot_score",
+            },
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 4.2.8 on 2026-10-18 10:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goods", "0008_goods_hot_score"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChangeFeedCursor",
+            fields=[
+                (
+                    "consumer",
+                    models.CharField(
+                        max_length=64,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="消费者",
+                    ),
+                ),
+                (
+                    "last_id",
+                    models.BigIntegerField(default=0, verbose_name="已确认位置"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="更新时间"),
+                ),
+            ],
+            options={
+                "verbose_name": "变更订阅位置",
+                "verbose_name_plural": "变更订阅位置",
+                "db_table": "change_feed_cursor",
+            },
+        ),
+        migrations.CreateModel(
+            name="ChangeEvent",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "topic",
+                    models.CharField(
+                        choices=[("goods", "物品"), ("order", "订单")],
+                        max_length=20,
+                        verbose_name="主题",
+                    ),
+                ),
+                (
+                    "object_id",
+                    models.IntegerField(blank=True, null=True, verbose_name="对象ID"),
+                ),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[
+                            ("created", "创建"),
+                            ("updated", "更新"),
+                            ("status", "状态变更"),
+                            ("deleted", "删除"),
+                            ("bulk_created", "批量创建"),
+                        ],
+                        max_length=20,
+                        verbose_name="变更类型",
+                    ),
+                ),
+                (
+                    "payload",
+                    models.JSONField(blank=True, default=dict, verbose_name="变更内容"),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="创建时间"),
+                ),
+            ],
+            options={
+                "verbose_name": "变更事件",
+                "verbose_name_plural": "变更事件",
+                "db_table": "change_event",
+                "indexes": [
+                    models.Index(fields=["topic", "id"], name="change_event_topic_idx")
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.8 on 2026-10-18 10:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goods", "0009_change_feed"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="goods",
+            name="keywords",
+            field=models.JSONField(
+                blank=True, editable=False, null=True, verbose_name="关键词集合"
+            ),
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 4.2.8 on 2026-10-18 10:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_goods_keywords(apps, schema_editor):
+    from goods.keywords import goods_text, keyword_set
+
+    Goods = apps.get_model("goods", "Goods")
+    GoodsKeyword = apps.get_model("goods", "GoodsKeyword")
+    last_id = 0
+    while True:
+        rows = list(
+            Goods.objects.filter(id__gt=last_id).order_by("id")
+            .values_list("id", "name", "description", "keywords")[:2000]
+        )
+        if not rows:
+            return
+        missing, postings = [], []
+        for goods_id, name, description, keywords in rows:
+            if keywords is None:
+                keywords = sorted(keyword_set(goods_text(name, description)))
+                missing.append(Goods(id=goods_id, keywords=keywords))
+            postings.extend(
+                GoodsKeyword(goods_id=goods_id, keyword=keyword)
+                for keyword in set(keywords)
+                if len(keyword) <= 100
+            )
+        Goods.objects.bulk_update(missing, ["keywords"])
+        GoodsKeyword.objects.bulk_create(postings, batch_size=2000)
+        last_id = rows[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goods", "0010_goods_keywords"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GoodsKeyword",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("keyword", models.CharField(max_length=100, verbose_name="关键词")),
+                (
+                    "goods",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="keyword_postings",
+                        to="goods.goods",
+                        verbose_name="物品",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "物品关键词索引",
+                "verbose_name_plural": "物品关键词索引",
+                "db_table": "goods_keyword",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="goodskeyword",
+            constraint=models.UniqueConstraint(
+                fields=("keyword", "goods"), name="goods_keyword_uniq"
+            ),
+        ),
+        migrations.RunPython(populate_goods_keywords, migrations.RunPython.noop),
+    ]
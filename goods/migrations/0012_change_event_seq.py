@@ -0,0 +1,64 @@
+# Generated by Django 4.2.8 on 2026-10-18 11:45
+
+from django.db import migrations, models
+from django.db.models import F, Max
+
+
+def sequence_existing_events(apps, schema_editor):
+    # 已有事件均已提交，序号直接沿用主键，原有的消费者游标位置保持有效
+    ChangeEvent = apps.get_model("goods", "ChangeEvent")
+    ChangeSequence = apps.get_model("goods", "ChangeSequence")
+    ChangeEvent.objects.update(seq=F("id"))
+    last_seq = ChangeEvent.objects.aggregate(last=Max("id"))["last"] or 0
+    ChangeSequence.objects.update_or_create(name="change_event", defaults={"last_seq": last_seq})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goods", "0011_goods_keyword_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChangeSequence",
+            fields=[
+                (
+                    "name",
+                    models.CharField(
+                        max_length=32,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="序列名",
+                    ),
+                ),
+                (
+                    "last_seq",
+                    models.BigIntegerField(default=0, verbose_name="已分配序号"),
+                ),
+            ],
+            options={
+                "verbose_name": "变更序号",
+                "verbose_name_plural": "变更序号",
+                "db_table": "change_sequence",
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name="changeevent",
+            name="change_event_topic_idx",
+        ),
+        migrations.AddField(
+            model_name="changeevent",
+            name="seq",
+            field=models.BigIntegerField(
+                blank=True, null=True, unique=True, verbose_name="提交序号"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="changeevent",
+            index=models.Index(
+                fields=["topic", "seq"], name="change_event_topic_seq_idx"
+            ),
+        ),
+        migrations.RunPython(sequence_existing_events, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.8 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goods", "0012_change_event_seq"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="changeevent",
+            name="object_id",
+            field=models.BigIntegerField(blank=True, null=True, verbose_name="对象ID"),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.8 on 2026-10-18 13:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goods", "0013_change_event_object_id_bigint"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="goodshotscore",
+            name="goods_id",
+            field=models.BigIntegerField(
+                primary_key=True, serialize=False, verbose_name="物品ID"
+            ),
+        ),
+    ]
@@ -1,10 +1,12 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, Count, F, IntegerField, Value, When
 from users.models import User
 
 
 class Category(models.Model):
     name = models.CharField('品类名称', max_length=50, unique=True)
     description = models.TextField('品类描述', blank=True, null=True)
+    on_sale_count = models.IntegerField('在售数量', default=0)
     created_at = models.DateTimeField('创建时间', auto_now_add=True)
     
     class Meta:
@@ -14,6 +16,58 @@ class Category(models.Model):
     
     def __str__(self):
         return self.name
+    
+    @classmethod
+    def adjust_on_sale_count(cls, category_id, delta):
+        if category_id is not None and delta:
+            cls.objects.filter(id=category_id).update(on_sale_count=F('on_sale_count') + delta)
+    
+    @classmethod
+    def apply_on_sale_deltas(cls, deltas):
+        deltas = {category_id: delta for category_id, delta in deltas.items()
+                  if category_id is not None and delta}
+        if not deltas:
+            return
+        increment = Case(
+            *[When(id=category_id, then=Value(delta)) for category_id, delta in deltas.items()],
+            default=Value(0),
+            output_field=IntegerField()
+        )
+        cls.objects.filter(id__in=list(deltas)).update(on_sale_count=F('on_sale_count') + increment)
+    
+    @classmethod
+    def recompute_on_sale_counts(cls):
+        counts = dict(
+            Goods.objects.filter(status='on_sale', category__isnull=False)
+            .values_list('category_id').annotate(total=Count('id')).order_by()
+        )
+        with transaction.atomic():
+            cls.objects.exclude(id__in=list(counts)).update(on_sale_count=0)
+            if counts:
+                cls.objects.filter(id__in=list(counts)).update(on_sale_count=Case(
+                    *[When(id=category_id, then=Value(total)) for category_id, total in counts.items()],
+                    output_field=IntegerField()
+                ))
+        return counts
+
+
+class PickupLocation(models.Model):
+    campus = models.CharField('校区', max_length=50)
+    building = models.CharField('地点', max_length=100)
+    aliases = models.JSONField('别名', default=list, blank=True)
+    created_at = models.DateTimeField('创建时间', auto_now_add=True)
+    
+    class Meta:
+        db_table = 'pickup_location'
+        verbose_name = '取货地点'
+        verbose_name_plural = '取货地点'
+        ordering = ['campus', 'building']
+        constraints = [
+            models.UniqueConstraint(fields=['campus', 'building'], name='pickup_location_campus_building_uniq'),
+        ]
+    
+    def __str__(self):
+        return f'{self.campus}{self.building}'
 
 
 class Goods(models.Model):
@@ -38,8 +92,10 @@ class Goods(models.Model):
     price = models.DecimalField('价格', max_digits=10, decimal_places=2)
     condition = models.CharField('新旧程度', max_length=20, choices=CONDITION_CHOICES, default='good')
     images = models.JSONField('图片列表', default=list, blank=True)
+    keywords = models.JSONField('关键词集合', null=True, blank=True, editable=False)
     status = models.CharField('状态', max_length=20, choices=STATUS_CHOICES, default='on_sale')
     pickup_location = models.CharField('取货地点', max_length=200, blank=True, null=True)
+    location = models.ForeignKey(PickupLocation, on_delete=models.SET_NULL, null=True, blank=True, related_name='goods', verbose_name='规范取货地点')
     view_count = models.IntegerField('浏览次数', default=0)
     is_traded = models.BooleanField('是否已交易', default=False)
     created_at = models.DateTimeField('发布时间', auto_now_add=True)
@@ -50,6 +106,149 @@ class Goods(models.Model):
         verbose_name = '闲置物品'
         verbose_name_plural = '闲置物品'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at', 'id'], name='goods_status_created_idx'),
+            models.Index(fields=['status', 'price', 'id'], name='goods_status_price_idx'),
+            models.Index(fields=['status', 'view_count', 'id'], name='goods_status_views_idx'),
+            models.Index(fields=['location', 'status', 'created_at'], name='goods_location_status_idx'),
+        ]
     
     def __str__(self):
         return self.name
+    
+    def counted_category_id(self):
+        return self.category_id if self.status == 'on_sale' else None
+    
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'name', 'description'} & set(update_fields):
+            # pre_save 中按名称和描述重算的关键词需要一并写回
+            update_fields = kwargs['update_fields'] = {*update_fields, 'keywords'}
+        # post_save 里写入的变更事件必须和物品修改在同一事务中提交或回滚
+        with transaction.atomic():
+            if update_fields is not None and not {'status', 'category', 'category_id'} & set(update_fields):
+                return super().save(*args, **kwargs)
+            
+            previous = None
+            if not self._state.adding and self.pk is not None:
+                row = Goods.objects.select_for_update().filter(pk=self.pk).values_list(
+                    'status', 'category_id'
+                ).first()
+                if row and row[0] == 'on_sale':
+                    previous = row[1]
+            
+            super().save(*args, **kwargs)
+            
+            current = self.counted_category_id()
+            if previous != current:
+                Category.adjust_on_sale_count(previous, -1)
+                Category.adjust_on_sale_count(current, 1)
+
+
+class ImageBlob(models.Model):
+    namespace = models.CharField('存储目录', max_length=20)
+    sha256 = models.CharField('内容哈希', max_length=64)
+    path = models.CharField('存储路径', max_length=255, unique=True)
+    size = models.PositiveIntegerField('文件大小', default=0)
+    created_at = models.DateTimeField('创建时间', auto_now_add=True)
+    
+    class Meta:
+        db_table = 'image_blob'
+        verbose_name = '图片文件'
+        verbose_name_plural = '图片文件'
+        constraints = [
+            models.UniqueConstraint(fields=['namespace', 'sha256'], name='image_blob_namespace_sha256_uniq'),
+        ]
+    
+    def __str__(self):
+        return self.path
+
+
+class GoodsHotScore(models.Model):
+    goods_id = models.BigIntegerField('物品ID', primary_key=True)
+    rank_key = models.FloatField('热度排序键', db_index=True)
+    updated_at = models.DateTimeField('更新时间', auto_now=True)
+    
+    class Meta:
+        db_table = 'goods_hot_score'
+        verbose_name = '物品热度'
+        verbose_name_plural = '物品热度'
+    
+    def __str__(self):
+        return str(self.goods_id)
+
+
+class ChangeEvent(models.Model):
+    TOPIC_CHOICES = [
+        ('goods', '物品'),
+        ('order', '订单'),
+    ]
+    ACTION_CHOICES = [
+        ('created', '创建'),
+        ('updated', '更新'),
+        ('status', '状态变更'),
+        ('deleted', '删除'),
+        ('bulk_created', '批量创建'),
+    ]
+    
+    id = models.BigAutoField(primary_key=True)
+    seq = models.BigIntegerField('提交序号', null=True, blank=True, unique=True)
+    topic = models.CharField('主题', max_length=20, choices=TOPIC_CHOICES)
+    object_id = models.BigIntegerField('对象ID', null=True, blank=True)
+    action = models.CharField('变更类型', max_length=20, choices=ACTION_CHOICES)
+    payload = models.JSONField('变更内容', default=dict, blank=True)
+    created_at = models.DateTimeField('创建时间', auto_now_add=True)
+    
+    class Meta:
+        db_table = 'change_event'
+        verbose_name = '变更事件'
+        verbose_name_plural = '变更事件'
+        indexes = [
+            models.Index(fields=['topic', 'seq'], name='change_event_topic_seq_idx'),
+        ]
+    
+    def __str__(self):
+        return f'{self.topic}:{self.object_id}:{self.action}'
+
+
+class ChangeSequence(models.Model):
+    name = models.CharField('序列名', max_length=32, primary_key=True)
+    last_seq = models.BigIntegerField('已分配序号', default=0)
+    
+    class Meta:
+        db_table = 'change_sequence'
+        verbose_name = '变更序号'
+        verbose_name_plural = '变更序号'
+    
+    def __str__(self):
+        return f'{self.name}:{self.last_seq}'
+
+
+class ChangeFeedCursor(models.Model):
+    consumer = models.CharField('消费者', max_length=64, primary_key=True)
+    last_id = models.BigIntegerField('已确认位置', default=0)
+    updated_at = models.DateTimeField('更新时间', auto_now=True)
+    
+    class Meta:
+        db_table = 'change_feed_cursor'
+        verbose_name = '变更订阅位置'
+        verbose_name_plural = '变更订阅位置'
+    
+    def __str__(self):
+        return self.consumer
+
+
+class GoodsKeyword(models.Model):
+    goods = models.ForeignKey(Goods, on_delete=models.CASCADE, related_name='keyword_postings', verbose_name='物品')
+    keyword = models.CharField('关键词', max_length=100)
+    
+    class Meta:
+        db_table = 'goods_keyword'
+        verbose_name = '物品关键词索引'
+        verbose_name_plural = '物品关键词索引'
+        constraints = [
+            models.UniqueConstraint(fields=['keyword', 'goods'], name='goods_keyword_uniq'),
+        ]
+    
+    def __str__(self):
+        return self.keyword
@@ -0,0 +1,126 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ChangeEvent, ChangeFeedCursor, ChangeSequence
+
+
+CHANGE_TOPICS = [topic for topic, _ in ChangeEvent.TOPIC_CHOICES]
+SEQUENCE_NAME = 'change_event'
+
+
+def get_batch_size():
+    return getattr(settings, 'GOODS_OUTBOX_BATCH_SIZE', 500)
+
+
+def goods_payload(goods):
+    return {
+        'status': goods.status,
+        'seller': goods.seller_id,
+        'category': goods.category_id,
+        'price': str(goods.price),
+    }
+
+
+def order_payload(order):
+    return {
+        'status': order.status,
+        'goods': order.goods_id,
+        'buyer': order.buyer_id,
+        'seller': order.seller_id,
+    }
+
+
+def change_action(created, update_fields):
+    if created:
+        return 'created'
+    if update_fields and 'status' in update_fields:
+        return 'status'
+    return 'updated'
+
+
+def record_change(topic, object_id, action, payload=None):
+    return ChangeEvent.objects.create(topic=topic, object_id=object_id, action=action, payload=payload or {})
+
+
+def record_changes(topic, changes, action):
+    return ChangeEvent.objects.bulk_create([
+        ChangeEvent(topic=topic, object_id=object_id, action=action, payload=payload)
+        for object_id, payload in changes
+    ])
+
+
+def serialize_event(event):
+    return {
+        'id': event['id'],
+        'seq': event['seq'],
+        'topic': event['topic'],
+        'object_id': event['object_id'],
+        'action': event['action'],
+        'payload': event['payload'],
+        'created_at': event['created_at'].isoformat(),
+    }
+
+
+def sequence_changes(limit=None):
+    # 自增 ID 在并发事务下可能晚于更大的 ID 提交，游标改用提交后才分配的序号：
+    # 未提交的事件此时不可见，提交后总是拿到比已分配序号更大的值，消费方不会越过它们
+    if not ChangeEvent.objects.filter(seq__isnull=True).exists():
+        return 0
+    with transaction.atomic():
+        ChangeSequence.objects.get_or_create(name=SEQUENCE_NAME)
+        sequence = ChangeSequence.objects.select_for_update().get(name=SEQUENCE_NAME)
+        events = list(
+            ChangeEvent.objects.filter(seq__isnull=True).order_by('id').only('id')[:limit or get_batch_size()]
+        )
+        for offset, event in enumerate(events, start=1):
+            event.seq = sequence.last_seq + offset
+        ChangeEvent.objects.bulk_update(events, ['seq'], batch_size=500)
+        sequence.last_seq += len(events)
+        sequence.save(update_fields=['last_seq'])
+    return len(events)
+
+
+def read_changes(after=0, topics=None, limit=None):
+    limit = limit or get_batch_size()
+    sequence_changes(limit)
+    queryset = ChangeEvent.objects.filter(seq__gt=after).order_by('seq')
+    if topics:
+        queryset = queryset.filter(topic__in=topics)
+    rows = queryset.values('id', 'seq', 'topic', 'object_id', 'action', 'payload', 'created_at')
+    return [serialize_event(row) for row in rows[:limit]]
+
+
+def get_cursor(consumer):
+    cursor, _ = ChangeFeedCursor.objects.get_or_create(consumer=consumer)
+    return cursor.last_id
+
+
+def ack_changes(consumer, last_id):
+    ChangeFeedCursor.objects.get_or_create(consumer=consumer)
+    ChangeFeedCursor.objects.filter(consumer=consumer, last_id__lt=last_id).update(
+        last_id=last_id, updated_at=timezone.now()
+    )
+    return get_cursor(consumer)
+
+
+def iter_changes(consumer=None, after=None, topics=None, batch_size=None, ack=True):
+    if after is None:
+        after = get_cursor(consumer) if consumer else 0
+    while True:
+        batch = read_changes(after, topics, batch_size)
+        if not batch:
+            return
+        yield batch
+        after = batch[-1]['seq']
+        if consumer and ack:
+            ack_changes(consumer, after)
+
+
+def prune_changes(before):
+    queryset = ChangeEvent.objects.filter(created_at__lt=before, seq__isnull=False)
+    acked = ChangeFeedCursor.objects.order_by('last_id').values_list('last_id', flat=True).first()
+    if acked is not None:
+        queryset = queryset.filter(seq__lte=acked)
+    deleted, _ = queryset.delete()
+    return deleted
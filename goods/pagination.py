@@ -0,0 +1,111 @@
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q
+
+
+GOODS_ORDERINGS = {
+    'latest': ('-created_at', '-id'),
+    'price_asc': ('price', 'id'),
+    'price_desc': ('-price', '-id'),
+    'views': ('-view_count', '-id'),
+}
+
+
+def get_goods_ordering(name):
+    return GOODS_ORDERINGS.get(name or 'latest', GOODS_ORDERINGS['latest'])
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class GoodsCursorPagination:
+    page_size = 10
+    max_page_size = 50
+
+    def __init__(self):
+        self.ordering_name = 'latest'
+        self.has_more = False
+        self.next_position = None
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get('page_size', self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def encode_cursor(self, position):
+        payload = json.dumps({'o': self.ordering_name, 'p': position}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            ordering_name = payload['o']
+            value, last_id = payload['p']
+            field = GOODS_ORDERINGS[ordering_name][0].lstrip('-')
+            return ordering_name, self.parse_value(field, value), int(last_id)
+        except (ValueError, TypeError, KeyError, InvalidOperation):
+            raise InvalidCursor(cursor)
+
+    def parse_value(self, field, value):
+        if field == 'created_at':
+            return datetime.fromisoformat(value)
+        if field == 'price':
+            return Decimal(value)
+        return int(value)
+
+    def serialize_value(self, value):
+        if isinstance(value, datetime):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        return value
+
+    def paginate_queryset(self, queryset, request):
+        page_size = self.get_page_size(request)
+        cursor = request.query_params.get('cursor')
+
+        if cursor:
+            self.ordering_name, value, last_id = self.decode_cursor(cursor)
+        else:
+            self.ordering_name = request.query_params.get('ordering') or 'latest'
+            if self.ordering_name not in GOODS_ORDERINGS:
+                self.ordering_name = 'latest'
+            value = last_id = None
+
+        ordering = GOODS_ORDERINGS[self.ordering_name]
+        field = ordering[0].lstrip('-')
+        descending = ordering[0].startswith('-')
+        queryset = queryset.order_by(*ordering)
+
+        if last_id is not None:
+            lookup = 'lt' if descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{field}__{lookup}': value}) |
+                Q(**{field: value, f'id__{lookup}': last_id})
+            )
+
+        rows = list(queryset[:page_size + 1])
+        self.has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if self.has_more:
+            last = rows[-1]
+            if isinstance(last, dict):
+                value, last_id = last[field], last['id']
+            else:
+                value, last_id = getattr(last, field), last.id
+            self.next_position = [self.serialize_value(value), last_id]
+        else:
+            self.next_position = None
+        return rows
+
+    def get_next_cursor(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position)
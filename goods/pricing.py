@@ -0,0 +1,240 @@
+import logging
+import os
+import pickle
+import random
+import tempfile
+import threading
+import time
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.utils import timezone
+
+from .search import tokenize
+
+
+logger = logging.getLogger(__name__)
+
+
+class PriceModelUnavailable(Exception):
+    pass
+
+
+def get_model_file():
+    model_file = getattr(settings, 'GOODS_PRICING_MODEL_FILE', None)
+    return os.fspath(model_file) if model_file else None
+
+
+def get_reload_interval():
+    return getattr(settings, 'GOODS_PRICING_RELOAD_INTERVAL', 30)
+
+
+def get_max_pricing_batch():
+    return getattr(settings, 'GOODS_PRICING_MAX_BATCH', 500)
+
+
+def goods_terms(text):
+    return tokenize(text)
+
+
+def feature_row(category_id, condition, name, description=''):
+    return (
+        str(category_id) if category_id is not None else '',
+        condition or 'good',
+        f'{name or ""} {description or ""}',
+    )
+
+
+def feature_matrix(rows):
+    import numpy as np
+
+    matrix = np.empty((len(rows), 3), dtype=object)
+    matrix[:] = rows
+    return matrix
+
+
+def load_training_samples():
+    from orders.models import Order
+    from .models import Goods
+
+    order_weight = getattr(settings, 'GOODS_PRICING_ORDER_WEIGHT', 3.0)
+    samples = []
+    sold_ids = set()
+    orders = Order.objects.filter(status='completed').values_list(
+        'goods_id', 'goods__category_id', 'goods__condition', 'goods__name',
+        'goods__description', 'amount'
+    )
+    for goods_id, category_id, condition, name, description, amount in orders.iterator(chunk_size=2000):
+        sold_ids.add(goods_id)
+        samples.append((feature_row(category_id, condition, name, description), float(amount), order_weight))
+
+    listings = Goods.objects.values_list('id', 'category_id', 'condition', 'name', 'description', 'price')
+    for goods_id, category_id, condition, name, description, price in listings.iterator(chunk_size=2000):
+        if goods_id not in sold_ids:
+            samples.append((feature_row(category_id, condition, name, description), float(price), 1.0))
+    return samples
+
+
+def clean_samples(samples):
+    import numpy as np
+
+    prices = np.array([price for _, price, _ in samples if price > 0])
+    if not len(prices):
+        return []
+    lower, upper = np.percentile(prices, [1, 99])
+    return [sample for sample in samples if lower <= sample[1] <= upper and sample[1] > 0]
+
+
+def build_pipeline():
+    from sklearn.compose import ColumnTransformer
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import Ridge
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder
+
+    features = ColumnTransformer([
+        ('category', OneHotEncoder(handle_unknown='ignore'), [0]),
+        ('condition', OneHotEncoder(handle_unknown='ignore'), [1]),
+        ('text', TfidfVectorizer(analyzer=goods_terms, min_df=2, sublinear_tf=True), 2),
+    ])
+    return Pipeline([('features', features), ('regressor', Ridge(alpha=1.0))])
+
+
+def train_price_model(samples, holdout=0.2, seed=42):
+    import numpy as np
+
+    samples = clean_samples(samples)
+    rng = random.Random(seed)
+    rng.shuffle(samples)
+    split = int(len(samples) * (1 - holdout)) if holdout else len(samples)
+    train, test = samples[:split], samples[split:]
+
+    def fit(rows):
+        frame = feature_matrix([row for row, _, _ in rows])
+        target = np.log1p([price for _, price, _ in rows])
+        weights = np.array([weight for _, _, weight in rows])
+        pipeline = build_pipeline()
+        pipeline.fit(frame, target, regressor__sample_weight=weights)
+        residuals = target - pipeline.predict(frame)
+        return pipeline, float(np.std(residuals))
+
+    metrics = {'samples': len(samples)}
+    if test:
+        pipeline, _ = fit(train)
+        frame = feature_matrix([row for row, _, _ in test])
+        predicted = np.expm1(pipeline.predict(frame))
+        actual = np.array([price for _, price, _ in test])
+        metrics['mae'] = float(np.mean(np.abs(predicted - actual)))
+        metrics['mape'] = float(np.mean(np.abs(predicted - actual) / actual))
+
+    pipeline, spread = fit(samples)
+    return {
+        'pipeline': pipeline,
+        'spread': spread,
+        'metrics': metrics,
+        'trained_at': timezone.now().isoformat(),
+    }
+
+
+def dump_price_model(model, model_file):
+    os.makedirs(os.path.dirname(model_file), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(model_file))
+    with os.fdopen(fd, 'wb') as f:
+        pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, model_file)
+
+
+def quantize(value):
+    return str(Decimal(value).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
+
+
+class PriceModelHolder:
+    def __init__(self):
+        self._model = None
+        self._mtime = None
+        self._checked_at = 0
+        self._lock = threading.Lock()
+        self._loading = False
+
+    def load(self):
+        model_file = get_model_file()
+        if not model_file:
+            return None
+        try:
+            mtime = os.stat(model_file).st_mtime_ns
+            with open(model_file, 'rb') as f:
+                model = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, pickle.UnpicklingError) as exc:
+            logger.warning('加载定价模型失败: %s', exc)
+            return None
+        self.swap(model, mtime)
+        return model
+
+    def swap(self, model, mtime=None):
+        self._model, self._mtime = model, mtime
+
+    def _reload_in_background(self):
+        try:
+            self.load()
+        finally:
+            self._loading = False
+
+    def _check_for_update(self):
+        now = time.monotonic()
+        if now - self._checked_at < get_reload_interval():
+            return
+        self._checked_at = now
+        model_file = get_model_file()
+        try:
+            mtime = os.stat(model_file).st_mtime_ns if model_file else None
+        except OSError:
+            return
+        if mtime is None or mtime == self._mtime:
+            return
+        with self._lock:
+            if self._loading:
+                return
+            self._loading = True
+        threading.Thread(target=self._reload_in_background, name='price-model-reload', daemon=True).start()
+
+    def get(self):
+        model = self._model
+        if model is None:
+            with self._lock:
+                if self._model is None:
+                    self.load()
+                    self._checked_at = time.monotonic()
+            model = self._model
+        else:
+            self._check_for_update()
+        if model is None:
+            raise PriceModelUnavailable()
+        return model
+
+    def predict(self, rows):
+        import numpy as np
+
+        model = self.get()
+        predicted = model['pipeline'].predict(feature_matrix(rows))
+        spread = model['spread']
+        return [
+            {
+                'suggested': quantize(np.expm1(value)),
+                'min': quantize(max(np.expm1(value - spread), 0)),
+                'max': quantize(np.expm1(value + spread)),
+            }
+            for value in predicted
+        ]
+
+
+_holder = PriceModelHolder()
+
+
+def get_price_model():
+    return _holder
+
+
+def load_price_model():
+    _holder.load()
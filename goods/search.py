@@ -0,0 +1,312 @@
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+import jieba
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.db import connection
+from django.db.models import IntegerField, Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+SEARCH_STOP_WORDS = set([
+    '的', '了', '和', '是', '在', '有', '我', '也', '都', '很', '还', '但',
+    '又', '或', '与', '及', '等', '对', '把', '被', '着', '过',
+])
+
+
+def tokenize(text):
+    if not text:
+        return []
+
+    tokens = []
+    for word in jieba.cut_for_search(text.lower()):
+        word = word.strip()
+        if word and word not in SEARCH_STOP_WORDS and TOKEN_PATTERN.fullmatch(word):
+            tokens.append(word)
+    return tokens
+
+
+def get_max_results():
+    return getattr(settings, 'GOODS_SEARCH_MAX_RESULTS', 1000)
+
+
+def order_by_ids(queryset, ids):
+    if not ids:
+        return queryset.none()
+    column = '%s.%s' % (
+        connection.ops.quote_name(queryset.model._meta.db_table),
+        connection.ops.quote_name('id')
+    )
+    ranking = RawSQL('CASE %s %s END' % (column, ' '.join(
+        'WHEN %d THEN %d' % (int(goods_id), position) for position, goods_id in enumerate(ids)
+    )), [], output_field=IntegerField())
+    return queryset.filter(id__in=ids).annotate(search_rank=ranking).order_by('search_rank')
+
+
+def filter_ranked(queryset, ids, limit, chunk_size=2000):
+    # 按相关度顺序分批保留满足列表过滤条件的物品，凑满 limit 个即停止，截断发生在过滤之后
+    queryset = queryset.order_by()
+    result = []
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        allowed = set(queryset.filter(id__in=chunk).values_list('id', flat=True))
+        result.extend(goods_id for goods_id in chunk if goods_id in allowed)
+        if len(result) >= limit:
+            break
+    return result[:limit]
+
+
+class BaseSearchBackend:
+    def search(self, queryset, keyword):
+        raise NotImplementedError
+
+    def index(self, goods):
+        pass
+
+    def remove(self, goods_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def warmup(self):
+        pass
+
+
+class IContainsSearchBackend(BaseSearchBackend):
+    def search(self, queryset, keyword):
+        return queryset.filter(
+            Q(name__icontains=keyword) | Q(description__icontains=keyword)
+        ).order_by('-created_at')
+
+
+class JiebaIndexSearchBackend(BaseSearchBackend):
+    # 倒排索引保存在进程内存中，每个进程各有一份，只适合没有 MySQL 全文索引和 FTS5 时的单进程回退部署。
+    # 索引由启动钩子 warmup_search_index 在后台构建，构建完成前的搜索退回 icontains 查询
+    k1 = 1.5
+    b = 0.75
+    name_weight = 2
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._rebuild_lock = threading.Lock()
+        self._postings = defaultdict(dict)
+        self._doc_terms = {}
+        self._doc_lengths = {}
+        self._total_length = 0
+        self._ready = False
+        self._journal = None
+
+    @property
+    def ready(self):
+        return self._ready
+
+    def _document_terms(self, name, description):
+        terms = Counter(tokenize(description))
+        for token in tokenize(name):
+            terms[token] += self.name_weight
+        return terms
+
+    def _add(self, goods_id, name, description):
+        self._discard(goods_id)
+        terms = self._document_terms(name, description)
+        for term, freq in terms.items():
+            self._postings[term][goods_id] = freq
+        length = sum(terms.values())
+        self._doc_terms[goods_id] = list(terms)
+        self._doc_lengths[goods_id] = length
+        self._total_length += length
+
+    def _discard(self, goods_id):
+        terms = self._doc_terms.pop(goods_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(goods_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._doc_lengths.pop(goods_id)
+
+    def warmup(self):
+        if not self._ready:
+            self.rebuild()
+
+    def rebuild(self):
+        from .models import Goods
+
+        with self._rebuild_lock:
+            with self._lock:
+                self._journal = []
+            try:
+                # 在锁外扫描全表构建新索引，期间的增量变更记入日志，替换前重放
+                fresh = type(self)()
+                rows = Goods.objects.values_list('id', 'name', 'description')
+                for goods_id, name, description in rows.iterator(chunk_size=2000):
+                    fresh._add(goods_id, name, description)
+                with self._lock:
+                    for goods_id, fields in self._journal:
+                        if fields is None:
+                            fresh._discard(goods_id)
+                        else:
+                            fresh._add(goods_id, *fields)
+                    self._postings, self._doc_terms = fresh._postings, fresh._doc_terms
+                    self._doc_lengths, self._total_length = fresh._doc_lengths, fresh._total_length
+                    self._ready = True
+            finally:
+                with self._lock:
+                    self._journal = None
+
+    def index(self, goods):
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((goods.id, (goods.name, goods.description)))
+            if self._ready:
+                self._add(goods.id, goods.name, goods.description)
+
+    def remove(self, goods_id):
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((goods_id, None))
+            if self._ready:
+                self._discard(goods_id)
+
+    def rank(self, keyword, limit=None, queryset=None):
+        query_terms = set(tokenize(keyword))
+
+        with self._lock:
+            doc_count = len(self._doc_lengths)
+            if not doc_count or not query_terms:
+                return []
+            avg_length = self._total_length / doc_count
+
+            scores = defaultdict(float)
+            for term in query_terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for goods_id, freq in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[goods_id] / avg_length)
+                    scores[goods_id] += idf * freq * (self.k1 + 1) / (freq + norm)
+
+        ranked = [goods_id for goods_id, _ in sorted(scores.items(), key=lambda item: (-item[1], -item[0]))]
+        limit = limit or get_max_results()
+        if queryset is None:
+            return ranked[:limit]
+        return filter_ranked(queryset, ranked, limit)
+
+    def search(self, queryset, keyword):
+        if not self._ready or not tokenize(keyword):
+            return IContainsSearchBackend().search(queryset, keyword)
+        return order_by_ids(queryset, self.rank(keyword, queryset=queryset))
+
+
+class SQLiteFTS5SearchBackend(BaseSearchBackend):
+    table = 'goods_fts'
+
+    def _match_expression(self, keyword):
+        terms = sorted(set(tokenize(keyword)))
+        return ' OR '.join('"%s"' % term.replace('"', '""') for term in terms)
+
+    def search(self, queryset, keyword):
+        expression = self._match_expression(keyword)
+        if not expression:
+            return IContainsSearchBackend().search(queryset, keyword)
+
+        try:
+            allowed_sql, allowed_params = queryset.order_by().values('id').query.sql_with_params()
+        except EmptyResultSet:
+            return queryset.none()
+
+        # 列表过滤条件作为子查询并入 MATCH，先过滤再按相关度截断
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s AND rowid IN ({allowed_sql}) '
+                f'ORDER BY bm25({self.table}, 2.0, 1.0) LIMIT %s',
+                [expression, *allowed_params, get_max_results()]
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        return order_by_ids(queryset, ids)
+
+    def index(self, goods):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [goods.id])
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, name, description) VALUES (%s, %s, %s)',
+                [goods.id, ' '.join(tokenize(goods.name)), ' '.join(tokenize(goods.description))]
+            )
+
+    def remove(self, goods_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [goods_id])
+
+    def rebuild(self):
+        from .models import Goods
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            batch = []
+            rows = Goods.objects.values_list('id', 'name', 'description')
+            for goods_id, name, description in rows.iterator(chunk_size=2000):
+                batch.append((goods_id, ' '.join(tokenize(name)), ' '.join(tokenize(description))))
+                if len(batch) >= 2000:
+                    cursor.executemany(
+                        f'INSERT INTO {self.table} (rowid, name, description) VALUES (%s, %s, %s)',
+                        batch
+                    )
+                    batch = []
+            if batch:
+                cursor.executemany(
+                    f'INSERT INTO {self.table} (rowid, name, description) VALUES (%s, %s, %s)',
+                    batch
+                )
+
+
+class MySQLFulltextSearchBackend(BaseSearchBackend):
+    def search(self, queryset, keyword):
+        keyword = keyword.strip()
+        if len(keyword) < 2:
+            return IContainsSearchBackend().search(queryset, keyword)
+
+        relevance = RawSQL(
+            'MATCH (`goods`.`name`, `goods`.`description`) AGAINST (%s IN NATURAL LANGUAGE MODE)',
+            [keyword]
+        )
+        return queryset.annotate(search_rank=relevance).filter(
+            search_rank__gt=0
+        ).order_by('-search_rank', '-created_at')
+
+
+VENDOR_BACKENDS = {
+    'mysql': MySQLFulltextSearchBackend,
+    'sqlite': SQLiteFTS5SearchBackend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_search_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                backend_path = getattr(settings, 'GOODS_SEARCH_BACKEND', None)
+                if backend_path:
+                    backend_class = import_string(backend_path)
+                else:
+                    backend_class = VENDOR_BACKENDS.get(connection.vendor, JiebaIndexSearchBackend)
+                _backend = backend_class()
+    return _backend
+
+
+def warmup_search_index():
+    get_search_backend().warmup()
@@ -1,17 +1,29 @@
+from django.core.files.storage import default_storage
 from rest_framework import serializers
-from .models import Category, Goods
+from .images import derivative_urls
+from .models import Category, Goods, PickupLocation
+
+
+class ImageDerivativesField(serializers.ReadOnlyField):
+    def to_representation(self, value):
+        return [derivative_urls(url) for url in value or []]
 
 
 class CategorySerializer(serializers.ModelSerializer):
-    goods_count = serializers.SerializerMethodField()
+    goods_count = serializers.IntegerField(source='on_sale_count', read_only=True)
     
     class Meta:
         model = Category
         fields = ['id', 'name', 'description', 'goods_count', 'created_at']
         read_only_fields = ['id', 'created_at']
+
+
+class PickupLocationSerializer(serializers.ModelSerializer):
+    name = serializers.CharField(source='__str__', read_only=True)
     
-    def get_goods_count(self, obj):
-        return obj.goods.filter(status='on_sale').count()
+    class Meta:
+        model = PickupLocation
+        fields = ['id', 'campus', 'building', 'name', 'aliases']
 
 
 class GoodsListSerializer(serializers.ModelSerializer):
@@ -21,14 +33,16 @@ class GoodsListSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
     condition_display = serializers.CharField(source='get_condition_display', read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
+    image_derivatives = ImageDerivativesField(source='images')
     
     class Meta:
         model = Goods
         fields = ['id', 'name', 'category', 'category_name', 'description', 'price', 
-                  'condition', 'condition_display', 'images', 'status', 'status_display',
-                  'pickup_location', 'view_count', 'seller_name', 'seller_avatar', 
+                  'condition', 'condition_display', 'images', 'image_derivatives',
+                  'status', 'status_display',
+                  'pickup_location', 'location', 'view_count', 'seller_name', 'seller_avatar', 
                   'seller_credit', 'created_at', 'is_traded']
-        read_only_fields = ['id', 'view_count', 'created_at', 'seller']
+        read_only_fields = ['id', 'view_count', 'created_at', 'seller', 'location']
 
 
 class GoodsDetailSerializer(serializers.ModelSerializer):
@@ -40,15 +54,17 @@ class GoodsDetailSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
     condition_display = serializers.CharField(source='get_condition_display', read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
+    image_derivatives = ImageDerivativesField(source='images')
     
     class Meta:
         model = Goods
         fields = ['id', 'seller', 'seller_id', 'seller_name', 'seller_avatar', 
                   'seller_credit', 'seller_verified', 'name', 'category', 'category_name',
                   'description', 'price', 'condition', 'condition_display', 'images',
-                  'status', 'status_display', 'pickup_location', 'view_count', 
+                  'image_derivatives',
+                  'status', 'status_display', 'pickup_location', 'location', 'view_count', 
                   'is_traded', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'view_count', 'created_at', 'updated_at', 'seller']
+        read_only_fields = ['id', 'view_count', 'created_at', 'updated_at', 'seller', 'location']
 
 
 class GoodsCreateSerializer(serializers.ModelSerializer):
@@ -77,3 +93,71 @@ class GoodsUpdateSerializer(serializers.ModelSerializer):
         if len(value) > 5:
             raise serializers.ValidationError('最多上传5张图片')
         return value
+
+
+class PriceSuggestionSerializer(serializers.Serializer):
+    category = serializers.IntegerField(required=False, allow_null=True, default=None)
+    condition = serializers.ChoiceField(choices=Goods.CONDITION_CHOICES, default='good')
+    name = serializers.CharField(max_length=200)
+    description = serializers.CharField(required=False, allow_blank=True, default='')
+
+
+class GoodsListProjection:
+    columns = ['id', 'name', 'category_id', 'category__name', 'description', 'price',
+               'condition', 'images', 'status', 'pickup_location', 'location_id', 'view_count',
+               'seller__username', 'seller__avatar', 'seller__credit_score',
+               'created_at', 'is_traded']
+    condition_labels = dict(Goods.CONDITION_CHOICES)
+    status_labels = dict(Goods.STATUS_CHOICES)
+    
+    def __init__(self, rows, context=None):
+        self.rows = rows
+        self.context = context or {}
+        self.price_field = serializers.DecimalField(max_digits=10, decimal_places=2)
+        self.datetime_field = serializers.DateTimeField()
+    
+    @classmethod
+    def project(cls, queryset):
+        return queryset.values(*cls.columns)
+    
+    def avatar_url(self, name, cache):
+        if not name:
+            return None
+        if name not in cache:
+            url = default_storage.url(name)
+            request = self.context.get('request')
+            cache[name] = request.build_absolute_uri(url) if request is not None else url
+        return cache[name]
+    
+    def to_representation(self, row, avatar_cache):
+        item = {
+            'id': row['id'],
+            'name': row['name'],
+            'category': row['category_id'],
+        }
+        if row['category_id'] is not None:
+            item['category_name'] = row['category__name']
+        item.update({
+            'description': row['description'],
+            'price': self.price_field.to_representation(row['price']),
+            'condition': row['condition'],
+            'condition_display': self.condition_labels.get(row['condition'], row['condition']),
+            'images': row['images'],
+            'image_derivatives': [derivative_urls(url) for url in row['images'] or []],
+            'status': row['status'],
+            'status_display': self.status_labels.get(row['status'], row['status']),
+            'pickup_location': row['pickup_location'],
+            'location': row['location_id'],
+            'view_count': row['view_count'],
+            'seller_name': row['seller__username'],
+            'seller_avatar': self.avatar_url(row['seller__avatar'], avatar_cache),
+            'seller_credit': row['seller__credit_score'],
+            'created_at': self.datetime_field.to_representation(row['created_at']),
+            'is_traded': row['is_traded'],
+        })
+        return item
+    
+    @property
+    def data(self):
+        avatar_cache = {}
+        return [self.to_representation(row, avatar_cache) for row in self.rows]
@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import bump_generation
+from .models import Category, Goods
+from .outbox import record_changes
+from .similar import get_similar_index
+
+
+BULK_TARGET_STATUS = {
+    'on_shelf': 'on_sale',
+    'off_shelf': 'off_sale',
+    'delete': None,
+}
+
+SKIP_NOT_FOUND = '物品不存在'
+SKIP_FORBIDDEN = '无权操作'
+SKIP_TRADED = '该物品已交易，无法上架'
+
+
+def get_max_bulk_ids():
+    return getattr(settings, 'GOODS_BULK_MAX_IDS', 500)
+
+
+def on_sale_delta(action, status):
+    if action == 'on_shelf':
+        return 0 if status == 'on_sale' else 1
+    return -1 if status == 'on_sale' else 0
+
+
+def bulk_shelf(user, action, ids=None, seller_id=None):
+    target_status = BULK_TARGET_STATUS[action]
+    # 管理员只能按卖家整体下架，其余按 ID 的操作一律只作用于自己的物品
+    takedown = seller_id is not None and action == 'off_shelf' and user.is_admin
+    applied = []
+    skipped = []
+    deltas = {}
+
+    with transaction.atomic():
+        queryset = Goods.objects.select_for_update().order_by()
+        if ids is not None:
+            queryset = queryset.filter(id__in=ids)
+        if seller_id is not None:
+            queryset = queryset.filter(seller_id=seller_id)
+        rows = queryset.values_list('id', 'seller_id', 'status', 'category_id', 'is_traded')
+
+        found = set()
+        for goods_id, owner_id, status, category_id, is_traded in rows:
+            found.add(goods_id)
+            if owner_id != user.id and not takedown:
+                skipped.append({'id': goods_id, 'reason': SKIP_FORBIDDEN})
+                continue
+            if action == 'on_shelf' and is_traded:
+                skipped.append({'id': goods_id, 'reason': SKIP_TRADED})
+                continue
+            applied.append(goods_id)
+            delta = on_sale_delta(action, status)
+            if category_id is not None and delta:
+                deltas[category_id] = deltas.get(category_id, 0) + delta
+
+        if ids is not None:
+            skipped.extend(
+                {'id': goods_id, 'reason': SKIP_NOT_FOUND}
+                for goods_id in dict.fromkeys(ids) if goods_id not in found
+            )
+
+        if applied:
+            targets = Goods.objects.filter(id__in=applied)
+            # 先统一置为下架，post_delete 中的计数回调即为空操作，计数只按分组差值调整一次
+            targets.update(status=target_status or 'off_sale', updated_at=timezone.now())
+            Category.apply_on_sale_deltas(deltas)
+            if target_status is None:
+                targets.delete()
+            else:
+                record_changes('goods', [(goods_id, {'status': target_status}) for goods_id in applied], 'status')
+            transaction.on_commit(bump_generation)
+            transaction.on_commit(lambda: get_similar_index().refresh(applied))
+
+    applied.sort()
+    skipped.sort(key=lambda item: item['id'])
+    return {'applied': applied, 'skipped': skipped}
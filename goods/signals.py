@@ -0,0 +1,113 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from .cache import bump_generation
+from .hot import get_hot_ranking
+from .keywords import add_keyword_postings, goods_keywords, sync_keyword_postings
+from .locations import match_location, reset_location_matcher
+from .models import Category, Goods, PickupLocation
+from .outbox import change_action, goods_payload, order_payload, record_change
+from .search import get_search_backend
+from .similar import get_similar_index
+
+
+# bulk_create 不触发 post_save，批量写入物品后发送，参数 goods_ids
+goods_bulk_created = Signal()
+
+
+@receiver(pre_save, sender=Goods)
+def assign_location(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'pickup_location' not in update_fields:
+        return
+    instance.location_id = match_location(instance.pickup_location)
+
+
+@receiver(pre_save, sender=Goods)
+def assign_keywords(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {'name', 'description'} & set(update_fields):
+        return
+    instance.keywords = goods_keywords(instance)
+
+
+@receiver(post_save, sender=PickupLocation)
+@receiver(post_delete, sender=PickupLocation)
+def refresh_location_matcher(sender, **kwargs):
+    transaction.on_commit(reset_location_matcher)
+
+
+@receiver(post_save, sender=Goods)
+def record_goods_change(sender, instance, created=False, update_fields=None, **kwargs):
+    record_change('goods', instance.id, change_action(created, update_fields), goods_payload(instance))
+
+
+@receiver(post_delete, sender=Goods)
+def record_goods_delete(sender, instance, **kwargs):
+    record_change('goods', instance.id, 'deleted', goods_payload(instance))
+
+
+@receiver(post_save, sender='orders.Order')
+def record_order_change(sender, instance, created=False, update_fields=None, **kwargs):
+    record_change('order', instance.id, change_action(created, update_fields), order_payload(instance))
+
+
+@receiver(post_delete, sender='orders.Order')
+def record_order_delete(sender, instance, **kwargs):
+    record_change('order', instance.id, 'deleted', order_payload(instance))
+
+
+@receiver(post_save, sender=Goods)
+def index_goods_keywords(sender, instance, created=False, update_fields=None, **kwargs):
+    if created:
+        add_keyword_postings([(instance.id, instance.keywords)])
+    elif not update_fields or {'name', 'description'} & set(update_fields):
+        sync_keyword_postings(instance.id, instance.keywords)
+
+
+@receiver(post_save, sender=Goods)
+def index_goods(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not {'name', 'description'} & set(update_fields):
+        return
+    transaction.on_commit(lambda: get_search_backend().index(instance))
+
+
+@receiver(post_save, sender=Goods)
+def update_similar_index(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not {'name', 'description', 'status'} & set(update_fields):
+        return
+    transaction.on_commit(lambda: get_similar_index().update(instance))
+
+
+@receiver(post_delete, sender=Goods)
+def decrement_category_count(sender, instance, **kwargs):
+    Category.adjust_on_sale_count(instance.counted_category_id(), -1)
+
+
+@receiver(post_delete, sender=Goods)
+def unindex_goods(sender, instance, **kwargs):
+    goods_id = instance.id
+    transaction.on_commit(lambda: get_search_backend().remove(goods_id))
+    transaction.on_commit(lambda: get_similar_index().remove(goods_id))
+    transaction.on_commit(lambda: get_hot_ranking().remove(goods_id))
+
+
+@receiver(post_save, sender='chat.ChatRoom')
+def count_chat_heat(sender, instance, created=False, **kwargs):
+    if created and instance.goods_id:
+        goods_id = instance.goods_id
+        transaction.on_commit(lambda: get_hot_ranking().incr(goods_id, 'chat'))
+
+
+@receiver(post_save, sender='orders.Order')
+def count_order_heat(sender, instance, created=False, **kwargs):
+    if created:
+        goods_id = instance.goods_id
+        transaction.on_commit(lambda: get_hot_ranking().incr(goods_id, 'order'))
+
+
+@receiver(post_save, sender=Goods)
+@receiver(post_delete, sender=Goods)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_response_cache(sender, **kwargs):
+    transaction.on_commit(bump_generation)
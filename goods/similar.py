@@ -0,0 +1,257 @@
+import logging
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import connection
+
+from .search import tokenize
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_merge_threshold():
+    return getattr(settings, 'GOODS_SIMILAR_MERGE_THRESHOLD', 256)
+
+
+def get_cache_size():
+    return getattr(settings, 'GOODS_SIMILAR_CACHE_SIZE', 10000)
+
+
+def identity(terms):
+    return terms
+
+
+class SimilarGoodsIndex:
+    name_weight = 2
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._ready = False
+        self._rebuilding = False
+        self._stale = False
+        self._changed = set()
+        self._vectorizer = None
+        self._matrix = None
+        self._ids = []
+        self._alive = None
+        self._rows = {}
+        self._extra_vectors = []
+        self._extra_ids = []
+        self._extra_matrix = None
+        self._neighbours = OrderedDict()
+
+    def _document_terms(self, name, description):
+        return tokenize(name) * self.name_weight + tokenize(description)
+
+    def _ensure_ready(self):
+        if self._ready:
+            return
+        with self._build_lock:
+            if not self._ready:
+                self._build()
+
+    def rebuild(self):
+        with self._build_lock:
+            self._build()
+
+    def _build(self):
+        import numpy as np
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from .models import Goods
+
+        ids = []
+        documents = []
+        rows = Goods.objects.filter(status='on_sale').values_list('id', 'name', 'description')
+        for goods_id, name, description in rows.iterator(chunk_size=2000):
+            ids.append(goods_id)
+            documents.append(self._document_terms(name, description))
+
+        vectorizer = TfidfVectorizer(analyzer=identity, sublinear_tf=True, dtype=np.float32)
+        matrix = vectorizer.fit_transform(documents).tocsr() if documents else None
+
+        with self._lock:
+            self._vectorizer = vectorizer if documents else None
+            self._matrix = matrix
+            self._ids = ids
+            self._alive = np.ones(len(ids), dtype=bool)
+            self._rows = {goods_id: ('base', row) for row, goods_id in enumerate(ids)}
+            self._extra_vectors = []
+            self._extra_ids = []
+            self._extra_matrix = None
+            self._neighbours.clear()
+            self._ready = True
+
+    def invalidate(self):
+        # 旧索引在后台重建期间继续服务，重建完成后整体替换，请求不再等待全量构建
+        with self._lock:
+            # 尚未构建且没有进行中的构建时，下次查询会读到最新数据
+            if not self._ready and not self._build_lock.locked():
+                return
+            if self._rebuilding:
+                self._stale = True
+                return
+            self._rebuilding = True
+        threading.Thread(target=self._run_rebuild, name='goods-similar-rebuild', daemon=True).start()
+
+    def _run_rebuild(self):
+        try:
+            while True:
+                with self._lock:
+                    self._stale = False
+                self.rebuild()
+                with self._lock:
+                    changed, self._changed = self._changed, set()
+                    if not self._stale:
+                        self._rebuilding = False
+                # 重建读库之后到替换之前的增量变更作用在旧索引上，替换后按 ID 补回
+                self.refresh(changed)
+                if not self._rebuilding:
+                    return
+        except Exception:
+            with self._lock:
+                self._rebuilding = False
+                self._ready = False
+            logger.exception('相似物品索引重建失败')
+        finally:
+            connection.close()
+
+    def _transform(self, name, description):
+        return self._vectorizer.transform([self._document_terms(name, description)])
+
+    def _discard(self, goods_id):
+        location = self._rows.pop(goods_id, None)
+        if location is None:
+            return
+        self._neighbours.clear()
+        kind, row = location
+        if kind == 'base':
+            self._alive[row] = False
+        else:
+            self._extra_ids[row] = None
+
+    def _merge_extras(self):
+        import numpy as np
+        from scipy.sparse import vstack
+
+        alive = [index for index, goods_id in enumerate(self._extra_ids) if goods_id is not None]
+        offset = len(self._ids)
+        self._matrix = vstack([self._matrix] + [self._extra_vectors[index] for index in alive]).tocsr()
+        for position, index in enumerate(alive):
+            goods_id = self._extra_ids[index]
+            self._ids.append(goods_id)
+            self._rows[goods_id] = ('base', offset + position)
+        self._alive = np.concatenate([self._alive, np.ones(len(alive), dtype=bool)])
+        self._extra_vectors = []
+        self._extra_ids = []
+        self._extra_matrix = None
+
+    def update(self, goods):
+        with self._lock:
+            # 尚未构建且没有进行中的构建时，下次查询会读到最新数据
+            if not self._ready and not self._build_lock.locked():
+                return
+            if self._rebuilding:
+                self._changed.add(goods.id)
+            self._discard(goods.id)
+            if goods.status != 'on_sale' or self._vectorizer is None:
+                return
+            self._rows[goods.id] = ('extra', len(self._extra_ids))
+            self._extra_ids.append(goods.id)
+            self._extra_vectors.append(self._transform(goods.name, goods.description))
+            self._extra_matrix = None
+            self._neighbours.clear()
+            if len(self._extra_ids) >= get_merge_threshold():
+                self._merge_extras()
+
+    def remove(self, goods_id):
+        with self._lock:
+            if self._ready:
+                if self._rebuilding:
+                    self._changed.add(goods_id)
+                self._discard(goods_id)
+
+    def refresh(self, goods_ids):
+        from .models import Goods
+
+        if not self._ready or not goods_ids:
+            return
+        found = set()
+        for goods in Goods.objects.filter(id__in=goods_ids).only('id', 'name', 'description', 'status'):
+            found.add(goods.id)
+            self.update(goods)
+        for goods_id in set(goods_ids) - found:
+            self.remove(goods_id)
+
+    def _query_vector(self, goods):
+        location = self._rows.get(goods.id)
+        if location is None:
+            return self._transform(goods.name, goods.description)
+        kind, row = location
+        if kind == 'base':
+            return self._matrix[row]
+        return self._extra_vectors[row]
+
+    def similar(self, goods, limit=10):
+        self._ensure_ready()
+        with self._lock:
+            if self._vectorizer is None:
+                return []
+            cached = self._neighbours.get(goods.id)
+            if cached is not None and cached[0] >= limit:
+                self._neighbours.move_to_end(goods.id)
+                return cached[1][:limit]
+
+            neighbours = self._compute(goods, limit)
+            if goods.id in self._rows:
+                self._neighbours[goods.id] = (limit, neighbours)
+                if len(self._neighbours) > get_cache_size():
+                    self._neighbours.popitem(last=False)
+            return neighbours
+
+    def _compute(self, goods, limit):
+        import numpy as np
+        from scipy.sparse import vstack
+
+        vector = self._query_vector(goods)
+        scores = (self._matrix @ vector.T).toarray().ravel()
+        scores[~self._alive] = 0
+        ids = self._ids
+        if self._extra_ids:
+            if self._extra_matrix is None:
+                self._extra_matrix = vstack(self._extra_vectors).tocsr()
+            extra_scores = (self._extra_matrix @ vector.T).toarray().ravel()
+            extra_scores[[goods_id is None for goods_id in self._extra_ids]] = 0
+            scores = np.concatenate([scores, extra_scores])
+            ids = ids + self._extra_ids
+
+        location = self._rows.get(goods.id)
+        if location is not None:
+            kind, row = location
+            scores[row if kind == 'base' else len(self._ids) + row] = 0
+
+        limit = min(limit, len(scores))
+        if limit <= 0:
+            return []
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(ids[row], float(scores[row])) for row in top if scores[row] > 0]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_similar_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SimilarGoodsIndex()
+    return _index
+
+
+def warmup_similar_index():
+    get_similar_index()._ensure_ready()
@@ -0,0 +1,156 @@
+import hashlib
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+
+from .images import strip_metadata
+from .models import ImageBlob
+
+
+CONTENT_TYPE_EXTENSIONS = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/gif': '.gif',
+    'image/webp': '.webp',
+}
+
+CONTENT_ADDRESSED_PATTERN = re.compile(r'^[\w-]+/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.\w+$')
+
+
+def media_prefix():
+    return f'/{settings.MEDIA_URL.strip("/")}/'
+
+
+def media_url(path):
+    return f'{media_prefix()}{path}'
+
+
+def media_path(url):
+    prefix = media_prefix()
+    if isinstance(url, str) and url.startswith(prefix):
+        return url[len(prefix):]
+    return None
+
+
+def is_content_addressed(path):
+    return bool(CONTENT_ADDRESSED_PATTERN.match(path or ''))
+
+
+def content_path(namespace, digest, ext):
+    return f'{namespace}/{digest[:2]}/{digest[2:4]}/{digest}{ext.lower()}'
+
+
+def file_extension(name, content_type=None):
+    ext = os.path.splitext(name or '')[1].lower()
+    if ext == '.jpeg':
+        ext = '.jpg'
+    return ext or CONTENT_TYPE_EXTENSIONS.get(content_type, '')
+
+
+def hash_file(file):
+    digest = hashlib.sha256()
+    size = 0
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    for chunk in file.chunks():
+        digest.update(chunk)
+        size += len(chunk)
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    return digest.hexdigest(), size
+
+
+def write_content(file, path):
+    if default_storage.exists(path):
+        return False
+    saved = default_storage.save(path, file)
+    if saved != path:
+        default_storage.delete(saved)
+        return False
+    return True
+
+
+def record_blob(namespace, digest, path, size):
+    try:
+        with transaction.atomic():
+            ImageBlob.objects.update_or_create(
+                namespace=namespace, sha256=digest,
+                defaults={'path': path, 'size': size}
+            )
+    except IntegrityError:
+        pass
+
+
+def store_file(file, namespace, ext):
+    digest, size = hash_file(file)
+    blob = ImageBlob.objects.filter(namespace=namespace, sha256=digest).first()
+    if blob is not None and default_storage.exists(blob.path):
+        return blob.path, False
+
+    path = content_path(namespace, digest, ext)
+    created = write_content(file, path)
+    record_blob(namespace, digest, path, size)
+    return path, created
+
+
+def store_upload(file, namespace):
+    file = strip_metadata(file)
+    return store_file(file, namespace, file_extension(file.name, file.content_type))
+
+
+def store_existing(path, namespace):
+    with default_storage.open(path, 'rb') as source:
+        return store_file(source, namespace, file_extension(path))
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_upload_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'GOODS_UPLOAD_WORKERS', 4),
+                    thread_name_prefix='goods-upload'
+                )
+    return _executor
+
+
+def store_uploads(files, namespace):
+    if len(files) <= 1:
+        return [store_upload(file, namespace) for file in files]
+
+    executor = get_upload_executor()
+    files = list(executor.map(strip_metadata, files))
+    hashes = list(executor.map(hash_file, files))
+    blobs = {
+        blob.sha256: blob.path
+        for blob in ImageBlob.objects.filter(
+            namespace=namespace, sha256__in={digest for digest, _ in hashes}
+        )
+    }
+
+    results = [None] * len(files)
+    pending = {}
+    for index, (file, (digest, size)) in enumerate(zip(files, hashes)):
+        path = blobs.get(digest)
+        if path is not None and default_storage.exists(path):
+            results[index] = (path, False)
+        elif digest in pending:
+            results[index] = (pending[digest][0], False)
+        else:
+            path = content_path(namespace, digest, file_extension(file.name, file.content_type))
+            pending[digest] = (path, size, index, executor.submit(write_content, file, path))
+
+    for digest, (path, size, index, future) in pending.items():
+        results[index] = (path, future.result())
+        record_blob(namespace, digest, path, size)
+    return results
@@ -1,3 +1,1359 @@
-from django.test import TestCase
+import base64
+import io
+import json
+import math
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import jieba
+from django.apps import apps
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection, transaction
+from django.conf import settings
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from PIL import Image
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from config.renderers import ORJSONRenderer
+from config.warmup import warmup_jieba
+from users.models import User
+from . import cache as response_cache
+from . import view_counter
+from .facets import compute_facets, get_price_bounds, price_bucket_ranges
+from .hot import HotRanking
+from .images import derivative_path, generate_derivatives, original_path
+from .importer import import_goods, text_stream
+from .keywords import extract_keywords, goods_keywords, goods_text
+from .locations import (
+    GENERATION_KEY as LOCATION_GENERATION_KEY, LocationMatcher, get_location_matcher, match_location, reset_location_matcher
+)
+from .models import Category, ChangeEvent, Goods, GoodsHotScore, ImageBlob, PickupLocation
+from .outbox import iter_changes, read_changes
+from .pagination import GOODS_ORDERINGS
+from .pricing import PriceModelHolder, dump_price_model, load_training_samples
+from .search import (
+    IContainsSearchBackend, JiebaIndexSearchBackend, SQLiteFTS5SearchBackend, get_search_backend, warmup_search_index
+)
+from .serializers import CategorySerializer, GoodsDetailSerializer, GoodsListProjection, GoodsListSerializer
+from .shelf import bulk_shelf
+from .similar import SimilarGoodsIndex
+from .storage import is_content_addressed, media_path, media_url
+from .view_counter import CacheViewCounter, MemoryViewCounter, persist_view_counts
+
+
+def image_bytes(color, size=(64, 48), fmt='JPEG', mode='RGB', **params):
+    buffer = io.BytesIO()
+    Image.new(mode, size, color).save(buffer, fmt, **params)
+    return buffer.getvalue()
+
+
+def exif_bytes(orientation=6):
+    exif = Image.Exif()
+    exif[0x0112] = orientation
+    exif[0x010E] = '宿舍'
+    exif[0x8825] = {1: 'N', 2: (30.0, 15.0, 0.0)}
+    return exif.tobytes()
+
+
+class TemporaryMediaMixin:
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp(prefix='goods-tests-')
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def media_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, name), self.media_root)
+            for root, _, names in os.walk(self.media_root) for name in names
+        )
+
+
+@override_settings(GOODS_SEARCH_MAX_RESULTS=5)
+class SearchFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seller = User.objects.create_user(username='seller', password='pass')
+        cls.books = Category.objects.create(name='图书')
+        cls.digital = Category.objects.create(name='数码')
+        for _ in range(10):
+            Goods.objects.create(
+                seller=seller, name='降噪耳机 降噪耳机', description='降噪耳机 原装降噪耳机',
+                category=cls.digital, price=Decimal('300'), status='sold'
+            )
+        Goods.objects.create(seller=seller, name='降噪耳机', category=cls.books, price=Decimal('50'))
+        cls.expected = [
+            Goods.objects.create(
+                seller=seller, name=f'降噪耳机 第{index}副', category=cls.digital, price=Decimal('100')
+            ).id
+            for index in range(3)
+        ]
+
+    def filtered(self):
+        return Goods.objects.filter(status='on_sale', category=self.digital, price__lte=200)
+
+    def test_icontains_baseline(self):
+        ids = list(IContainsSearchBackend().search(self.filtered(), '降噪耳机').values_list('id', flat=True))
+        self.assertEqual(sorted(ids), sorted(self.expected))
+
+    def test_jieba_index_filters_before_truncating(self):
+        backend = JiebaIndexSearchBackend()
+        backend.rebuild()
+        ids = list(backend.search(self.filtered(), '降噪耳机').values_list('id', flat=True))
+        self.assertEqual(sorted(ids), sorted(self.expected))
+
+    def test_jieba_index_is_not_built_on_request_path(self):
+        backend = JiebaIndexSearchBackend()
+        with mock.patch.object(backend, 'rebuild') as rebuild:
+            ids = list(backend.search(self.filtered(), '降噪耳机').values_list('id', flat=True))
+        rebuild.assert_not_called()
+        self.assertFalse(backend.ready)
+        self.assertEqual(sorted(ids), sorted(self.expected))
+
+        with mock.patch('goods.search.get_search_backend', return_value=backend):
+            warmup_search_index()
+        self.assertTrue(backend.ready)
+        self.assertIn('goods.search.warmup_search_index', settings.ASGI_STARTUP_HOOKS)
+
+    def test_jieba_rebuild_replays_concurrent_changes(self):
+        gone, kept = self.expected[0], self.expected[1]
+        late = Goods.objects.create(
+            seller=User.objects.get(username='seller'), name='降噪耳机 新到', category=self.digital, price=Decimal('80')
+        )
+        backend = JiebaIndexSearchBackend()
+        scanned = []
+
+        class Interleaved(JiebaIndexSearchBackend):
+            def _add(self, goods_id, name, description):
+                super()._add(goods_id, name, description)
+                # 扫描全表的过程中发生的增量变更
+                if self is not backend and not scanned:
+                    scanned.append(goods_id)
+                    backend.index(late)
+                    backend.remove(gone)
+
+        backend.__class__ = Interleaved
+        backend.rebuild()
+        ids = backend.rank('降噪耳机', limit=50)
+        self.assertIn(late.id, ids)
+        self.assertIn(kept, ids)
+        self.assertNotIn(gone, ids)
+        self.assertIsNone(backend._journal)
+
+    @skipUnless(connection.vendor == 'sqlite', 'FTS5 只在 SQLite 上可用')
+    def test_fts5_filters_before_truncating(self):
+        backend = SQLiteFTS5SearchBackend()
+        backend.rebuild()
+        ids = list(backend.search(self.filtered(), '降噪耳机').values_list('id', flat=True))
+        self.assertEqual(sorted(ids), sorted(self.expected))
+
+    def test_empty_filter(self):
+        backend = SQLiteFTS5SearchBackend() if connection.vendor == 'sqlite' else JiebaIndexSearchBackend()
+        self.assertEqual(list(backend.search(Goods.objects.none(), '降噪耳机')), [])
+
+
+class GoodsListProjectionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seller = User.objects.create_user(username='seller', password='pass', avatar='avatars/seller.png')
+        plain = User.objects.create_user(username='plain', password='pass')
+        books = Category.objects.create(name='图书')
+        Goods.objects.create(seller=seller, name='考研教材', description='九成新', category=books, price=Decimal('30.50'))
+        Goods.objects.create(seller=seller, name='台灯', description='宿舍自提', price=Decimal('20'))
+        Goods.objects.create(
+            seller=plain, name='耳机', description='', category=books, price=Decimal('199.99'),
+            images=['/media/goods/a.jpg', 'https://example.com/b.png'], condition='fair'
+        )
+        Goods.objects.create(
+            seller=plain, name='书桌', description='已出', price=Decimal('50'), images=[],
+            status='sold', is_traded=True
+        )
+
+    def test_output_matches_model_serializer(self):
+        renderer = JSONRenderer()
+        queryset = Goods.objects.select_related('seller', 'category').order_by('id')
+        for context in [{}, {'request': RequestFactory().get('/api/goods/')}]:
+            expected = renderer.render(GoodsListSerializer(queryset, many=True, context=context).data)
+            actual = renderer.render(GoodsListProjection(GoodsListProjection.project(queryset), context=context).data)
+            self.assertEqual(actual, expected)
+
+
+class LocationMatcherTests(TestCase):
+    def test_longest_alias_wins(self):
+        matcher = LocationMatcher([
+            PickupLocation(id=1, campus='东校区', building='宿舍', aliases=['东区']),
+            PickupLocation(id=2, campus='东校区', building='图书馆', aliases=['东区图书馆北门']),
+            PickupLocation(id=3, campus='西校区', building='食堂'),
+        ])
+        self.assertEqual(matcher.match('东区 宿舍楼下'), 1)
+        self.assertEqual(matcher.match('东区，东区图书馆北门自提'), 2)
+        self.assertEqual(matcher.match('食堂门口或东区图书馆北门'), 2)
+        self.assertEqual(matcher.match('西校区食堂'), 3)
+        self.assertIsNone(matcher.match('南门快递点'))
+
+    @override_settings(GOODS_RESPONSE_CACHE='default', GOODS_LOCATION_CHECK_INTERVAL=0)
+    def test_shared_matcher_follows_other_process(self):
+        caches['default'].clear()
+        self.addCleanup(reset_location_matcher)
+        PickupLocation.objects.create(campus='东校区', building='宿舍', aliases=['东区'])
+        reset_location_matcher()
+        self.assertIsNotNone(match_location('东区楼下'))
+        self.assertIsNone(match_location('西区食堂'))
+
+        # 模拟其他进程修改地点字典：本进程的匹配器没有被重置，只有共享缓存中的代数变化
+        canteen = PickupLocation.objects.create(campus='西校区', building='食堂', aliases=['西区食堂'])
+        self.assertIsNone(match_location('西区食堂'))
+        response_cache.bump_generation(LOCATION_GENERATION_KEY)
+        self.assertEqual(match_location('西区食堂'), canteen.id)
+
+    @override_settings(GOODS_RESPONSE_CACHE='default', GOODS_LOCATION_CHECK_INTERVAL=60)
+    def test_matcher_checks_generation_at_interval(self):
+        caches['default'].clear()
+        self.addCleanup(reset_location_matcher)
+        reset_location_matcher()
+        matcher = get_location_matcher()
+        response_cache.bump_generation(LOCATION_GENERATION_KEY)
+        with mock.patch('goods.locations.get_generation') as generation:
+            self.assertIs(get_location_matcher(), matcher)
+        generation.assert_not_called()
+
+        with mock.patch('goods.locations.time.monotonic', return_value=time.monotonic() + 61):
+            self.assertIsNot(get_location_matcher(), matcher)
+
+
+class BulkShelfTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username='owner', password='pass')
+        cls.other = User.objects.create_user(username='other', password='pass')
+        cls.admin = User.objects.create_user(username='admin', password='pass', is_admin=True)
+        cls.mine = Goods.objects.create(seller=cls.owner, name='台灯', price=Decimal('20'), status='off_sale')
+        cls.traded = Goods.objects.create(
+            seller=cls.owner, name='书桌', price=Decimal('50'), status='off_sale', is_traded=True
+        )
+        cls.theirs = Goods.objects.create(seller=cls.other, name='椅子', price=Decimal('30'), status='off_sale')
+        cls.listed = Goods.objects.create(seller=cls.other, name='风扇', price=Decimal('40'))
+
+    def post(self, user, path, data):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.post(f'/api/goods/goods/{path}/', data, format='json')
+
+    def test_owner_rules_and_skips(self):
+        response = self.post(self.owner, 'bulk_on_shelf', {'ids': [self.mine.id, self.traded.id, self.theirs.id, 999999]})
+        data = response.data['data']
+        self.assertEqual(data['applied'], [self.mine.id])
+        self.assertEqual(
+            {item['id']: item['reason'] for item in data['skipped']},
+            {self.traded.id: '该物品已交易，无法上架', self.theirs.id: '无权操作', 999999: '物品不存在'}
+        )
+        self.assertEqual(Goods.objects.get(id=self.theirs.id).status, 'off_sale')
+
+    def test_admin_cannot_act_on_other_sellers_by_id(self):
+        for path in ['bulk_on_shelf', 'bulk_off_shelf', 'bulk_delete']:
+            response = self.post(self.admin, path, {'ids': [self.theirs.id, self.listed.id]})
+            self.assertEqual(response.data['data']['applied'], [])
+        self.assertEqual(Goods.objects.filter(seller=self.other).count(), 2)
+
+    def test_admin_seller_takedown(self):
+        response = self.post(self.admin, 'bulk_off_shelf', {'seller': self.other.id})
+        self.assertEqual(response.data['data']['applied'], sorted([self.theirs.id, self.listed.id]))
+        self.assertFalse(Goods.objects.filter(seller=self.other, status='on_sale').exists())
+
+    def test_seller_path_is_takedown_only(self):
+        for path in ['bulk_on_shelf', 'bulk_delete']:
+            self.assertEqual(self.post(self.admin, path, {'seller': self.other.id}).status_code, 400)
+        self.assertEqual(self.post(self.owner, 'bulk_off_shelf', {'seller': self.other.id}).status_code, 403)
+        self.assertEqual(Goods.objects.filter(seller=self.other).count(), 2)
+
+
+class OutboxTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user(username='seller', password='pass')
+
+    def test_late_commit_is_not_skipped(self):
+        ChangeEvent.objects.create(id=1000, topic='goods', object_id=1, action='created')
+        ChangeEvent.objects.create(id=1001, topic='goods', object_id=2, action='created')
+        cursor = read_changes(0)[-1]['seq']
+
+        # 先分配到较小 ID 的事务晚于游标前进才提交
+        ChangeEvent.objects.create(id=900, topic='goods', object_id=3, action='created')
+        events = read_changes(cursor)
+        self.assertEqual([event['id'] for event in events], [900])
+        self.assertGreater(events[0]['seq'], cursor)
+
+    def test_iter_changes_acks_by_sequence(self):
+        for object_id in range(5):
+            ChangeEvent.objects.create(topic='order', object_id=object_id, action='status')
+        seen = [event['object_id'] for batch in iter_changes('search', topics=['order'], batch_size=2) for event in batch]
+        self.assertEqual(seen, list(range(5)))
+        self.assertEqual(list(iter_changes('search', topics=['order'])), [])
+
+    def test_rollback_drops_outbox_row(self):
+        goods = Goods.objects.create(seller=self.seller, name='台灯', price=Decimal('20'))
+        ChangeEvent.objects.all().delete()
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                goods.name = '护眼台灯'
+                goods.save(update_fields=['name'])
+                raise RuntimeError
+        self.assertFalse(ChangeEvent.objects.exists())
+
+    def test_failed_outbox_write_rolls_back_save(self):
+        goods = Goods.objects.create(seller=self.seller, name='台灯', price=Decimal('20'))
+        for update_fields in [['name'], None]:
+            goods.name = '护眼台灯'
+            with mock.patch('goods.signals.record_change', side_effect=DatabaseError):
+                with self.assertRaises(DatabaseError):
+                    goods.save(update_fields=update_fields)
+            self.assertEqual(Goods.objects.get(id=goods.id).name, '台灯')
+
+    def test_object_id_holds_big_ids(self):
+        event = ChangeEvent.objects.create(topic='goods', object_id=2 ** 40, action='created')
+        self.assertEqual(ChangeEvent.objects.get(id=event.id).object_id, 2 ** 40)
+
+    def test_import_records_row_events_without_returned_pks(self):
+        ChangeEvent.objects.all().delete()
+        rows = '\n'.join(json.dumps({'name': f'台灯{index}', 'description': '九成新', 'price': '20'}) for index in range(3))
+        with mock.patch.object(
+            type(connection.features), 'can_return_rows_from_bulk_insert', new_callable=mock.PropertyMock, return_value=False
+        ):
+            result = import_goods(io.StringIO(rows), self.seller, fmt='jsonl')
+        self.assertEqual(result['created'], 3)
+        events = ChangeEvent.objects.filter(topic='goods')
+        self.assertFalse(events.filter(action='bulk_created').exists())
+        self.assertEqual(
+            sorted(events.values_list('object_id', flat=True)),
+            sorted(Goods.objects.filter(seller=self.seller).values_list('id', flat=True))
+        )
+
+
+class SimilarIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seller = User.objects.create_user(username='seller', password='pass')
+        cls.first = Goods.objects.create(seller=seller, name='华为降噪耳机', description='九成新', price=Decimal('300'))
+        cls.second = Goods.objects.create(seller=seller, name='小米降噪耳机', description='九成新', price=Decimal('200'))
+
+    def test_concurrent_first_requests_build_once(self):
+        index = SimilarGoodsIndex()
+        builds = []
+
+        def build():
+            builds.append(threading.current_thread().name)
+            time.sleep(0.05)
+            index._ready = True
+
+        with mock.patch.object(index, '_build', side_effect=build):
+            threads = [threading.Thread(target=index._ensure_ready) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(builds), 1)
+
+    def test_invalidate_rebuilds_in_background(self):
+        index = SimilarGoodsIndex()
+        index.rebuild()
+        started = threading.Event()
+        release = threading.Event()
+        builds = []
+
+        def build():
+            builds.append(1)
+            started.set()
+            release.wait(5)
+
+        with mock.patch.object(index, '_build', side_effect=build):
+            index.invalidate()
+            self.assertTrue(started.wait(5))
+            index.invalidate()
+            index.invalidate()
+            # 重建期间旧索引继续服务，请求不等待
+            self.assertEqual([goods_id for goods_id, _ in index.similar(self.first)], [self.second.id])
+            release.set()
+            deadline = time.monotonic() + 5
+            while index._rebuilding and time.monotonic() < deadline:
+                time.sleep(0.01)
+        self.assertFalse(index._rebuilding)
+        self.assertEqual(len(builds), 2)
+
+
+@override_settings(GOODS_VIEW_COUNTER_FLUSH_INTERVAL=0)
+@override_settings(GOODS_HOT_FLUSH_INTERVAL=0, GOODS_HOT_HALF_LIFE_HOURS=24, GOODS_HOT_MIN_SCORE=0.05)
+class HotRankingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user(username='seller', password='pass')
+
+    def setUp(self):
+        self.now = 1_700_000_000.0
+        clock = mock.patch('goods.hot.time')
+        clock.start().time.side_effect = lambda: self.now
+        self.addCleanup(clock.stop)
+
+    def advance(self, hours):
+        self.now += hours * 3600
+
+    def record(self, ranking, goods_id, kind, times=1):
+        for _ in range(times):
+            ranking.incr(goods_id, kind)
+
+    def test_old_score_decays_below_recent(self):
+        ranking = HotRanking()
+        self.record(ranking, 1, 'order', 3)
+        self.assertEqual(ranking.top(1), [(1, mock.ANY)])
+        self.assertAlmostEqual(ranking.top(1)[0][1], 30)
+
+        self.advance(5 * 24)
+        self.record(ranking, 2, 'view', 2)
+        ranked = ranking.top(2)
+        self.assertEqual([goods_id for goods_id, _ in ranked], [2, 1])
+        self.assertAlmostEqual(ranked[0][1], 2)
+        self.assertAlmostEqual(ranked[1][1], 30 / 32)
+
+    @override_settings(GOODS_HOT_SIZE=3)
+    def test_top_list_keeps_highest_scores(self):
+        ranking = HotRanking()
+        for goods_id, times in [(1, 1), (2, 4), (3, 2), (4, 5), (5, 3)]:
+            self.record(ranking, goods_id, 'view', times)
+        self.assertEqual([goods_id for goods_id, _ in ranking.top(10)], [4, 2, 5])
+        self.assertEqual(ranking.top(0), [])
+
+        # 被挤出的物品继续累积热度后重新进入榜单，分数不丢失
+        self.record(ranking, 3, 'chat')
+        self.assertEqual([goods_id for goods_id, _ in ranking.top(10)], [3, 4, 2])
+        self.assertAlmostEqual(ranking.top(1)[0][1], 7)
+
+        ranking.remove(3)
+        self.assertEqual([goods_id for goods_id, _ in ranking.top(10)], [4, 2])
+
+    def test_flush_persists_and_reloads(self):
+        ranking = HotRanking()
+        self.record(ranking, 1, 'order')
+        self.record(ranking, 2, 'view', 3)
+        self.assertEqual(ranking.flush(), 2)
+        self.assertEqual(ranking.flush(), 0)
+        self.assertEqual(GoodsHotScore.objects.count(), 2)
+
+        self.advance(24)
+        self.record(ranking, 1, 'chat')
+        ranking.flush()
+        reloaded = HotRanking()
+        self.assertEqual(reloaded.top(10), ranking.top(10))
+        self.assertAlmostEqual(dict(reloaded.top(10))[1], 10)
+        self.assertAlmostEqual(dict(reloaded.top(10))[2], 1.5)
+
+        # 衰减到阈值以下的记录在写回时被清理
+        self.advance(24 * 6)
+        ranking.flush()
+        self.assertEqual(list(GoodsHotScore.objects.values_list('goods_id', flat=True)), [1])
+        self.assertEqual([goods_id for goods_id, _ in HotRanking().top(10)], [1])
+
+    def test_failed_flush_keeps_pending(self):
+        ranking = HotRanking()
+        self.record(ranking, 1, 'view')
+        with mock.patch.object(ranking, 'persist', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                ranking.flush()
+        self.assertEqual(ranking.flush(), 1)
+        self.assertAlmostEqual(math.exp(GoodsHotScore.objects.get(goods_id=1).rank_key - ranking.rate * self.now), 1)
+
+    def test_hot_goods_returns_on_sale_only(self):
+        listed = Goods.objects.create(seller=self.seller, name='台灯', price=Decimal('20'))
+        popular = Goods.objects.create(seller=self.seller, name='书架', price=Decimal('30'))
+        hidden = Goods.objects.create(seller=self.seller, name='风扇', price=Decimal('40'), status='off_sale')
+        ranking = HotRanking()
+        self.record(ranking, listed.id, 'view')
+        self.record(ranking, popular.id, 'chat')
+        self.record(ranking, hidden.id, 'order')
+        self.record(ranking, hidden.id + 100, 'order', 2)
+
+        with mock.patch('goods.views.get_hot_ranking', return_value=ranking):
+            response = APIClient().get('/api/goods/hot/', {'limit': 5})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        self.assertEqual([item['id'] for item in data], [popular.id, listed.id])
+        self.assertEqual([item['hot_score'] for item in data], [5.0, 1.0])
+
+
+class ViewCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seller = User.objects.create_user(username='seller', password='pass')
+        cls.first = Goods.objects.create(seller=seller, name='台灯', price=Decimal('20'), view_count=5)
+        cls.second = Goods.objects.create(seller=seller, name='书桌', price=Decimal('50'))
+
+    def view_counts(self):
+        return dict(Goods.objects.filter(id__in=[self.first.id, self.second.id]).values_list('id', 'view_count'))
+
+    def test_persist_view_counts(self):
+        updated = persist_view_counts({self.first.id: 3, self.second.id: 2, 999999: 4, 0: 0})
+        self.assertEqual(updated, 2)
+        self.assertEqual(self.view_counts(), {self.first.id: 8, self.second.id: 2})
+
+    def test_retrieve_includes_pending_views(self):
+        counter = MemoryViewCounter()
+        with mock.patch.object(view_counter, '_counter', counter), mock.patch('goods.views.get_hot_ranking'):
+            client = APIClient()
+            client.get(f'/api/goods/goods/{self.first.id}/')
+            response = client.get(f'/api/goods/goods/{self.first.id}/')
+        self.assertEqual(response.data['data']['view_count'], 7)
+        self.assertEqual(self.view_counts()[self.first.id], 5)
+        self.assertEqual(counter.flush(), 1)
+        self.assertEqual(self.view_counts()[self.first.id], 7)
+        self.assertEqual(counter.pending(self.first.id), 0)
+
+    def test_sweep_writes_counts_buffered_by_other_counters(self):
+        caches['default'].clear()
+        # 另一个计数器实例模拟其他进程，本实例的脏集合里没有这些物品
+        other = CacheViewCounter()
+        other.incr(self.first.id, 2)
+        other.incr(self.second.id)
+        counter = CacheViewCounter()
+        self.assertEqual(counter.flush(), 0)
+        self.assertEqual(counter.sweep(), 2)
+        self.assertEqual(self.view_counts(), {self.first.id: 7, self.second.id: 1})
+        self.assertEqual(counter.pending(self.first.id), 0)
+        self.assertEqual(counter.sweep(), 0)
+
+    def test_command_rejects_process_local_backend(self):
+        with mock.patch.object(view_counter, '_counter', MemoryViewCounter()):
+            with self.assertRaises(CommandError):
+                call_command('flush_view_counts', stdout=io.StringIO())
+
+
+class BatchUploadTests(TemporaryMediaMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user(username='seller', password='pass')
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.seller)
+
+    def upload(self, contents):
+        files = [
+            SimpleUploadedFile(f'{index}.jpg', content, content_type='image/jpeg')
+            for index, content in enumerate(contents)
+        ]
+        return self.client.post('/api/goods/upload/batch/', {'files': files}, format='multipart')
+
+    def test_batch_dedups_by_content(self):
+        red, blue, green = image_bytes('red'), image_bytes('blue'), image_bytes('green')
+        with mock.patch('goods.views.schedule_derivatives') as schedule:
+            first = self.upload([red, blue, red])
+            urls = [item['url'] for item in first.data['data']]
+            self.assertEqual(first.status_code, 200)
+            self.assertEqual(urls[0], urls[2])
+            self.assertNotEqual(urls[0], urls[1])
+            self.assertEqual(schedule.call_count, 2)
+
+            second = self.upload([green, red])
+            self.assertEqual(second.data['data'][1]['url'], urls[0])
+            self.assertEqual(schedule.call_count, 3)
+        self.assertEqual(ImageBlob.objects.filter(namespace='goods').count(), 3)
+        self.assertEqual(len(self.media_files()), 3)
+        self.assertTrue(first.data['data'][0]['derivatives']['thumb'].endswith('.thumb.webp'))
+
+    def test_rejects_invalid_batches(self):
+        response = self.upload([image_bytes('red')] * 6)
+        self.assertEqual(response.status_code, 400)
+
+        files = [
+            SimpleUploadedFile('a.jpg', image_bytes('red'), content_type='image/jpeg'),
+            SimpleUploadedFile('b.txt', b'hello', content_type='text/plain'),
+        ]
+        response = self.client.post('/api/goods/upload/batch/', {'files': files}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1])
+        self.assertFalse(ImageBlob.objects.exists())
+        self.assertEqual(self.media_files(), [])
+
+
+class ImageStorageTests(TemporaryMediaMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user(username='seller', password='pass')
+        cls.buyer = User.objects.create_user(username='buyer', password='pass')
+
+    def post_file(self, user, url, content, name='photo.jpg'):
+        client = APIClient()
+        client.force_authenticate(user)
+        upload = SimpleUploadedFile(name, content, content_type='image/jpeg')
+        return client.post(url, {'file': upload}, format='multipart')
+
+    def save_legacy(self, path, content):
+        self.assertEqual(default_storage.save(path, ContentFile(content)), path)
+        return path
+
+    def test_same_upload_is_stored_once(self):
+        red = image_bytes('red')
+        with mock.patch('goods.views.schedule_derivatives') as schedule:
+            first = self.post_file(self.seller, '/api/goods/upload/', red, 'a.jpg')
+            second = self.post_file(self.buyer, '/api/goods/upload/', red, 'b.jpg')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.data['data']['url'], second.data['data']['url'])
+        self.assertEqual(schedule.call_count, 1)
+        self.assertEqual(ImageBlob.objects.filter(namespace='goods').count(), 1)
+        self.assertEqual(len(self.media_files()), 1)
+        self.assertTrue(is_content_addressed(self.media_files()[0]))
+
+    def test_same_avatar_is_stored_once(self):
+        red = image_bytes('red')
+        urls = [
+            self.post_file(user, '/api/auth/users/upload_avatar/', red).data['data']['url']
+            for user in [self.seller, self.buyer]
+        ]
+        self.assertEqual(urls[0], urls[1])
+        self.assertEqual(
+            set(User.objects.filter(id__in=[self.seller.id, self.buyer.id]).values_list('avatar', flat=True)),
+            {media_path(urls[0])}
+        )
+        self.assertEqual(ImageBlob.objects.filter(namespace='avatars').count(), 1)
+        self.assertEqual(len(self.media_files()), 1)
+
+    def test_migrate_image_storage_rewrites_references(self):
+        red, blue = image_bytes('red'), image_bytes('blue', fmt='PNG')
+        old_a = self.save_legacy('goods/legacy-a.jpg', red)
+        old_b = self.save_legacy('goods/legacy-b.jpg', red)
+        old_c = self.save_legacy('goods/legacy-c.png', blue)
+        old_avatar = self.save_legacy('avatars/legacy.jpg', red)
+        external = 'https://cdn.example.com/photo.jpg'
+        missing = media_url('goods/missing.jpg')
+        first = Goods.objects.create(
+            seller=self.seller, name='台灯', price=Decimal('20'), images=[media_url(old_a), external, missing]
+        )
+        second = Goods.objects.create(
+            seller=self.seller, name='书架', price=Decimal('30'), images=[media_url(old_b), media_url(old_c)]
+        )
+        User.objects.filter(id=self.buyer.id).update(avatar=old_avatar)
+
+        stderr = io.StringIO()
+        call_command('migrate_image_storage', '--delete-old', stdout=io.StringIO(), stderr=stderr)
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.images[1:], [external, missing])
+        self.assertEqual(first.images[0], second.images[0])
+        self.assertNotEqual(second.images[0], second.images[1])
+        for url in [first.images[0], second.images[1]]:
+            path = media_path(url)
+            self.assertTrue(path.startswith('goods/') and is_content_addressed(path), url)
+            self.assertTrue(default_storage.exists(path))
+            self.assertTrue(default_storage.exists(derivative_path(path, 'thumb')))
+        self.assertIn('goods/missing.jpg', stderr.getvalue())
+
+        avatar = User.objects.get(id=self.buyer.id).avatar.name
+        self.assertTrue(avatar.startswith('avatars/') and is_content_addressed(avatar), avatar)
+        self.assertTrue(default_storage.exists(avatar))
+        for path in [old_a, old_b, old_c, old_avatar]:
+            self.assertFalse(default_storage.exists(path), path)
+        self.assertEqual(ImageBlob.objects.count(), 3)
+
+        images = [first.images, second.images]
+        call_command('migrate_image_storage', stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertEqual([Goods.objects.get(id=goods.id).images for goods in [first, second]], images)
+
+    def test_migrate_image_storage_dry_run(self):
+        old = self.save_legacy('goods/legacy.jpg', image_bytes('red'))
+        goods = Goods.objects.create(seller=self.seller, name='台灯', price=Decimal('20'), images=[media_url(old)])
+        call_command('migrate_image_storage', '--dry-run', '--delete-old', stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertEqual(Goods.objects.get(id=goods.id).images, [media_url(old)])
+        self.assertEqual(self.media_files(), [old])
+        self.assertFalse(ImageBlob.objects.exists())
+
+
+@override_settings(GOODS_RESPONSE_CACHE='default', GOODS_RESPONSE_CACHE_TTL=60)
+class ResponseCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user(username='seller', password='pass')
+        cls.goods = Goods.objects.create(seller=cls.seller, name='台灯', price=Decimal('20'))
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def names(self, client):
+        return client.get('/api/goods/goods/').content.decode()
+
+    def test_goods_save_invalidates_list(self):
+        client = APIClient()
+        self.assertIn('台灯', self.names(client))
+        self.assertIn('台灯', self.names(client))
+        self.assertEqual(response_cache.get_stats(['goods_list'])['goods_list']['hit'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.goods.name = '护眼台灯'
+            self.goods.save()
+        self.assertIn('护眼台灯', self.names(client))
+
+    def test_authenticated_requests_bypass_cache(self):
+        anonymous = APIClient()
+        self.names(anonymous)
+        # 不经过信号的写入不会让缓存失效，匿名请求仍命中旧响应
+        Goods.objects.filter(id=self.goods.id).update(name='书桌')
+        self.assertNotIn('书桌', self.names(anonymous))
+
+        client = APIClient()
+        client.force_authenticate(self.seller)
+        self.assertIn('书桌', self.names(client))
+        stats = response_cache.get_stats(['goods_list'])['goods_list']
+        self.assertEqual((stats['hit'], stats['miss']), (1, 1))
+
+    def test_generation_does_not_restart_after_eviction(self):
+        generation = response_cache.bump_generation()
+        caches['default'].delete(response_cache.GENERATION_KEY)
+        self.assertGreater(response_cache.get_generation(), generation)
+
+
+class ImageProcessingTests(TemporaryMediaMixin, TestCase):
+    def save(self, path, content):
+        return default_storage.save(path, ContentFile(content))
+
+    def test_upload_strips_metadata_and_keeps_orientation(self):
+        user = User.objects.create_user(username='seller', password='pass')
+        client = APIClient()
+        client.force_authenticate(user)
+        file = SimpleUploadedFile('photo.jpg', image_bytes('red', exif=exif_bytes()), content_type='image/jpeg')
+        with mock.patch('goods.views.schedule_derivatives'):
+            response = client.post('/api/goods/upload/', {'file': file}, format='multipart')
+        path = response.data['data']['url'][len('/media/'):]
+        with default_storage.open(path, 'rb') as stored:
+            image = Image.open(stored)
+            self.assertEqual(image.size, (48, 64))
+            self.assertFalse(image.getexif())
+            self.assertNotIn('exif', image.info)
+
+    def test_upload_without_metadata_is_stored_unchanged(self):
+        content = image_bytes('blue', fmt='PNG')
+        user = User.objects.create_user(username='seller', password='pass')
+        client = APIClient()
+        client.force_authenticate(user)
+        file = SimpleUploadedFile('plain.png', content, content_type='image/png')
+        with mock.patch('goods.views.schedule_derivatives'):
+            response = client.post('/api/goods/upload/', {'file': file}, format='multipart')
+        with default_storage.open(response.data['data']['url'][len('/media/'):], 'rb') as stored:
+            self.assertEqual(stored.read(), content)
+
+    def test_generate_derivatives(self):
+        path = self.save('goods/photo.jpg', image_bytes('red', size=(2000, 1000), exif=exif_bytes()))
+        targets = generate_derivatives(path)
+        self.assertEqual(set(targets), {'thumb', 'medium', 'full'})
+        for size_name, limit in [('thumb', 240), ('medium', 720), ('full', 1600)]:
+            with default_storage.open(targets[size_name], 'rb') as derivative:
+                image = Image.open(derivative)
+                self.assertEqual(image.format, 'WEBP')
+                self.assertEqual(image.size, (limit // 2, limit))
+                self.assertFalse(image.getexif())
+
+    def test_transparent_palette_images_keep_alpha(self):
+        image = Image.new('P', (40, 40), 0)
+        image.putpalette([0, 0, 0, 255, 0, 0] + [0] * 762)
+        image.paste(1, (20, 0, 40, 40))
+        buffer = io.BytesIO()
+        image.save(buffer, 'PNG', transparency=0)
+        path = self.save('goods/logo.png', buffer.getvalue())
+
+        with default_storage.open(generate_derivatives(path)['thumb'], 'rb') as derivative:
+            thumb = Image.open(derivative).convert('RGBA')
+            self.assertEqual(thumb.getpixel((5, 20))[3], 0)
+            self.assertEqual(thumb.getpixel((35, 20))[3], 255)
+            self.assertGreater(thumb.getpixel((35, 20))[0], 240)
+
+        with override_settings(GOODS_IMAGE_FORMAT='JPEG'):
+            with default_storage.open(generate_derivatives(path, force=True)['thumb'], 'rb') as derivative:
+                thumb = Image.open(derivative)
+                self.assertGreater(min(thumb.getpixel((5, 20))), 240)
+
+    def test_original_path_fallback(self):
+        self.save('goods/ab/cd/photo.png', image_bytes('red', fmt='PNG'))
+        self.save('goods/ab/cd/photo.thumb.webp', b'derivative')
+        self.assertEqual(original_path('goods/ab/cd/photo.medium.webp'), 'goods/ab/cd/photo.png')
+        self.assertIsNone(original_path('goods/ab/cd/photo.png'))
+        self.assertIsNone(original_path('goods/ab/cd/other.thumb.webp'))
+        self.assertIsNone(original_path('goods/missing/photo.thumb.webp'))
+
+
+class PriceSuggestionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        from orders.models import Order
+
+        cls.seller = User.objects.create_user(username='seller', password='pass')
+        buyer = User.objects.create_user(username='buyer', password='pass')
+        cls.books = Category.objects.create(name='图书')
+        cls.digital = Category.objects.create(name='数码')
+        for index in range(30):
+            Goods.objects.create(
+                seller=cls.seller, name=f'降噪耳机 {index}', description='蓝牙耳机 九成新',
+                category=cls.digital, price=Decimal(280 + index * 2)
+            )
+            Goods.objects.create(
+                seller=cls.seller, name=f'考研教材 {index}', description='数学教材 有笔记',
+                category=cls.books, price=Decimal(20 + index % 5), condition='fair'
+            )
+        sold = Goods.objects.filter(category=cls.digital).first()
+        Order.objects.create(
+            order_no='P1', buyer=buyer, seller=cls.seller, goods=sold, amount=Decimal('250'), status='completed'
+        )
+
+    def setUp(self):
+        directory = tempfile.mkdtemp(prefix='goods-pricing-')
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.model_file = os.path.join(directory, 'price_model.pickle')
+        override = override_settings(GOODS_PRICING_MODEL_FILE=self.model_file, GOODS_PRICING_RELOAD_INTERVAL=0)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.holder = PriceModelHolder()
+        patcher = mock.patch('goods.views.get_price_model', return_value=self.holder)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.client.force_authenticate(self.seller)
+
+    def suggest(self, data):
+        return self.client.post('/api/goods/price-suggestion/', data, format='json')
+
+    def test_training_samples_weight_completed_orders(self):
+        samples = load_training_samples()
+        self.assertEqual(len(samples), 60)
+        self.assertEqual(sorted({weight for _, _, weight in samples}), [1.0, 3.0])
+
+    def test_train_and_suggest(self):
+        call_command('train_price_model', stdout=io.StringIO())
+        self.assertTrue(os.path.exists(self.model_file))
+
+        single = self.suggest({'name': '降噪耳机', 'category': self.digital.id, 'description': '蓝牙耳机'})
+        self.assertEqual(single.status_code, 200)
+        suggestion = single.data['data']
+        self.assertLessEqual(Decimal(suggestion['min']), Decimal(suggestion['suggested']))
+        self.assertLessEqual(Decimal(suggestion['suggested']), Decimal(suggestion['max']))
+
+        batch = self.suggest({'items': [
+            {'name': '降噪耳机', 'category': self.digital.id, 'description': '蓝牙耳机'},
+            {'name': '考研教材', 'category': self.books.id, 'condition': 'fair'},
+        ]})
+        self.assertEqual(batch.status_code, 200)
+        headphones, textbook = [Decimal(item['suggested']) for item in batch.data['data']]
+        self.assertEqual(headphones, Decimal(suggestion['suggested']))
+        self.assertGreater(headphones, textbook * 5)
+
+    def test_unavailable_and_invalid_requests(self):
+        self.assertEqual(self.suggest({'name': '降噪耳机'}).status_code, 503)
+        self.assertEqual(self.suggest({'items': [{'name': '降噪耳机'}]}).status_code, 503)
+        self.assertEqual(self.suggest({'name': ''}).status_code, 400)
+        self.assertEqual(self.suggest({'items': []}).status_code, 400)
+        self.assertEqual(self.suggest({'items': [{'name': '台灯'}, {'name': ' '}]}).status_code, 400)
+
+    def test_holder_reloads_changed_file(self):
+        dump_price_model({'version': 1}, self.model_file)
+        self.assertEqual(self.holder.get(), {'version': 1})
+
+        dump_price_model({'version': 2}, self.model_file)
+        stat = os.stat(self.model_file)
+        os.utime(self.model_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.holder.get()
+        deadline = time.monotonic() + 5
+        while self.holder.get() != {'version': 2} and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.holder.get(), {'version': 2})
+
+
+@override_settings(GOODS_RESPONSE_CACHE_TTL=0)
+class CursorPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seller = User.objects.create_user(username='seller', password='pass')
+        for index in range(13):
+            Goods.objects.create(
+                seller=seller, name=f'物品{index}', price=Decimal([10, 20, 20, 35][index % 4]),
+                view_count=[0, 5, 5][index % 3]
+            )
+        Goods.objects.create(seller=seller, name='已下架', price=Decimal('20'), status='off_sale')
+        # 部分物品发布时间相同，检查同值时按 ID 续接
+        same_time = Goods.objects.order_by('id').first().created_at
+        Goods.objects.filter(id__in=list(Goods.objects.order_by('id').values_list('id', flat=True)[:5])).update(
+            created_at=same_time
+        )
+
+    def walk(self, ordering, page_size=3):
+        client = APIClient()
+        ids = []
+        params = {'pagination': 'cursor', 'ordering': ordering, 'page_size': page_size}
+        while True:
+            response = client.get('/api/goods/goods/', params)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(item['id'] for item in response.data['data'])
+            if not response.data['has_more']:
+                self.assertIsNone(response.data['next'])
+                return ids
+            params = {'cursor': response.data['next'], 'page_size': page_size}
+
+    def test_every_ordering_returns_each_row_once(self):
+        on_sale = Goods.objects.filter(status='on_sale')
+        for name, ordering in GOODS_ORDERINGS.items():
+            for page_size in [1, 3, 5]:
+                ids = self.walk(name, page_size)
+                self.assertEqual(ids, list(on_sale.order_by(*ordering).values_list('id', flat=True)), (name, page_size))
+                self.assertEqual(len(set(ids)), 13)
+
+    def test_tampered_cursor(self):
+        client = APIClient()
+        payloads = [{'o': 'price_asc', 'p': ['abc', 1]}, {'o': 'unknown', 'p': [1, 1]}, {'o': 'latest', 'p': [1]}, [1]]
+        cursors = ['not-a-cursor'] + [base64.urlsafe_b64encode(json.dumps(payload).encode()).decode() for payload in payloads]
+        for cursor in cursors:
+            response = client.get('/api/goods/goods/', {'cursor': cursor})
+            self.assertEqual(response.status_code, 400, cursor)
+
+    def test_keyword_rejects_cursor_mode(self):
+        response = APIClient().get('/api/goods/goods/', {'pagination': 'cursor', 'keyword': '物品'})
+        self.assertEqual(response.status_code, 400)
+
+
+class CategoryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user(username='seller', password='pass')
+        cls.books = Category.objects.create(name='图书')
+        cls.digital = Category.objects.create(name='数码')
+
+    def assert_counts(self):
+        for category in [self.books, self.digital]:
+            goods_count = CategorySerializer(Category.objects.get(id=category.id)).data['goods_count']
+            self.assertEqual(goods_count, Goods.objects.filter(category=category, status='on_sale').count(), category.name)
+
+    def create(self, category, status='on_sale'):
+        return Goods.objects.create(seller=self.seller, name='台灯', category=category, price=Decimal('20'), status=status)
+
+    def test_save_transitions(self):
+        goods = self.create(self.books)
+        self.create(self.books, status='off_sale')
+        self.assert_counts()
+
+        goods.status = 'off_sale'
+        goods.save()
+        self.assert_counts()
+
+        goods.status = 'on_sale'
+        goods.save(update_fields=['status'])
+        self.assert_counts()
+
+        goods.category = self.digital
+        goods.save()
+        self.assert_counts()
+
+        goods.name = '护眼台灯'
+        goods.save(update_fields=['name'])
+        goods.category = None
+        goods.save()
+        self.assert_counts()
+
+    def test_delete(self):
+        listed = self.create(self.books)
+        hidden = self.create(self.books, status='off_sale')
+        listed.delete()
+        hidden.delete()
+        self.assert_counts()
+
+    def test_bulk_shelf(self):
+        ids = [self.create(self.books).id, self.create(self.digital).id, self.create(self.books, status='off_sale').id]
+        bulk_shelf(self.seller, 'off_shelf', ids=ids)
+        self.assert_counts()
+        bulk_shelf(self.seller, 'on_shelf', ids=ids)
+        self.assert_counts()
+        bulk_shelf(self.seller, 'delete', ids=ids[:2])
+        self.assert_counts()
+
+    def test_import(self):
+        rows = '\n'.join(json.dumps({
+            'name': f'台灯{index}', 'description': '九成新', 'price': '20',
+            'category': [self.books.id, self.digital.id, None][index % 3]
+        }) for index in range(7))
+        self.assertEqual(import_goods(io.StringIO(rows), self.seller, fmt='jsonl')['created'], 7)
+        self.assert_counts()
+
+    def test_recompute_repairs_drift(self):
+        self.create(self.books)
+        self.create(self.digital)
+        Category.objects.update(on_sale_count=42)
+        Category.recompute_on_sale_counts()
+        self.assert_counts()
+
+
+class GoodsKeywordSignalTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user(username='seller', password='pass')
+
+    def setUp(self):
+        self.goods = Goods.objects.create(
+            seller=self.seller, name='高等数学教材', description='附习题答案', price=Decimal('20')
+        )
+
+    def assert_keywords(self, name, description):
+        goods = Goods.objects.get(id=self.goods.id)
+        expected = extract_keywords(goods_text(name, description))
+        self.assertEqual(goods.keywords, expected)
+        self.assertEqual(set(goods.keyword_postings.values_list('keyword', flat=True)), set(expected))
+
+    def test_create_assigns_keywords(self):
+        self.assertIn('习题', self.goods.keywords)
+        self.assert_keywords('高等数学教材', '附习题答案')
+
+    def test_text_change_refreshes_keywords(self):
+        self.goods.name = '线性代数教材'
+        self.goods.save()
+        self.assert_keywords('线性代数教材', '附习题答案')
+
+        self.goods.name = '线性代数笔记'
+        self.goods.save(update_fields=['name'])
+        self.assert_keywords('线性代数笔记', '附习题答案')
+
+        self.goods.description = '九成新无划线'
+        self.goods.save(update_fields=['description'])
+        self.assert_keywords('线性代数笔记', '九成新无划线')
+
+        self.goods.name = '概率论教材'
+        self.goods.price = Decimal('15')
+        self.goods.save(update_fields=['name', 'price'])
+        self.assert_keywords('概率论教材', '九成新无划线')
+
+    def test_other_fields_leave_keywords_alone(self):
+        stale = ['旧关键词']
+        Goods.objects.filter(id=self.goods.id).update(keywords=stale)
+        self.goods.refresh_from_db()
+        with mock.patch('goods.signals.goods_keywords') as recompute:
+            self.goods.price = Decimal('15')
+            self.goods.save(update_fields=['price'])
+            self.goods.status = 'off_sale'
+            self.goods.save(update_fields=['status'])
+        recompute.assert_not_called()
+        self.assertEqual(Goods.objects.get(id=self.goods.id).keywords, stale)
+
+
+class ImporterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user(username='seller', password='pass')
+        cls.books = Category.objects.create(name='图书')
+
+    def test_jsonl_reports_each_bad_row(self):
+        rows = [
+            {'name': '高等数学教材', 'description': '九成新，附习题答案', 'price': '20', 'category': self.books.id},
+            {'name': '台灯', 'description': '九成新', 'price': 'abc'},
+            {'description': '没有名称', 'price': '20'},
+            {'name': '台灯', 'description': '九成新', 'price': '20', 'category': 999999},
+        ]
+        lines = [json.dumps(row, ensure_ascii=False) for row in rows] + ['{不是 JSON', '[1, 2]']
+        result = import_goods(io.StringIO('\n'.join(lines)), self.seller, fmt='jsonl')
+
+        self.assertEqual((result['created'], result['failed']), (1, 5))
+        self.assertFalse(result['errors_truncated'])
+        errors = {error['line']: error['errors'] for error in result['errors']}
+        self.assertEqual(sorted(errors), [2, 3, 4, 5, 6])
+        self.assertIn('price', errors[2])
+        self.assertIn('name', errors[3])
+        self.assertIn('category', errors[4])
+        self.assertEqual(errors[5], {'non_field_errors': ['不是有效的 JSON']})
+        self.assertEqual(errors[6], {'non_field_errors': ['每行必须是 JSON 对象']})
+        self.assertEqual(Goods.objects.get(seller=self.seller).name, '高等数学教材')
+
+    def test_csv_rows(self):
+        content = (
+            'name,description,price,category,condition,images,pickup_location\n'
+            f'高等数学教材,九成新,20,{self.books.id},good,/media/a.jpg|/media/b.jpg,\n'
+            f'线性代数教材,"附笔记, 无划线",15,{self.books.id},good,"[""/media/c.jpg""]",\n'
+            '台灯,九成新,abc,,good,,\n'
+            '台灯,九成新,20,,good,[坏的,\n'
+        )
+        stream = text_stream(io.BytesIO(content.encode('utf-8-sig')))
+        result = import_goods(stream, self.seller, fmt='csv')
+
+        self.assertEqual((result['created'], result['failed']), (2, 2))
+        errors = {error['line']: error['errors'] for error in result['errors']}
+        self.assertIn('price', errors[4])
+        self.assertEqual(errors[5], {'images': ['图片必须是列表格式']})
+        images = dict(Goods.objects.filter(seller=self.seller).values_list('name', 'images'))
+        self.assertEqual(images['高等数学教材'], ['/media/a.jpg', '/media/b.jpg'])
+        self.assertEqual(images['线性代数教材'], ['/media/c.jpg'])
+        self.assertEqual(Goods.objects.get(name='线性代数教材').description, '附笔记, 无划线')
+
+    def test_max_errors_truncates_report(self):
+        rows = '\n'.join(json.dumps({'name': '台灯', 'description': '九成新', 'price': 'abc'}) for _ in range(3))
+        result = import_goods(io.StringIO(rows), self.seller, fmt='jsonl', max_errors=1)
+        self.assertEqual(result['failed'], 3)
+        self.assertEqual(len(result['errors']), 1)
+        self.assertTrue(result['errors_truncated'])
+
+    def test_counts_and_keywords_after_import(self):
+        rows = '\n'.join(json.dumps({
+            'name': f'高等数学教材{index}', 'description': '九成新，附习题答案', 'price': '20',
+            'category': self.books.id if index % 2 else None
+        }, ensure_ascii=False) for index in range(5))
+        # 心愿单反向匹配在线程池中执行，这里只关心导入本身的提交回调
+        with mock.patch('wishlist.signals.schedule_percolation'), self.captureOnCommitCallbacks(execute=True):
+            import_goods(io.StringIO(rows), self.seller, fmt='jsonl', batch_size=2)
+
+        self.books.refresh_from_db()
+        self.assertEqual(self.books.on_sale_count, Goods.objects.filter(category=self.books, status='on_sale').count())
+        self.assertEqual(self.books.on_sale_count, 2)
+        for goods in Goods.objects.filter(seller=self.seller):
+            self.assertTrue(goods.keywords)
+            self.assertEqual(goods.keywords, goods_keywords(goods))
+            self.assertEqual(set(goods.keyword_postings.values_list('keyword', flat=True)), set(goods.keywords))
+
+    def test_import_endpoint_accepts_csv_upload(self):
+        client = APIClient()
+        client.force_authenticate(self.seller)
+        content = f'name,description,price,category\n高等数学教材,九成新,20,{self.books.id}\n台灯,,20,\n'
+        upload = SimpleUploadedFile('goods.csv', content.encode('utf-8-sig'), content_type='text/csv')
+        response = client.post('/api/goods/goods/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        self.assertEqual((data['created'], data['failed']), (1, 1))
+        self.assertEqual(data['errors'][0]['line'], 3)
+        self.assertIn('description', data['errors'][0]['errors'])
+
+
+@override_settings(GOODS_RESPONSE_CACHE_TTL=0)
+class FacetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seller = User.objects.create_user(username='seller', password='pass')
+        books = Category.objects.create(name='图书')
+        digital = Category.objects.create(name='数码')
+        conditions = [value for value, _ in Goods.CONDITION_CHOICES]
+        prices = ['10', '49.99', '50', '99', '100', '650', '5000', '8000']
+        for index in range(24):
+            Goods.objects.create(
+                seller=seller, name=['降噪耳机', '考研教材', '台灯'][index % 3], description='九成新',
+                category=[books, digital, None][index % 4 % 3], price=Decimal(prices[index % len(prices)]),
+                condition=conditions[index % len(conditions)], status='off_sale' if index % 7 == 0 else 'on_sale'
+            )
+
+    def assert_facets(self, queryset, facets):
+        self.assertEqual(facets['total'], queryset.count())
+        for item in facets['category']:
+            self.assertEqual(item['count'], queryset.filter(category_id=item['id']).count())
+        self.assertEqual(sum(item['count'] for item in facets['category']), queryset.count())
+        for item in facets['condition']:
+            self.assertEqual(item['count'], queryset.filter(condition=item['value']).count())
+        ranges = price_bucket_ranges(get_price_bounds())
+        self.assertEqual([(item['min'], item['max']) for item in facets['price']], ranges)
+        for item in facets['price']:
+            bucket = queryset.filter(price__gte=item['min'])
+            if item['max'] is not None:
+                bucket = bucket.filter(price__lt=item['max'])
+            self.assertEqual(item['count'], bucket.count(), item)
+
+    def test_filtered_queryset(self):
+        queryset = Goods.objects.filter(status='on_sale', price__lte=700)
+        self.assert_facets(queryset, compute_facets(queryset))
+
+    def test_keyword_search(self):
+        backend = get_search_backend()
+        backend.rebuild()
+        queryset = backend.search(Goods.objects.filter(status='on_sale'), '耳机')
+        facets = compute_facets(queryset)
+        self.assertGreater(facets['total'], 0)
+        self.assert_facets(Goods.objects.filter(id__in=list(queryset.values_list('id', flat=True))), facets)
+
+        response = APIClient().get('/api/goods/goods/', {'facets': '1', 'keyword': '耳机'})
+        self.assertEqual(response.data['facets'], facets)
+
+
+class JiebaWarmupTests(TestCase):
+    def test_ready_has_no_filesystem_side_effects(self):
+        with mock.patch('os.makedirs') as makedirs, mock.patch('builtins.open') as open_file:
+            apps.get_app_config('goods').ready()
+        makedirs.assert_not_called()
+        open_file.assert_not_called()
+
+    def test_warmup_creates_cache_dir(self):
+        cache_dir = os.path.join(tempfile.mkdtemp(prefix='jieba-tests-'), 'cache')
+        self.addCleanup(shutil.rmtree, os.path.dirname(cache_dir), ignore_errors=True)
+        self.addCleanup(setattr, jieba.dt, 'tmp_dir', jieba.dt.tmp_dir)
+        with override_settings(JIEBA_CACHE_FILE=os.path.join(cache_dir, 'jieba.dict.pickle')):
+            warmup_jieba()
+        self.assertTrue(os.path.isdir(cache_dir))
+        self.assertEqual(jieba.dt.tmp_dir, cache_dir)
+
+
+def get_media_server():
+    # 导入 ASGI 模块时会启动后台预热线程，测试中只需要媒体文件服务
+    with mock.patch('config.warmup.start_startup_hooks'):
+        from config.asgi import MediaFileServer
+    return MediaFileServer()
+
+
+class MediaFileServerTests(TemporaryMediaMixin, TestCase):
+    content = bytes(range(256)) * 4
+
+    def setUp(self):
+        super().setUp()
+        self.server = get_media_server()
+        default_storage.save('goods/photo.png', ContentFile(self.content))
+
+    async def request(self, path, method='GET', **headers):
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request'}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            'type': 'http', 'method': method, 'path': path,
+            'headers': [(name.replace('_', '-').encode(), value.encode()) for name, value in headers.items()],
+        }
+        await self.server(scope, receive, send)
+        response_headers = {name.decode(): value.decode() for name, value in messages[0]['headers']}
+        return messages[0]['status'], response_headers, b''.join(message.get('body', b'') for message in messages[1:])
+
+    async def test_full_and_head(self):
+        status, headers, body = await self.request('/media/goods/photo.png')
+        self.assertEqual((status, body), (200, self.content))
+        self.assertEqual(headers['content-type'], 'image/png')
+        self.assertEqual(headers['content-length'], str(len(self.content)))
+        self.assertEqual(headers['accept-ranges'], 'bytes')
+
+        status, head_headers, body = await self.request('/media/goods/photo.png', method='HEAD')
+        self.assertEqual((status, body), (200, b''))
+        self.assertEqual(head_headers['content-length'], str(len(self.content)))
+        self.assertEqual(head_headers['etag'], headers['etag'])
+
+        status, _, _ = await self.request('/media/goods/photo.png', method='POST')
+        self.assertEqual(status, 405)
+
+    async def test_ranges(self):
+        size = len(self.content)
+        for header, start, end in [('bytes=2-5', 2, 5), ('bytes=-3', size - 3, size - 1),
+                                   ('bytes=1000-', 1000, size - 1), ('bytes=10-99999', 10, size - 1)]:
+            status, headers, body = await self.request('/media/goods/photo.png', range=header)
+            self.assertEqual(status, 206, header)
+            self.assertEqual(body, self.content[start:end + 1], header)
+            self.assertEqual(headers['content-range'], f'bytes {start}-{end}/{size}')
+
+        for header in ['bytes=5000-', 'bytes=-0', 'bytes=9-3']:
+            status, headers, _ = await self.request('/media/goods/photo.png', range=header)
+            self.assertEqual(status, 416, header)
+            self.assertEqual(headers['content-range'], f'bytes */{size}')
+
+        # 多段范围和无法解析的范围按完整内容返回
+        for header in ['bytes=0-1,4-5', 'items=0-1', 'bytes=a-b']:
+            status, _, body = await self.request('/media/goods/photo.png', range=header)
+            self.assertEqual((status, len(body)), (200, size), header)
+
+    async def test_conditional_requests(self):
+        _, headers, _ = await self.request('/media/goods/photo.png')
+        etag, last_modified = headers['etag'], headers['last-modified']
+
+        status, _, body = await self.request('/media/goods/photo.png', if_none_match=etag)
+        self.assertEqual((status, body), (304, b''))
+        status, _, _ = await self.request('/media/goods/photo.png', if_none_match='"other"')
+        self.assertEqual(status, 200)
+        status, _, _ = await self.request('/media/goods/photo.png', if_modified_since=last_modified)
+        self.assertEqual(status, 304)
+
+        status, _, body = await self.request('/media/goods/photo.png', range='bytes=0-1', if_range=etag)
+        self.assertEqual((status, body), (206, self.content[:2]))
+        status, _, body = await self.request('/media/goods/photo.png', range='bytes=0-1', if_range='"stale"')
+        self.assertEqual((status, body), (200, self.content))
+
+    async def test_rejects_traversal(self):
+        secret = tempfile.NamedTemporaryFile(dir=os.path.dirname(self.media_root), suffix='.png')
+        self.addCleanup(secret.close)
+        secret.write(b'secret')
+        secret.flush()
+        name = os.path.basename(secret.name)
+        for path in [f'/media/../{name}', f'/media/goods/../../{name}', f'/media/%2E%2E/{name}',
+                     f'/media/goods/..%2F..%2F{name}', '/media/missing.png']:
+            status, _, body = await self.request(path)
+            self.assertEqual((status, body), (404, b'Not Found'), path)
+
+    async def test_missing_derivative_falls_back_to_original(self):
+        status, headers, body = await self.request('/media/goods/photo.thumb.webp')
+        self.assertEqual((status, body), (200, self.content))
+        self.assertEqual(headers['content-type'], 'image/png')
+        self.assertEqual(headers['cache-control'], 'public, max-age=60')
+
+        default_storage.save('goods/photo.thumb.webp', ContentFile(b'webp'))
+        status, headers, body = await self.request('/media/goods/photo.thumb.webp')
+        self.assertEqual((status, body), (200, b'webp'))
+        self.assertEqual(headers['content-type'], 'image/webp')
+        self.assertNotEqual(headers['cache-control'], 'public, max-age=60')
+
+
+class ORJSONRendererTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user(username='seller', password='pass', avatar='avatars/seller.png')
+        category = Category.objects.create(name='图书')
+        cls.goods = Goods.objects.create(
+            seller=cls.seller, name='考研教材', description='九成新\u2028有笔记', category=category,
+            price=Decimal('19.90'), images=['/media/goods/a.jpg']
+        )
+
+    def assert_same(self, data):
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_matches_drf_renderer(self):
+        errors = serializers.ValidationError({'price': ['请输入合法的数字'], 'items': [{'name': ['该字段不能为空']}]}).detail
+        self.assert_same({
+            'code': 400,
+            'message': gettext_lazy('参数错误'),
+            'errors': errors,
+            'data': GoodsDetailSerializer(self.goods, context={'request': RequestFactory().get('/')}).data,
+            'list': GoodsListSerializer([self.goods], many=True).data,
+            'price': Decimal('19.90'),
+            'ids': (1, 2),
+            'counts': {1: 'a', 'b': None},
+            'flag': True,
+            'token': uuid.UUID(int=1),
+            'elapsed': timedelta(seconds=90),
+            'raw': b'bytes',
+            'text': '行\u2028分隔\u2029',
+        })
+        self.assert_same(None)
+
+    def test_raw_datetimes_use_datetime_format(self):
+        value = timezone.now()
+        for fmt in [None, '%Y/%m/%d %H:%M']:
+            rest_framework = dict(settings.REST_FRAMEWORK)
+            if fmt:
+                rest_framework['DATETIME_FORMAT'] = fmt
+            with override_settings(REST_FRAMEWORK=rest_framework):
+                expected = {
+                    'at': serializers.DateTimeField().to_representation(value),
+                    'day': serializers.DateField().to_representation(date(2024, 6, 1)),
+                }
+                rendered = ORJSONRenderer().render({'at': value, 'day': date(2024, 6, 1)})
+                self.assertEqual(rendered, JSONRenderer().render(expected))
+
+    def test_error_response(self):
+        client = APIClient()
+        client.force_authenticate(self.seller)
+        response = client.post('/api/goods/goods/', {'name': '', 'price': 'abc'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
@@ -1,12 +1,21 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CategoryViewSet, GoodsViewSet, upload_image
+from .views import (
+    CategoryViewSet, GoodsViewSet, PickupLocationViewSet, change_feed, change_feed_ack, hot_goods,
+    price_suggestion, upload_image, upload_images
+)
 
 router = DefaultRouter()
 router.register(r'categories', CategoryViewSet, basename='category')
 router.register(r'goods', GoodsViewSet, basename='goods')
+router.register(r'locations', PickupLocationViewSet, basename='location')
 
 urlpatterns = [
     path('', include(router.urls)),
     path('upload/', upload_image, name='upload_image'),
+    path('upload/batch/', upload_images, name='upload_images'),
+    path('hot/', hot_goods, name='hot_goods'),
+    path('changes/', change_feed, name='change_feed'),
+    path('changes/ack/', change_feed_ack, name='change_feed_ack'),
+    path('price-suggestion/', price_suggestion, name='price_suggestion'),
 ]
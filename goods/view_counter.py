@@ -0,0 +1,187 @@
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+
+def persist_view_counts(counts):
+    from .models import Goods
+
+    counts = {goods_id: count for goods_id, count in counts.items() if count > 0}
+    if not counts:
+        return 0
+    increment = Case(
+        *[When(id=goods_id, then=Value(count)) for goods_id, count in counts.items()],
+        default=Value(0),
+        output_field=IntegerField()
+    )
+    return Goods.objects.filter(id__in=list(counts)).update(view_count=F('view_count') + increment)
+
+
+class BaseViewCounter:
+    # 计数只缓冲在当前进程内时，其他进程（如管理命令）无法写回 Web 进程里的浏览量
+    process_local = True
+
+    def __init__(self):
+        self.flush_interval = getattr(settings, 'GOODS_VIEW_COUNTER_FLUSH_INTERVAL', 10)
+        self._flusher = None
+        self._flusher_lock = threading.Lock()
+
+    def incr(self, goods_id, count=1):
+        raise NotImplementedError
+
+    def pending(self, goods_id):
+        raise NotImplementedError
+
+    def flush(self):
+        raise NotImplementedError
+
+    def sweep(self):
+        return self.flush()
+
+    def ensure_flusher(self):
+        if self._flusher is not None or self.flush_interval <= 0:
+            return
+        with self._flusher_lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(
+                    target=self._run_flusher, name='goods-view-counter', daemon=True
+                )
+                self._flusher.start()
+                atexit.register(self.flush)
+
+    def _run_flusher(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('浏览量写回失败')
+            finally:
+                connection.close()
+
+
+class MemoryViewCounter(BaseViewCounter):
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._counts = Counter()
+
+    def incr(self, goods_id, count=1):
+        with self._lock:
+            self._counts[goods_id] += count
+        self.ensure_flusher()
+
+    def pending(self, goods_id):
+        with self._lock:
+            return self._counts.get(goods_id, 0)
+
+    def flush(self):
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        try:
+            return persist_view_counts(counts)
+        except Exception:
+            with self._lock:
+                self._counts.update(counts)
+            raise
+
+
+class CacheViewCounter(BaseViewCounter):
+    key_prefix = 'goods:views:'
+
+    def __init__(self):
+        super().__init__()
+        self.cache = caches[getattr(settings, 'GOODS_VIEW_COUNTER_CACHE', 'default')]
+        self._lock = threading.Lock()
+        self._dirty = set()
+
+    @property
+    def process_local(self):
+        return isinstance(self.cache, (LocMemCache, DummyCache))
+
+    def make_key(self, goods_id):
+        return f'{self.key_prefix}{goods_id}'
+
+    def incr(self, goods_id, count=1):
+        key = self.make_key(goods_id)
+        self.cache.add(key, 0, timeout=None)
+        try:
+            self.cache.incr(key, count)
+        except ValueError:
+            self.cache.set(key, count, timeout=None)
+        with self._lock:
+            self._dirty.add(goods_id)
+        self.ensure_flusher()
+
+    def pending(self, goods_id):
+        return self.cache.get(self.make_key(goods_id)) or 0
+
+    def flush(self):
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        return self.flush_ids(dirty)
+
+    def sweep(self):
+        from .models import Goods
+
+        updated = self.flush()
+        ids = Goods.objects.order_by('id').values_list('id', flat=True)
+        batch = []
+        for goods_id in ids.iterator(chunk_size=1000):
+            batch.append(goods_id)
+            if len(batch) >= 1000:
+                updated += self.flush_ids(batch)
+                batch = []
+        return updated + self.flush_ids(batch)
+
+    def flush_ids(self, goods_ids):
+        if not goods_ids:
+            return 0
+
+        keys = {self.make_key(goods_id): goods_id for goods_id in goods_ids}
+        counts = {}
+        for key, value in self.cache.get_many(list(keys)).items():
+            if value:
+                self.cache.decr(key, value)
+                counts[keys[key]] = value
+        try:
+            return persist_view_counts(counts)
+        except Exception:
+            for goods_id, value in counts.items():
+                self.incr(goods_id, value)
+            raise
+
+
+_counter = None
+_counter_lock = threading.Lock()
+
+
+def get_view_counter():
+    global _counter
+    if _counter is None:
+        with _counter_lock:
+            if _counter is None:
+                backend_path = getattr(
+                    settings, 'GOODS_VIEW_COUNTER_BACKEND', 'goods.view_counter.MemoryViewCounter'
+                )
+                _counter = import_string(backend_path)()
+    return _counter
+
+
+def flush_view_counts():
+    if _counter is not None:
+        return _counter.flush()
+    return 0
@@ -1,12 +1,26 @@
+from django.conf import settings
 from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from django.db.models import Q
-from .models import Category, Goods
+from .cache import cache_anonymous_response
+from .facets import compute_facets
+from .hot import get_hot_ranking
+from .importer import IMPORT_FORMATS, guess_format, import_goods, text_stream
+from .images import derivative_urls, schedule_derivatives
+from .locations import match_location
+from .models import Category, Goods, PickupLocation
+from .outbox import CHANGE_TOPICS, ack_changes, get_batch_size, get_cursor, read_changes
+from .pagination import GoodsCursorPagination, InvalidCursor, get_goods_ordering
+from .pricing import PriceModelUnavailable, feature_row, get_max_pricing_batch, get_price_model
+from .search import get_search_backend
+from .storage import media_url, store_upload, store_uploads
+from .shelf import bulk_shelf, get_max_bulk_ids
+from .similar import get_similar_index
+from .view_counter import get_view_counter
 from .serializers import (
-    CategorySerializer, GoodsListSerializer, GoodsDetailSerializer,
-    GoodsCreateSerializer, GoodsUpdateSerializer
+    CategorySerializer, PickupLocationSerializer, GoodsListSerializer, GoodsDetailSerializer,
+    GoodsCreateSerializer, GoodsUpdateSerializer, GoodsListProjection, PriceSuggestionSerializer
 )
 
 
@@ -15,6 +29,7 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = CategorySerializer
     permission_classes = [AllowAny]
     
+    @cache_anonymous_response('category_list')
     def list(self, request):
         queryset = self.get_queryset()
         serializer = self.get_serializer(queryset, many=True)
@@ -25,22 +40,35 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
         })
 
 
+class PickupLocationViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = PickupLocation.objects.all()
+    serializer_class = PickupLocationSerializer
+    permission_classes = [AllowAny]
+    pagination_class = None
+    
+    def list(self, request):
+        queryset = self.get_queryset()
+        campus = request.query_params.get('campus')
+        if campus:
+            queryset = queryset.filter(campus=campus)
+        serializer = self.get_serializer(queryset, many=True)
+        return Response({
+            'code': 200,
+            'message': '获取成功',
+            'data': serializer.data
+        })
+
+
 class GoodsViewSet(viewsets.ModelViewSet):
     
     def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'similar']:
             return [AllowAny()]
         return [IsAuthenticated()]
     
     def get_queryset(self):
         queryset = Goods.objects.select_related('seller', 'category').all()
         
-        keyword = self.request.query_params.get('keyword')
-        if keyword:
-            queryset = queryset.filter(
-                Q(name__icontains=keyword) | Q(description__icontains=keyword)
-            )
-        
         category_id = self.request.query_params.get('category')
         if category_id:
             queryset = queryset.filter(category_id=category_id)
@@ -65,7 +93,26 @@ class GoodsViewSet(viewsets.ModelViewSet):
         if seller_id:
             queryset = queryset.filter(seller_id=seller_id)
         
-        return queryset.order_by('-created_at')
+        location = self.request.query_params.get('location')
+        if location:
+            if location.isdigit():
+                queryset = queryset.filter(location_id=location)
+            else:
+                location_id = match_location(location)
+                if location_id is not None:
+                    queryset = queryset.filter(location_id=location_id)
+                else:
+                    queryset = queryset.filter(pickup_location__icontains=location)
+        
+        campus = self.request.query_params.get('campus')
+        if campus:
+            queryset = queryset.filter(location__campus=campus)
+        
+        keyword = self.request.query_params.get('keyword')
+        if keyword:
+            return get_search_backend().search(queryset, keyword)
+        
+        return queryset.order_by(*get_goods_ordering(self.request.query_params.get('ordering')))
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -76,31 +123,79 @@ class GoodsViewSet(viewsets.ModelViewSet):
             return GoodsDetailSerializer
         return GoodsListSerializer
     
+    def use_cursor_pagination(self):
+        params = self.request.query_params
+        return bool(params.get('cursor')) or params.get('pagination') == 'cursor'
+    
+    def use_list_projection(self):
+        return getattr(settings, 'GOODS_LIST_PROJECTION', True)
+    
+    def project_list(self, queryset):
+        if self.use_list_projection():
+            return GoodsListProjection.project(queryset)
+        return queryset
+    
+    def serialize_list(self, rows, context=None):
+        if self.use_list_projection():
+            return GoodsListProjection(rows, context=context).data
+        return GoodsListSerializer(rows, many=True, context=context).data
+    
+    def with_facets(self, payload, queryset):
+        if self.request.query_params.get('facets') in ['1', 'true']:
+            payload['facets'] = compute_facets(queryset)
+        return payload
+    
+    @cache_anonymous_response('goods_list')
     def list(self, request):
         queryset = self.get_queryset()
-        page = self.paginate_queryset(queryset)
+        rows = self.project_list(queryset)
+        context = self.get_serializer_context()
+        if self.use_cursor_pagination():
+            # 关键词搜索按相关度排序，没有可用于游标的稳定排序键
+            if request.query_params.get('keyword'):
+                return Response({
+                    'code': 400,
+                    'message': '关键词搜索不支持游标分页，请使用页码分页'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            paginator = GoodsCursorPagination()
+            try:
+                page = paginator.paginate_queryset(rows, request)
+            except InvalidCursor:
+                return Response({
+                    'code': 400,
+                    'message': '无效的分页游标'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            return Response(self.with_facets({
+                'code': 200,
+                'message': '获取成功',
+                'data': self.serialize_list(page, context),
+                'next': paginator.get_next_cursor(),
+                'has_more': paginator.has_more
+            }, queryset))
+        
+        page = self.paginate_queryset(rows)
         if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return Response({
+            return Response(self.with_facets({
                 'code': 200,
                 'message': '获取成功',
-                'data': serializer.data,
+                'data': self.serialize_list(page, context),
                 'count': self.paginator.page.paginator.count,
                 'next': self.paginator.get_next_link(),
                 'previous': self.paginator.get_previous_link()
-            })
+            }, queryset))
         
-        serializer = self.get_serializer(queryset, many=True)
-        return Response({
+        return Response(self.with_facets({
             'code': 200,
             'message': '获取成功',
-            'data': serializer.data
-        })
+            'data': self.serialize_list(rows, context)
+        }, queryset))
     
     def retrieve(self, request, pk=None):
         goods = self.get_object()
-        goods.view_count += 1
-        goods.save(update_fields=['view_count'])
+        view_counter = get_view_counter()
+        view_counter.incr(goods.id)
+        get_hot_ranking().incr(goods.id, 'view')
+        goods.view_count += view_counter.pending(goods.id)
         serializer = self.get_serializer(goods)
         return Response({
             'code': 200,
@@ -197,37 +292,143 @@ class GoodsViewSet(viewsets.ModelViewSet):
             'message': '上架成功'
         })
     
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        goods = self.get_object()
+        try:
+            limit = int(request.query_params.get('limit', 6))
+        except (TypeError, ValueError):
+            limit = 6
+        limit = max(1, min(limit, 20))
+        
+        neighbours = get_similar_index().similar(goods, limit * 2)
+        queryset = Goods.objects.filter(id__in=[goods_id for goods_id, _ in neighbours], status='on_sale')
+        rows = {row['id']: row for row in GoodsListProjection.project(queryset)}
+        ordered = [rows[goods_id] for goods_id, _ in neighbours if goods_id in rows][:limit]
+        return Response({
+            'code': 200,
+            'message': '获取成功',
+            'data': GoodsListProjection(ordered, context=self.get_serializer_context()).data
+        })
+    
+    def run_bulk_shelf(self, request, action_name, message):
+        ids = request.data.get('ids')
+        seller_id = request.data.get('seller')
+        if seller_id is not None and not request.user.is_admin:
+            return Response({
+                'code': 403,
+                'message': '仅管理员可按卖家批量操作'
+            }, status=status.HTTP_403_FORBIDDEN)
+        if seller_id is not None and action_name != 'off_shelf':
+            return Response({
+                'code': 400,
+                'message': '按卖家批量操作仅支持下架'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            if ids is not None:
+                if not isinstance(ids, list):
+                    raise ValueError(ids)
+                ids = [int(goods_id) for goods_id in ids]
+            if seller_id is not None:
+                seller_id = int(seller_id)
+        except (TypeError, ValueError):
+            return Response({
+                'code': 400,
+                'message': '物品ID列表格式错误'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if ids is None and seller_id is None:
+            return Response({
+                'code': 400,
+                'message': '请提供物品ID列表'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if ids is not None and len(ids) > get_max_bulk_ids():
+            return Response({
+                'code': 400,
+                'message': f'单次最多操作{get_max_bulk_ids()}件物品'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        result = bulk_shelf(request.user, action_name, ids=ids, seller_id=seller_id)
+        return Response({
+            'code': 200,
+            'message': message,
+            'data': result
+        })
+    
+    @action(detail=False, methods=['post'])
+    def bulk_on_shelf(self, request):
+        return self.run_bulk_shelf(request, 'on_shelf', '批量上架完成')
+    
+    @action(detail=False, methods=['post'])
+    def bulk_off_shelf(self, request):
+        return self.run_bulk_shelf(request, 'off_shelf', '批量下架完成')
+    
+    @action(detail=False, methods=['post'])
+    def bulk_delete(self, request):
+        return self.run_bulk_shelf(request, 'delete', '批量删除完成')
+    
+    @action(detail=False, methods=['post'], url_path='import')
+    def bulk_import(self, request):
+        file = request.FILES.get('file')
+        if not file:
+            return Response({
+                'code': 400,
+                'message': '请上传 CSV 或 JSONL 文件'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        fmt = request.data.get('format') or guess_format(file.name)
+        if fmt not in IMPORT_FORMATS:
+            return Response({
+                'code': 400,
+                'message': '仅支持 csv、jsonl 格式'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        result = import_goods(text_stream(file), request.user, fmt=fmt)
+        return Response({
+            'code': 200,
+            'message': f"导入完成，成功 {result['created']} 条，失败 {result['failed']} 条",
+            'data': result
+        })
+    
     @action(detail=False, methods=['get'])
     def my_goods(self, request):
         queryset = Goods.objects.filter(seller=request.user).order_by('-created_at')
-        page = self.paginate_queryset(queryset)
+        rows = self.project_list(queryset)
+        page = self.paginate_queryset(rows)
         if page is not None:
-            serializer = GoodsListSerializer(page, many=True)
             return Response({
                 'code': 200,
                 'message': '获取成功',
-                'data': serializer.data,
+                'data': self.serialize_list(page),
                 'count': self.paginator.page.paginator.count,
                 'next': self.paginator.get_next_link(),
                 'previous': self.paginator.get_previous_link()
             })
         
-        serializer = GoodsListSerializer(queryset, many=True)
         return Response({
             'code': 200,
             'message': '获取成功',
-            'data': serializer.data
+            'data': self.serialize_list(rows)
         })
 
 
+ALLOWED_IMAGE_TYPES = ['image/jpeg', 'image/png', 'image/gif', 'image/webp']
+MAX_IMAGE_SIZE = 5 * 1024 * 1024
+MAX_BATCH_IMAGES = 5
+
+
+def validate_image_file(file):
+    if file.content_type not in ALLOWED_IMAGE_TYPES:
+        return '仅支持jpg、png、gif、webp格式图片'
+    if file.size > MAX_IMAGE_SIZE:
+        return '图片大小不能超过5MB'
+    return None
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def upload_image(request):
-    from django.core.files.storage import default_storage
-    from django.core.files.base import ContentFile
-    import os
-    import time
-    
     file = request.FILES.get('file')
     if not file:
         return Response({
@@ -235,27 +436,196 @@ def upload_image(request):
             'message': '请上传图片'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    allowed_types = ['image/jpeg', 'image/png', 'image/gif', 'image/webp']
-    if file.content_type not in allowed_types:
+    error = validate_image_file(file)
+    if error:
         return Response({
             'code': 400,
-            'message': '仅支持jpg、png、gif、webp格式图片'
+            'message': error
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    if file.size > 5 * 1024 * 1024:
+    path, created = store_upload(file, 'goods')
+    url = media_url(path)
+    if created:
+        schedule_derivatives(path)
+    
+    return Response({
+        'code': 200,
+        'message': '上传成功',
+        'data': {'url': url, 'derivatives': derivative_urls(url)}
+    })
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def upload_images(request):
+    files = request.FILES.getlist('files')
+    if not files:
         return Response({
             'code': 400,
-            'message': '图片大小不能超过5MB'
+            'message': '请上传图片'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    ext = os.path.splitext(file.name)[1]
-    filename = f"goods/{int(time.time())}_{request.user.id}{ext}"
+    if len(files) > MAX_BATCH_IMAGES:
+        return Response({
+            'code': 400,
+            'message': f'最多上传{MAX_BATCH_IMAGES}张图片'
+        }, status=status.HTTP_400_BAD_REQUEST)
     
-    path = default_storage.save(filename, ContentFile(file.read()))
-    url = f"/media/{path}"
+    errors = []
+    for index, file in enumerate(files):
+        error = validate_image_file(file)
+        if error:
+            errors.append({'index': index, 'name': file.name, 'message': error})
+    if errors:
+        return Response({
+            'code': 400,
+            'message': '上传失败',
+            'errors': errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    data = []
+    for path, created in store_uploads(files, 'goods'):
+        url = media_url(path)
+        if created:
+            schedule_derivatives(path)
+        data.append({'url': url, 'derivatives': derivative_urls(url)})
     
     return Response({
         'code': 200,
         'message': '上传成功',
-        'data': {'url': url}
+        'data': data
+    })
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def hot_goods(request):
+    try:
+        limit = int(request.query_params.get('limit', 20))
+    except (TypeError, ValueError):
+        limit = 20
+    limit = max(1, min(limit, 50))
+    
+    ranked = get_hot_ranking().top(limit * 2)
+    queryset = Goods.objects.filter(id__in=[goods_id for goods_id, _ in ranked], status='on_sale')
+    rows = {row['id']: row for row in GoodsListProjection.project(queryset)}
+    ordered = [rows[goods_id] for goods_id, _ in ranked if goods_id in rows][:limit]
+    data = GoodsListProjection(ordered, context={'request': request}).data
+    scores = dict(ranked)
+    for item in data:
+        item['hot_score'] = round(scores[item['id']], 4)
+    return Response({
+        'code': 200,
+        'message': '获取成功',
+        'data': data
+    })
+
+
+def parse_change_topics(value):
+    topics = [topic for topic in (value or '').split(',') if topic]
+    if any(topic not in CHANGE_TOPICS for topic in topics):
+        raise ValueError(value)
+    return topics
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def change_feed(request):
+    if not request.user.is_admin:
+        return Response({
+            'code': 403,
+            'message': '仅管理员可读取变更流'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    consumer = request.query_params.get('consumer')
+    try:
+        topics = parse_change_topics(request.query_params.get('topic'))
+        after = request.query_params.get('after')
+        after = int(after) if after is not None else (get_cursor(consumer) if consumer else 0)
+        limit = max(1, min(int(request.query_params.get('limit', get_batch_size())), get_batch_size()))
+    except (TypeError, ValueError):
+        return Response({
+            'code': 400,
+            'message': '参数错误'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    events = read_changes(after, topics, limit)
+    return Response({
+        'code': 200,
+        'message': '获取成功',
+        'data': {
+            'results': events,
+            'next': events[-1]['seq'] if events else after,
+            'has_more': len(events) == limit,
+        }
+    })
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def change_feed_ack(request):
+    if not request.user.is_admin:
+        return Response({
+            'code': 403,
+            'message': '仅管理员可确认变更流'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    consumer = request.data.get('consumer')
+    try:
+        last_id = int(request.data.get('last_id'))
+    except (TypeError, ValueError):
+        last_id = None
+    if not consumer or last_id is None or len(consumer) > 64:
+        return Response({
+            'code': 400,
+            'message': '请提供 consumer 和 last_id'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'code': 200,
+        'message': '确认成功',
+        'data': {'consumer': consumer, 'last_id': ack_changes(consumer, last_id)}
+    })
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def price_suggestion(request):
+    items = request.data.get('items')
+    many = items is not None
+    if many and (not isinstance(items, list) or not items):
+        return Response({
+            'code': 400,
+            'message': 'items 必须是非空列表'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if many and len(items) > get_max_pricing_batch():
+        return Response({
+            'code': 400,
+            'message': f'单次最多估价{get_max_pricing_batch()}件物品'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    serializer = PriceSuggestionSerializer(data=items if many else request.data, many=many)
+    if not serializer.is_valid():
+        return Response({
+            'code': 400,
+            'message': '参数错误',
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    rows = [
+        feature_row(item['category'], item['condition'], item['name'], item['description'])
+        for item in (serializer.validated_data if many else [serializer.validated_data])
+    ]
+    try:
+        suggestions = get_price_model().predict(rows)
+    except PriceModelUnavailable:
+        return Response({
+            'code': 503,
+            'message': '定价模型尚未训练'
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    
+    return Response({
+        'code': 200,
+        'message': '获取成功',
+        'data': suggestions if many else suggestions[0]
     })
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from users.models import User
 from goods.models import Goods
 
@@ -30,6 +30,10 @@ class Order(models.Model):
     
     def __str__(self):
         return self.order_no
+    
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
 
 class Evaluation(models.Model):
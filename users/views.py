@@ -5,16 +5,13 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate, get_user_model
 from django.utils import timezone
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
+from goods.storage import media_url, store_upload
 from .models import Notification
 from .serializers import (
     UserRegisterSerializer, UserLoginSerializer, UserSerializer,
     UserProfileSerializer, UserUpdateSerializer, RealNameVerifySerializer,
     NotificationSerializer, ChangePasswordSerializer
 )
-import os
-import time
 
 User = get_user_model()
 
@@ -222,11 +219,8 @@ class UserViewSet(viewsets.ModelViewSet):
                 'message': '图片大小不能超过2MB'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        ext = os.path.splitext(file.name)[1]
-        filename = f"avatars/{int(time.time())}_{request.user.id}{ext}"
-        
-        path = default_storage.save(filename, ContentFile(file.read()))
-        url = f"/media/{path}"
+        path, _ = store_upload(file, 'avatars')
+        url = media_url(path)
         
         request.user.avatar = path
         request.user.save(update_fields=['avatar'])
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Wishlist, MatchResult
+from .models import Wishlist, MatchResult, MatchJob
 
 
 @admin.register(Wishlist)
@@ -19,3 +19,11 @@ class MatchResultAdmin(admin.ModelAdmin):
     search_fields = ['goods_name', 'wishlist__name']
     raw_id_fields = ['wishlist']
     ordering = ['-similarity_score']
+
+
+@admin.register(MatchJob)
+class MatchJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'wishlist', 'status', 'created_at', 'finished_at']
+    list_filter = ['status']
+    raw_id_fields = ['user', 'wishlist']
+    ordering = ['-created_at']
@@ -0,0 +1,161 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .matching import refresh_wishlist_keywords, run_matching_for_wishlist
+from .models import MatchJob
+from .serializers import MatchJobSerializer, MatchResultSerializer
+
+
+logger = logging.getLogger(__name__)
+
+
+class MatchJobQueue:
+    def __init__(self):
+        self.capacity = getattr(settings, 'WISHLIST_JOB_QUEUE_SIZE', 100)
+        self.executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'WISHLIST_JOB_WORKERS', 2),
+            thread_name_prefix='wishlist-job'
+        )
+        self._lock = threading.Lock()
+        self._queued = set()
+        self._overflow = False
+
+    def submit(self, job_id):
+        with self._lock:
+            if job_id in self._queued:
+                return True
+            if len(self._queued) >= self.capacity:
+                # 排队已满时任务以待执行状态留在数据库中，由之后完成的任务补取
+                self._overflow = True
+                return False
+            self._queued.add(job_id)
+        self.executor.submit(self._run, job_id)
+        return True
+
+    def drain(self):
+        with self._lock:
+            queued = list(self._queued)
+            free = self.capacity - len(queued)
+        if free <= 0:
+            return 0
+        job_ids = list(
+            MatchJob.objects.filter(status='pending').exclude(id__in=queued)
+            .order_by('id').values_list('id', flat=True)[:free]
+        )
+        if len(job_ids) == free:
+            with self._lock:
+                self._overflow = True
+        return sum(1 for job_id in job_ids if self.submit(job_id))
+
+    def recover(self, timeout=None):
+        # 进程崩溃后卡在执行中的任务和内存队列里丢失的待执行任务都从数据库补取
+        reset_stale_jobs(timeout)
+        return self.drain()
+
+    def _run(self, job_id):
+        try:
+            run_job(job_id)
+        except Exception:
+            logger.exception('心愿单匹配任务 %s 执行失败', job_id)
+        finally:
+            with self._lock:
+                self._queued.discard(job_id)
+                overflow, self._overflow = self._overflow, False
+            try:
+                if overflow:
+                    self.drain()
+            except Exception:
+                logger.exception('补取待执行的心愿单匹配任务失败')
+            finally:
+                connection.close()
+
+
+def reset_stale_jobs(timeout=None):
+    if timeout is None:
+        timeout = getattr(settings, 'WISHLIST_JOB_TIMEOUT', 600)
+    return MatchJob.objects.filter(
+        status='running', started_at__lt=timezone.now() - timedelta(seconds=timeout)
+    ).update(status='pending', started_at=None)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = MatchJobQueue()
+                try:
+                    _queue.recover()
+                except Exception:
+                    logger.exception('恢复未完成的心愿单匹配任务失败')
+    return _queue
+
+
+def enqueue_match_job(wishlist):
+    # 同一心愿单尚未开始的任务直接复用，执行时读取的总是最新的心愿单内容
+    job = MatchJob.objects.filter(wishlist=wishlist, status='pending').order_by('id').first()
+    if job is None:
+        job = MatchJob.objects.create(user_id=wishlist.user_id, wishlist=wishlist)
+    job_id = job.id
+    transaction.on_commit(lambda: get_job_queue().submit(job_id))
+    return job
+
+
+def run_job(job_id):
+    claimed = MatchJob.objects.filter(id=job_id, status='pending').update(
+        status='running', started_at=timezone.now()
+    )
+    if not claimed:
+        return None
+    job = MatchJob.objects.select_related('wishlist').filter(id=job_id).first()
+    if job is None:
+        return None
+
+    try:
+        refresh_wishlist_keywords(job.wishlist)
+        match_results = run_matching_for_wishlist(job.wishlist)
+        job.result = {
+            'match_count': len(match_results),
+            'matches': MatchResultSerializer(match_results, many=True).data
+        }
+        job.status = 'succeeded'
+    except Exception as exc:
+        logger.exception('心愿单 %s 匹配失败', job.wishlist_id)
+        job.status = 'failed'
+        job.error = str(exc)
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'error', 'finished_at'])
+    push_job_result(job)
+    return job
+
+
+def push_job_result(job):
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(
+            f'user_{job.user_id}',
+            {
+                'type': 'wishlist_match',
+                'data': MatchJobSerializer(job).data
+            }
+        )
+    except Exception:
+        logger.exception('推送心愿单匹配结果失败')
+
+
+def resume_match_jobs():
+    return get_job_queue().recover()
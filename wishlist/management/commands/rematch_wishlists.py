@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from wishlist.models import Wishlist
+from wishlist.scoring import rematch_wishlists
+
+
+class Command(BaseCommand):
+    help = '使用向量化打分对全部（或指定）心愿单重新匹配在售物品'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ids', type=int, nargs='+', help='只重新匹配指定的心愿单')
+        parser.add_argument('--pending', action='store_true', help='只重新匹配尚未匹配成功的心愿单')
+        parser.add_argument('--dry-run', action='store_true', help='只计算匹配结果，不写入数据库')
+
+    def handle(self, *args, **options):
+        queryset = Wishlist.objects.all()
+        if options['ids']:
+            queryset = queryset.filter(id__in=options['ids'])
+        if options['pending']:
+            queryset = queryset.filter(match_status='pending')
+
+        start = time.perf_counter()
+        result = rematch_wishlists(queryset, dry_run=options['dry_run'])
+        self.stdout.write(self.style.SUCCESS(
+            f"心愿单 {result['wishlists']} 条，匹配成功 {result['matched']} 条，"
+            f"通知 {result['notified']} 条，耗时 {time.perf_counter() - start:.1f} 秒"
+        ))
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from wishlist.jobs import reset_stale_jobs, run_job
+from wishlist.models import MatchJob
+
+
+class Command(BaseCommand):
+    help = '恢复并执行卡在执行中或待执行状态的心愿单匹配任务'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--timeout', type=int, default=getattr(settings, 'WISHLIST_JOB_TIMEOUT', 600),
+            help='执行中超过该秒数的任务视为已中断，传 0 恢复全部执行中的任务'
+        )
+
+    def handle(self, *args, **options):
+        reset = reset_stale_jobs(options['timeout'])
+
+        succeeded = failed = 0
+        for job_id in MatchJob.objects.filter(status='pending').order_by('id').values_list('id', flat=True):
+            job = run_job(job_id)
+            if job is None:
+                continue
+            if job.status == 'succeeded':
+                succeeded += 1
+            else:
+                failed += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'重置中断任务 {reset} 个，执行成功 {succeeded} 个，失败 {failed} 个'
+        ))
@@ -0,0 +1,318 @@
+import logging
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Exists, OuterRef, Q
+
+from goods.keywords import extract_keywords, goods_keywords, indexable_keywords
+from goods.models import Goods, GoodsKeyword
+from users.models import Notification
+from .models import MatchResult, Wishlist, WishlistKeyword
+
+
+logger = logging.getLogger(__name__)
+
+
+MATCH_LIMIT = 5
+MATCH_THRESHOLD = 0.1
+KEYWORD_WEIGHT = 0.5
+CATEGORY_WEIGHT = 0.2
+
+
+def calculate_similarity(wishlist, goods):
+    score = 0
+    
+    wishlist_keywords = set(wishlist.keywords)
+    keyword_intersection = wishlist_keywords.intersection(
+        goods.keywords if goods.keywords is not None else goods_keywords(goods)
+    )
+    if len(keyword_intersection) >= 1:
+        keyword_score = len(keyword_intersection) / max(len(wishlist_keywords), 1)
+        score += keyword_score * 0.5
+    
+    if wishlist.category_id and goods.category_id:
+        if wishlist.category_id == goods.category_id:
+            score += 0.2
+    
+    if wishlist.min_price and wishlist.max_price:
+        if wishlist.min_price <= goods.price <= wishlist.max_price:
+            score += 0.15
+        elif goods.price < wishlist.min_price:
+            score += 0.05
+        elif goods.price > wishlist.max_price:
+            price_diff = (goods.price - wishlist.max_price) / wishlist.max_price
+            if price_diff <= 0.2:
+                score += 0.05
+    elif wishlist.min_price:
+        if goods.price >= wishlist.min_price:
+            score += 0.1
+    elif wishlist.max_price:
+        if goods.price <= wishlist.max_price:
+            score += 0.1
+    
+    return min(score, 1.0)
+
+
+def use_keyword_index():
+    return getattr(settings, 'WISHLIST_MATCH_USE_INDEX', True)
+
+
+def candidate_queryset(wishlist):
+    queryset = Goods.objects.filter(status='on_sale', is_traded=False)
+    if wishlist.category_id:
+        queryset = queryset.filter(category_id=wishlist.category_id)
+    return queryset
+
+
+def price_bands(wishlist, field='price'):
+    # 与 calculate_similarity 的价格打分一一对应，按得分从高到低排列且互不重叠
+    low, high = wishlist.min_price, wishlist.max_price
+    if low and high:
+        ceiling = high * Decimal('1.2')
+        return [
+            (Q(**{f'{field}__gte': low, f'{field}__lte': high}), 0.15),
+            (Q(**{f'{field}__lt': low}), 0.05),
+            (Q(**{f'{field}__gte': low, f'{field}__gt': high, f'{field}__lte': ceiling}), 0.05),
+            (Q(**{f'{field}__gte': low, f'{field}__gt': ceiling}), 0),
+        ]
+    if low:
+        return [(Q(**{f'{field}__gte': low}), 0.1), (Q(**{f'{field}__lt': low}), 0)]
+    if high:
+        return [(Q(**{f'{field}__lte': high}), 0.1), (Q(**{f'{field}__gt': high}), 0)]
+    return [(Q(), 0)]
+
+
+def find_candidate_ids(wishlist, limit=MATCH_LIMIT):
+    keywords = indexable_keywords(wishlist.keywords)
+    keyword_count = max(len(set(wishlist.keywords)), 1)
+    per_keyword = KEYWORD_WEIGHT / keyword_count
+    category_score = CATEGORY_WEIGHT if wishlist.category_id else 0
+    goods = candidate_queryset(wishlist).exclude(seller_id=wishlist.user_id)
+    postings = GoodsKeyword.objects.filter(
+        keyword__in=keywords, goods__status='on_sale', goods__is_traded=False
+    ).exclude(goods__seller_id=wishlist.user_id)
+    if wishlist.category_id:
+        postings = postings.filter(goods__category_id=wishlist.category_id)
+    shares_keyword = GoodsKeyword.objects.filter(goods_id=OuterRef('pk'), keyword__in=keywords)
+
+    found = {}
+
+    def score(overlap, price_score):
+        # 与 calculate_similarity 相同的累加顺序，保证门槛比较时浮点结果一致
+        total = overlap / keyword_count * KEYWORD_WEIGHT if overlap else 0
+        return min(total + category_score + price_score, 1.0)
+
+    def cutoff():
+        if len(found) < limit:
+            return MATCH_THRESHOLD
+        return max(MATCH_THRESHOLD, sorted(found.values(), reverse=True)[limit - 1])
+
+    # 候选已按心愿单品类过滤，品类加分对同一心愿单的所有候选相同；
+    # 同一价格区间内，含关键词的物品得分只取决于重合的关键词数，不含关键词的物品得分为常数，
+    # 因此每个区间各取前 limit 个即可覆盖暴力扫描的前 limit 名，低分区间在无法超过当前门槛时直接跳过
+    for (goods_band, price_score), (posting_band, _) in zip(price_bands(wishlist), price_bands(wishlist, 'goods__price')):
+        static = score(0, price_score)
+        bound = cutoff()
+        if keywords and static + KEYWORD_WEIGHT >= bound:
+            needed = max(1, math.ceil((bound - static) / per_keyword - 1e-9))
+            rows = (
+                postings.filter(posting_band).values('goods_id')
+                .annotate(overlap=Count('id')).filter(overlap__gte=needed)
+                .order_by('-overlap', '-goods__created_at')[:limit]
+            )
+            for row in rows:
+                found[row['goods_id']] = score(row['overlap'], price_score)
+
+        bound = cutoff()
+        if static >= bound and (len(found) < limit or static > bound):
+            queryset = goods.filter(goods_band)
+            if keywords:
+                queryset = queryset.exclude(Exists(shares_keyword))
+            for goods_id in queryset.order_by('-created_at').values_list('id', flat=True)[:limit]:
+                found.setdefault(goods_id, static)
+    return list(found)
+
+
+def match_candidates(wishlist, use_index=None):
+    if use_index is None:
+        use_index = use_keyword_index()
+    if not use_index:
+        return candidate_queryset(wishlist)
+    return Goods.objects.filter(id__in=find_candidate_ids(wishlist))
+
+
+def find_matches(wishlist, goods_queryset):
+    matched_goods = []
+    for goods in goods_queryset:
+        if goods.seller_id == wishlist.user_id:
+            continue
+        
+        similarity = calculate_similarity(wishlist, goods)
+        if similarity >= MATCH_THRESHOLD:
+            matched_goods.append((goods, similarity))
+    
+    matched_goods.sort(key=lambda x: x[1], reverse=True)
+    return matched_goods[:MATCH_LIMIT]
+
+
+def refresh_wishlist_keywords(wishlist):
+    keywords = extract_keywords(f"{wishlist.name} {wishlist.description or ''}")
+    if keywords != wishlist.keywords:
+        wishlist.keywords = keywords
+        wishlist.save(update_fields=['keywords'])
+    return keywords
+
+
+def run_matching_for_wishlist(wishlist):
+    matched_goods = find_matches(wishlist, match_candidates(wishlist))
+    
+    MatchResult.objects.filter(wishlist=wishlist).delete()
+    
+    match_results = []
+    for goods, similarity in matched_goods:
+        match_result = MatchResult.objects.create(
+            wishlist=wishlist,
+            goods_id=goods.id,
+            goods_name=goods.name,
+            goods_price=goods.price,
+            similarity_score=similarity
+        )
+        match_results.append(match_result)
+    
+    if match_results:
+        wishlist.match_status = 'matched'
+        wishlist.save(update_fields=['match_status'])
+        
+        Notification.objects.create(
+            user=wishlist.user,
+            title='心愿单匹配成功',
+            content=f'您的愿望"{wishlist.name}"已匹配到{len(match_results)}个相关物品，快去看看吧！',
+            notification_type='match',
+            related_id=wishlist.id
+        )
+    
+    return match_results
+
+
+def sync_wishlist_postings(wishlist):
+    keywords = indexable_keywords(wishlist.keywords)
+    WishlistKeyword.objects.filter(wishlist_id=wishlist.id).exclude(keyword__in=keywords).delete()
+    existing = set(WishlistKeyword.objects.filter(wishlist_id=wishlist.id).values_list('keyword', flat=True))
+    WishlistKeyword.objects.bulk_create([
+        WishlistKeyword(wishlist_id=wishlist.id, keyword=keyword) for keyword in keywords - existing
+    ])
+
+
+def find_wishlists_for_goods(goods):
+    # 反向匹配：只有共享关键词、同品类或价格区间可得分的心愿单才可能达到匹配门槛，三路分别走索引
+    keywords = indexable_keywords(goods.keywords if goods.keywords is not None else goods_keywords(goods))
+    ids = set()
+    if keywords:
+        ids.update(WishlistKeyword.objects.filter(keyword__in=keywords).values_list('wishlist_id', flat=True))
+    if goods.category_id:
+        ids.update(Wishlist.objects.filter(category_id=goods.category_id).values_list('id', flat=True))
+    price = goods.price
+    ids.update(Wishlist.objects.filter(category__isnull=True).filter(
+        Q(min_price__lte=price, max_price__gte=price)
+        | Q(min_price__lte=price, max_price__isnull=True)
+        | Q(min_price__lte=price, max_price=0)
+        | Q(min_price__isnull=True, max_price__gte=price)
+    ).values_list('id', flat=True))
+
+    return Wishlist.objects.filter(id__in=ids).filter(
+        Q(category__isnull=True) | Q(category_id=goods.category_id)
+    ).exclude(user_id=goods.seller_id)
+
+
+def percolate_goods(goods_id):
+    goods = Goods.objects.filter(id=goods_id, status='on_sale', is_traded=False).first()
+    if goods is None:
+        return []
+
+    scores = {}
+    wishlists = {}
+    for wishlist in find_wishlists_for_goods(goods):
+        score = calculate_similarity(wishlist, goods)
+        if score >= MATCH_THRESHOLD:
+            scores[wishlist.id] = score
+            wishlists[wishlist.id] = wishlist
+
+    existing = {}
+    current = {}
+    for row in MatchResult.objects.filter(Q(goods_id=goods.id) | Q(wishlist_id__in=list(wishlists))):
+        if row.goods_id == goods.id:
+            existing[row.wishlist_id] = row
+        else:
+            current.setdefault(row.wishlist_id, []).append(row)
+
+    stale = [row.id for wishlist_id, row in existing.items() if wishlist_id not in scores]
+    updated, created, dropped, notified = [], [], [], []
+    for wishlist_id, score in scores.items():
+        if wishlist_id in existing:
+            row = existing[wishlist_id]
+            row.similarity_score, row.goods_name, row.goods_price = score, goods.name, goods.price
+            updated.append(row)
+            continue
+        rows = sorted(current.get(wishlist_id, []), key=lambda row: row.similarity_score)
+        if len(rows) >= MATCH_LIMIT and score <= rows[0].similarity_score:
+            continue
+        if len(rows) >= MATCH_LIMIT:
+            dropped.append(rows[0].id)
+        created.append(MatchResult(
+            wishlist_id=wishlist_id,
+            goods_id=goods.id,
+            goods_name=goods.name,
+            goods_price=goods.price,
+            similarity_score=score
+        ))
+        notified.append(wishlists[wishlist_id])
+
+    with transaction.atomic():
+        MatchResult.objects.filter(id__in=stale + dropped).delete()
+        MatchResult.objects.bulk_update(updated, ['similarity_score', 'goods_name', 'goods_price'])
+        MatchResult.objects.bulk_create(created)
+        Wishlist.objects.filter(id__in=[wishlist.id for wishlist in notified]).update(match_status='matched')
+        Notification.objects.bulk_create([
+            Notification(
+                user_id=wishlist.user_id,
+                title='心愿单匹配成功',
+                content=f'物品"{goods.name}"符合您的愿望"{wishlist.name}"，快去看看吧！',
+                notification_type='match',
+                related_id=wishlist.id
+            )
+            for wishlist in notified
+        ])
+    return [wishlist.id for wishlist in notified]
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_match_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'WISHLIST_MATCH_WORKERS', 2),
+                    thread_name_prefix='wishlist-match'
+                )
+    return _executor
+
+
+def run_percolation(goods_id):
+    try:
+        return percolate_goods(goods_id)
+    except Exception:
+        logger.exception('物品 %s 反向匹配心愿单失败', goods_id)
+    finally:
+        connection.close()
+
+
+def schedule_percolation(goods_id):
+    return get_match_executor().submit(run_percolation, goods_id)
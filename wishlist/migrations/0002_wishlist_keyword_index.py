@@ -0,0 +1,70 @@
+# Generated by Django 4.2.8 on 2026-10-18 11:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_wishlist_keywords(apps, schema_editor):
+    Wishlist = apps.get_model("wishlist", "Wishlist")
+    WishlistKeyword = apps.get_model("wishlist", "WishlistKeyword")
+    postings = [
+        WishlistKeyword(wishlist_id=wishlist_id, keyword=keyword)
+        for wishlist_id, keywords in Wishlist.objects.values_list("id", "keywords").iterator()
+        for keyword in set(keywords or [])
+        if len(keyword) <= 100
+    ]
+    WishlistKeyword.objects.bulk_create(postings, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("wishlist", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WishlistKeyword",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("keyword", models.CharField(max_length=100, verbose_name="关键词")),
+            ],
+            options={
+                "verbose_name": "心愿单关键词索引",
+                "verbose_name_plural": "心愿单关键词索引",
+                "db_table": "wishlist_keyword",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="wishlist",
+            index=models.Index(
+                fields=["category", "min_price", "max_price"],
+                name="wishlist_category_price_idx",
+            ),
+        ),
+        migrations.AddField(
+            model_name="wishlistkeyword",
+            name="wishlist",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="keyword_postings",
+                to="wishlist.wishlist",
+                verbose_name="心愿单",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="wishlistkeyword",
+            constraint=models.UniqueConstraint(
+                fields=("keyword", "wishlist"), name="wishlist_keyword_uniq"
+            ),
+        ),
+        migrations.RunPython(populate_wishlist_keywords, migrations.RunPython.noop),
+    ]
@@ -25,6 +25,9 @@ class Wishlist(models.Model):
         verbose_name = '心愿单'
         verbose_name_plural = '心愿单'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['category', 'min_price', 'max_price'], name='wishlist_category_price_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.name}"
@@ -47,3 +50,49 @@ class MatchResult(models.Model):
     
     def __str__(self):
         return f"{self.wishlist.name} - {self.goods_name}"
+
+
+class WishlistKeyword(models.Model):
+    wishlist = models.ForeignKey(Wishlist, on_delete=models.CASCADE, related_name='keyword_postings', verbose_name='心愿单')
+    keyword = models.CharField('关键词', max_length=100)
+    
+    class Meta:
+        db_table = 'wishlist_keyword'
+        verbose_name = '心愿单关键词索引'
+        verbose_name_plural = '心愿单关键词索引'
+        constraints = [
+            models.UniqueConstraint(fields=['keyword', 'wishlist'], name='wishlist_keyword_uniq'),
+        ]
+    
+    def __str__(self):
+        return self.keyword
+
+
+class MatchJob(models.Model):
+    STATUS_CHOICES = [
+        ('pending', '待执行'),
+        ('running', '执行中'),
+        ('succeeded', '已完成'),
+        ('failed', '失败'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='match_jobs', verbose_name='用户')
+    wishlist = models.ForeignKey(Wishlist, on_delete=models.CASCADE, related_name='match_jobs', verbose_name='心愿单')
+    status = models.CharField('任务状态', max_length=20, choices=STATUS_CHOICES, default='pending')
+    result = models.JSONField('匹配结果', null=True, blank=True)
+    error = models.TextField('错误信息', blank=True, default='')
+    created_at = models.DateTimeField('提交时间', auto_now_add=True)
+    started_at = models.DateTimeField('开始时间', null=True, blank=True)
+    finished_at = models.DateTimeField('完成时间', null=True, blank=True)
+    
+    class Meta:
+        db_table = 'wishlist_match_job'
+        verbose_name = '心愿单匹配任务'
+        verbose_name_plural = '心愿单匹配任务'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'id'], name='wishlist_job_status_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.wishlist_id} - {self.status}"
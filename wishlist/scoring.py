@@ -0,0 +1,201 @@
+from django.conf import settings
+from django.db import transaction
+
+from goods.keywords import goods_keywords
+from goods.models import Goods
+from users.models import Notification
+from .matching import CATEGORY_WEIGHT, KEYWORD_WEIGHT, MATCH_LIMIT, MATCH_THRESHOLD
+from .models import MatchResult, Wishlist
+
+
+def get_score_block_size():
+    return getattr(settings, 'WISHLIST_SCORE_BLOCK_CELLS', 10000000)
+
+
+def price_cents(value):
+    return int(value * 100) if value else 0
+
+
+def keyword_matrix(keyword_lists, vocabulary):
+    import numpy as np
+    from scipy import sparse
+
+    rows, cols = [], []
+    for row, keywords in enumerate(keyword_lists):
+        for col in {vocabulary[keyword] for keyword in keywords or () if keyword in vocabulary}:
+            rows.append(row)
+            cols.append(col)
+    return sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float64), (rows, cols)),
+        shape=(len(keyword_lists), len(vocabulary))
+    )
+
+
+class WishlistBatch:
+    def __init__(self, wishlists):
+        import numpy as np
+
+        self.wishlists = list(wishlists)
+        self.vocabulary = {}
+        for wishlist in self.wishlists:
+            for keyword in wishlist.keywords or ():
+                self.vocabulary.setdefault(keyword, len(self.vocabulary))
+        self.keywords = keyword_matrix([wishlist.keywords for wishlist in self.wishlists], self.vocabulary)
+        self.keyword_counts = np.array([max(len(set(wishlist.keywords or ())), 1) for wishlist in self.wishlists], dtype=np.float64)
+        self.user = np.array([wishlist.user_id or 0 for wishlist in self.wishlists], dtype=np.int64)
+        self.category = np.array([wishlist.category_id or 0 for wishlist in self.wishlists], dtype=np.int64)
+        self.low = np.array([price_cents(wishlist.min_price) for wishlist in self.wishlists], dtype=np.int64)
+        self.high = np.array([price_cents(wishlist.max_price) for wishlist in self.wishlists], dtype=np.int64)
+
+    def __len__(self):
+        return len(self.wishlists)
+
+
+class GoodsBatch:
+    def __init__(self, rows, vocabulary):
+        import numpy as np
+
+        self.ids = np.array([row['id'] for row in rows], dtype=np.int64)
+        self.names = [row['name'] for row in rows]
+        self.prices = [row['price'] for row in rows]
+        self.keywords = keyword_matrix([row['keywords'] for row in rows], vocabulary).T.tocsc()
+        self.seller = np.array([row['seller_id'] for row in rows], dtype=np.int64)
+        self.category = np.array([row['category_id'] or 0 for row in rows], dtype=np.int64)
+        self.price = np.array([price_cents(row['price']) for row in rows], dtype=np.int64)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def load_goods_batch(vocabulary, queryset=None):
+    if queryset is None:
+        queryset = Goods.objects.filter(status='on_sale', is_traded=False)
+    rows = list(
+        queryset.order_by('-created_at')
+        .values('id', 'name', 'seller_id', 'category_id', 'price', 'keywords')
+    )
+    missing = [row for row in rows if row['keywords'] is None]
+    if missing:
+        descriptions = dict(Goods.objects.filter(id__in=[row['id'] for row in missing]).values_list('id', 'description'))
+        for row in missing:
+            row['keywords'] = goods_keywords(Goods(name=row['name'], description=descriptions[row['id']]))
+    return GoodsBatch(rows, vocabulary)
+
+
+def score_matrix(wishlists, goods, start=0, stop=None):
+    import numpy as np
+
+    stop = len(goods) if stop is None else stop
+    overlap = (wishlists.keywords @ goods.keywords[:, start:stop]).toarray()
+    scores = np.where(overlap >= 1, overlap / wishlists.keyword_counts[:, None], 0.0) * KEYWORD_WEIGHT
+
+    category = goods.category[None, start:stop]
+    same_category = (wishlists.category[:, None] != 0) & (category != 0) & (wishlists.category[:, None] == category)
+    scores = scores + np.where(same_category, CATEGORY_WEIGHT, 0.0)
+
+    # 价格统一换算为分后做整数比较；超出上限 20% 以内即 (p - max) / max <= 0.2，对正数上限等价于 5p <= 6max
+    price = goods.price[None, start:stop]
+    low, high = wishlists.low[:, None], wishlists.high[:, None]
+    both = (low != 0) & (high != 0)
+    near_high = (high < 0) | ((high > 0) & (5 * price <= 6 * high))
+    scores = scores + np.select(
+        [
+            both & (low <= price) & (price <= high),
+            both & (price < low),
+            both & (price > high) & near_high,
+            (low != 0) & (high == 0) & (price >= low),
+            (low == 0) & (high != 0) & (price <= high),
+        ],
+        [0.15, 0.05, 0.05, 0.1, 0.1],
+        0.0
+    )
+    return np.minimum(scores, 1.0)
+
+
+def candidate_mask(wishlists, goods, start=0, stop=None):
+    stop = len(goods) if stop is None else stop
+    category = goods.category[None, start:stop]
+    allowed = (wishlists.category[:, None] == 0) | (wishlists.category[:, None] == category)
+    return allowed & (wishlists.user[:, None] != goods.seller[None, start:stop])
+
+
+def top_matches(wishlists, goods, limit=MATCH_LIMIT, threshold=MATCH_THRESHOLD):
+    import numpy as np
+
+    count = len(wishlists)
+    best_scores = np.full((count, limit), -np.inf)
+    best_index = np.full((count, limit), -1, dtype=np.int64)
+    step = max(1, get_score_block_size() // max(count, 1))
+
+    for start in range(0, len(goods), step):
+        stop = min(start + step, len(goods))
+        scores = score_matrix(wishlists, goods, start, stop)
+        scores[~candidate_mask(wishlists, goods, start, stop) | (scores < threshold)] = -np.inf
+
+        # 已选结果排在本块之前，同分时按列序保留位置靠前（更新发布）的物品，与逐条扫描的稳定排序一致
+        merged_scores = np.hstack([best_scores, scores])
+        merged_index = np.hstack([best_index, np.broadcast_to(np.arange(start, stop), scores.shape)])
+        kth = -np.partition(-merged_scores, limit - 1, axis=1)[:, limit - 1]
+        rows, cols = np.nonzero((merged_scores >= kth[:, None]) & np.isfinite(merged_scores))
+        order = np.lexsort((cols, -merged_scores[rows, cols], rows))
+        rows, cols = rows[order], cols[order]
+        first = np.searchsorted(rows, rows, side='left')
+        keep = np.arange(len(rows)) - first < limit
+        rows, cols = rows[keep], cols[keep]
+        ranks = np.arange(len(rows)) - np.searchsorted(rows, rows, side='left')
+
+        best_scores = np.full((count, limit), -np.inf)
+        best_index = np.full((count, limit), -1, dtype=np.int64)
+        best_scores[rows, ranks] = merged_scores[rows, cols]
+        best_index[rows, ranks] = merged_index[rows, cols]
+
+    return [
+        [(int(index), float(score)) for index, score in zip(indexes, scores) if index >= 0]
+        for indexes, scores in zip(best_index, best_scores)
+    ]
+
+
+def rematch_wishlists(queryset=None, dry_run=False):
+    wishlists = WishlistBatch((queryset if queryset is not None else Wishlist.objects.all()).order_by('id'))
+    if not len(wishlists):
+        return {'wishlists': 0, 'matched': 0, 'notified': 0}
+    goods = load_goods_batch(wishlists.vocabulary)
+    matches = top_matches(wishlists, goods)
+
+    previous = {}
+    for wishlist_id, goods_id in MatchResult.objects.filter(
+        wishlist_id__in=[wishlist.id for wishlist in wishlists.wishlists]
+    ).values_list('wishlist_id', 'goods_id'):
+        previous.setdefault(wishlist_id, set()).add(goods_id)
+
+    results, matched, notified = [], [], []
+    for wishlist, rows in zip(wishlists.wishlists, matches):
+        for index, score in rows:
+            results.append(MatchResult(
+                wishlist_id=wishlist.id,
+                goods_id=int(goods.ids[index]),
+                goods_name=goods.names[index],
+                goods_price=goods.prices[index],
+                similarity_score=score
+            ))
+        if rows:
+            matched.append(wishlist.id)
+            if {int(goods.ids[index]) for index, _ in rows} - previous.get(wishlist.id, set()):
+                notified.append(wishlist)
+
+    if not dry_run:
+        with transaction.atomic():
+            MatchResult.objects.filter(wishlist_id__in=[wishlist.id for wishlist in wishlists.wishlists]).delete()
+            MatchResult.objects.bulk_create(results, batch_size=2000)
+            Wishlist.objects.filter(id__in=matched).update(match_status='matched')
+            Notification.objects.bulk_create([
+                Notification(
+                    user_id=wishlist.user_id,
+                    title='心愿单匹配成功',
+                    content=f'您的愿望"{wishlist.name}"有新的匹配物品，快去看看吧！',
+                    notification_type='match',
+                    related_id=wishlist.id
+                )
+                for wishlist in notified
+            ], batch_size=2000)
+    return {'wishlists': len(wishlists), 'matched': len(matched), 'notified': len(notified)}
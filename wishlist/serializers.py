@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Wishlist, MatchResult
+from .models import Wishlist, MatchResult, MatchJob
 
 
 class WishlistSerializer(serializers.ModelSerializer):
@@ -84,3 +84,13 @@ class MatchResultSerializer(serializers.ModelSerializer):
             return goods.seller.credit_score
         except Goods.DoesNotExist:
             return 0
+
+
+class MatchJobSerializer(serializers.ModelSerializer):
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    
+    class Meta:
+        model = MatchJob
+        fields = ['id', 'wishlist', 'status', 'status_display', 'result', 'error',
+                  'created_at', 'started_at', 'finished_at']
+        read_only_fields = fields
@@ -0,0 +1,44 @@
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+from goods.models import Goods
+from goods.signals import goods_bulk_created
+from .matching import schedule_percolation, sync_wishlist_postings
+from .models import Wishlist
+
+
+@receiver(post_save, sender=Wishlist)
+def index_wishlist_keywords(sender, instance, update_fields=None, **kwargs):
+    if update_fields and 'keywords' not in update_fields:
+        return
+    sync_wishlist_postings(instance)
+
+
+@receiver(pre_save, sender=Goods)
+def detect_reprice(sender, instance, update_fields=None, **kwargs):
+    if instance._state.adding or instance.pk is None:
+        instance._percolate = True
+    elif update_fields is None or 'price' in update_fields:
+        previous = Goods.objects.filter(pk=instance.pk).values_list('price', flat=True).first()
+        instance._percolate = previous is not None and previous != instance.price
+    else:
+        instance._percolate = False
+
+
+@receiver(post_save, sender=Goods)
+def percolate_wishlists(sender, instance, **kwargs):
+    if getattr(instance, '_percolate', False):
+        goods_id = instance.id
+        transaction.on_commit(lambda: schedule_percolation(goods_id))
+
+
+@receiver(goods_bulk_created)
+def percolate_bulk_created(sender, goods_ids, **kwargs):
+    goods_ids = list(goods_ids)
+
+    def schedule():
+        for goods_id in goods_ids:
+            schedule_percolation(goods_id)
+
+    transaction.on_commit(schedule)
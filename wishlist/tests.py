@@ -1,3 +1,184 @@
-from django.test import TestCase
+import io
+import json
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from goods.importer import import_goods
+from goods.management.commands._bench import make_wishlists, seed_goods
+from goods.models import Category, Goods
+from users.models import User
+from . import jobs, signals
+from .matching import (
+    MATCH_LIMIT, calculate_similarity, candidate_queryset, find_matches, match_candidates, refresh_wishlist_keywords
+)
+from .models import MatchJob, Wishlist
+from .scoring import WishlistBatch, load_goods_batch, score_matrix, top_matches
+
+
+class KeywordIndexParityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user(username='seller', password='pass')
+        cls.buyer = User.objects.create_user(username='buyer', password='pass')
+        cls.books = Category.objects.create(name='图书')
+        cls.digital = Category.objects.create(name='数码')
+        for index, (name, category, price) in enumerate([
+            ('考研数学教材', cls.books, '30.00'),
+            ('英语四级真题', cls.books, '15.00'),
+            ('线性代数教材', cls.books, '25.00'),
+            ('华为降噪耳机', cls.digital, '300.00'),
+            ('小米蓝牙耳机', cls.digital, '120.00'),
+            ('罗技无线鼠标', cls.digital, '80.00'),
+            ('宿舍小台灯', None, '20.00'),
+        ]):
+            Goods.objects.create(
+                seller=cls.seller, name=name, category=category,
+                description=f'九成新 第{index}件', price=Decimal(price)
+            )
+        Goods.objects.create(seller=cls.buyer, name='自己的教材', category=cls.books, price=Decimal('10.00'))
+
+    def make_wishlist(self, name, **fields):
+        wishlist = Wishlist.objects.create(user=self.buyer, name=name, **fields)
+        refresh_wishlist_keywords(wishlist)
+        return wishlist
+
+    def assert_parity(self, wishlist):
+        indexed = [(goods.id, score) for goods, score in find_matches(wishlist, match_candidates(wishlist, True))]
+        brute = [(goods.id, score) for goods, score in find_matches(wishlist, match_candidates(wishlist, False))]
+        self.assertEqual(indexed, brute)
+        return indexed
+
+    def test_category_only(self):
+        matches = self.assert_parity(self.make_wishlist('随便看看', category=self.books))
+        self.assertEqual(len(matches), 3)
+        self.assertTrue(all(score == 0.2 for _, score in matches))
+
+    def test_price_only(self):
+        matches = self.assert_parity(self.make_wishlist('随便看看', min_price=Decimal('10'), max_price=Decimal('100')))
+        self.assertEqual(len(matches), 5)
+
+    def test_min_price_only(self):
+        self.assertTrue(self.assert_parity(self.make_wishlist('随便看看', min_price=Decimal('100'))))
+
+    def test_keywords_with_category_and_price(self):
+        wishlist = self.make_wishlist(
+            '降噪耳机', category=self.digital, min_price=Decimal('100'), max_price=Decimal('250')
+        )
+        matches = self.assert_parity(wishlist)
+        self.assertEqual(len(matches), 3)
+
+    def test_excludes_own_goods(self):
+        matches = self.assert_parity(self.make_wishlist('教材', category=self.books))
+        own = Goods.objects.get(name='自己的教材')
+        self.assertNotIn(own.id, [goods_id for goods_id, _ in matches])
+
+    def test_generated_wishlists(self):
+        _, categories = seed_goods(300, keywords=True)
+        for wishlist in make_wishlists(30, categories):
+            indexed = find_matches(wishlist, match_candidates(wishlist, True))
+            brute = find_matches(wishlist, match_candidates(wishlist, False))
+            brute_scores = [round(score, 9) for _, score in brute]
+            self.assertEqual([round(score, 9) for _, score in indexed], brute_scores)
+            # 末位同分的物品先后顺序不确定，只比较严格高于末位分数的物品
+            floor = brute_scores[-1] if len(brute_scores) == MATCH_LIMIT else -1
+            strict = {goods.id for goods, score in brute if round(score, 9) > floor}
+            self.assertLessEqual(strict, {goods.id for goods, _ in indexed})
+
+
+@override_settings(WISHLIST_SCORE_BLOCK_CELLS=500)
+class VectorScoringTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        _, cls.categories = seed_goods(200, keywords=True, statuses=['on_sale', 'on_sale', 'off_sale'])
+
+    def test_matches_scalar_scoring(self):
+        wishlist_list = make_wishlists(20, self.categories)
+        wishlists = WishlistBatch(wishlist_list)
+        goods = load_goods_batch(wishlists.vocabulary)
+        items = Goods.objects.in_bulk([int(goods_id) for goods_id in goods.ids])
+        ordered = [items[int(goods_id)] for goods_id in goods.ids]
+
+        vector = score_matrix(wishlists, goods)
+        self.assertTrue(vector.any())
+        for row, wishlist in enumerate(wishlist_list):
+            self.assertEqual(list(vector[row]), [calculate_similarity(wishlist, item) for item in ordered])
+
+        for wishlist, rows in zip(wishlist_list, top_matches(wishlists, goods)):
+            expected = find_matches(wishlist, candidate_queryset(wishlist))
+            self.assertEqual([score for _, score in rows], [score for _, score in expected])
+
+
+class MatchJobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user(username='seller', password='pass')
+        cls.buyer = User.objects.create_user(username='buyer', password='pass')
+        Goods.objects.create(seller=cls.seller, name='华为降噪耳机', price=Decimal('300'))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.buyer)
+
+    def test_create_returns_job_and_keywords(self):
+        response = self.client.post('/api/wishlist/wishlists/', {'name': '降噪耳机'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['data']['wishlist']['keywords'], ['耳机', '降噪'])
+        job_id = response.data['data']['job']['id']
+
+        with mock.patch.object(jobs, 'push_job_result') as push:
+            jobs.run_job(job_id)
+        push.assert_called_once()
+
+        response = self.client.get(f'/api/wishlist/match-jobs/{job_id}/')
+        self.assertEqual(response.data['data']['status'], 'succeeded')
+        self.assertEqual(response.data['data']['result']['match_count'], 1)
+
+    def test_other_users_cannot_poll(self):
+        wishlist = Wishlist.objects.create(user=self.seller, name='教材')
+        job = MatchJob.objects.create(user=self.seller, wishlist=wishlist)
+        self.assertEqual(self.client.get(f'/api/wishlist/match-jobs/{job.id}/').status_code, 404)
+
+    def test_rematch_reuses_pending_job(self):
+        wishlist = Wishlist.objects.create(user=self.buyer, name='耳机')
+        first = self.client.post(f'/api/wishlist/wishlists/{wishlist.id}/rematch/')
+        second = self.client.post(f'/api/wishlist/wishlists/{wishlist.id}/rematch/')
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(first.data['data']['id'], second.data['data']['id'])
+
+    def test_resume_command_recovers_stale_jobs(self):
+        wishlist = Wishlist.objects.create(user=self.buyer, name='耳机', keywords=['耳机'])
+        stale = MatchJob.objects.create(
+            user=self.buyer, wishlist=wishlist, status='running',
+            started_at=timezone.now() - timedelta(hours=1)
+        )
+        pending = MatchJob.objects.create(user=self.buyer, wishlist=wishlist)
+        with mock.patch.object(jobs, 'push_job_result'):
+            call_command('resume_match_jobs', stdout=mock.MagicMock())
+        self.assertEqual(
+            set(MatchJob.objects.filter(id__in=[stale.id, pending.id]).values_list('status', flat=True)),
+            {'succeeded'}
+        )
+
+
+class PercolationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user(username='seller', password='pass')
+
+    def test_imported_goods_are_percolated_after_commit(self):
+        rows = '\n'.join(
+            json.dumps({'name': f'降噪耳机{index}', 'description': '九成新', 'price': '100'}) for index in range(3)
+        )
+        with mock.patch.object(signals, 'schedule_percolation') as schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                import_goods(io.StringIO(rows), self.seller, fmt='jsonl')
+        self.assertEqual(
+            sorted(call.args[0] for call in schedule.call_args_list),
+            sorted(Goods.objects.filter(seller=self.seller).values_list('id', flat=True))
+        )
@@ -1,10 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import WishlistViewSet, MatchResultViewSet
+from .views import WishlistViewSet, MatchResultViewSet, MatchJobViewSet
 
 router = DefaultRouter()
 router.register(r'wishlists', WishlistViewSet, basename='wishlist')
 router.register(r'match-results', MatchResultViewSet, basename='match-result')
+router.register(r'match-jobs', MatchJobViewSet, basename='match-job')
 
 urlpatterns = [
     path('', include(router.urls)),